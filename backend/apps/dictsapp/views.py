@@ -34,6 +34,8 @@ class DictEntriesView(generics.ListAPIView):
 
     serializer_class = DictEntrySerializer
     permission_classes = (IsAuthenticated,)
+    # 字典项按展示顺序排列且数量有限，不分页
+    pagination_class = None
 
     def get_queryset(self) -> QuerySet[DictEntry]:
         category = self.kwargs["category"]
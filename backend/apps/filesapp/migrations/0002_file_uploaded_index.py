@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('filesapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['uploaded_at', 'id'], name='file_uploaded_idx'),
+        ),
+    ]
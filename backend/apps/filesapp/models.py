@@ -81,6 +81,10 @@ class File(models.Model):
     class Meta:
         verbose_name = "文件"
         verbose_name_plural = "文件"
+        indexes = [
+            # 列表游标分页的排序键
+            models.Index(fields=["uploaded_at", "id"], name="file_uploaded_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"File {self.id} ({self.file.name})"
@@ -47,6 +47,8 @@ class FileListView(generics.ListAPIView):
 
     serializer_class = FileSerializer
     permission_classes = (IsAuthenticated,)
+    cursor_ordering = ("-uploaded_at", "-id")
+    page_size = 20
 
     def get_queryset(self) -> QuerySet[File]:
         qs = File.objects.all().order_by("-uploaded_at")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policiesapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='policy',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='policy_active_created_idx'),
+        ),
+    ]
@@ -41,6 +41,10 @@ class Policy(models.Model):
         verbose_name = "保研政策"
         verbose_name_plural = "保研政策"
         ordering = ("-created_at",)
+        indexes = [
+            # 有效政策列表的游标分页排序键
+            models.Index(fields=["is_active", "created_at", "id"], name="policy_active_created_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return self.title
@@ -20,12 +20,16 @@ class PolicyTagListView(generics.ListAPIView):
     queryset = PolicyTag.objects.filter(is_active=True).order_by("order", "code")
     serializer_class = PolicyTagSerializer
     permission_classes = (IsAuthenticated,)
+    # 标签为按展示顺序排列的小型字典，不分页
+    pagination_class = None
 
 
 class PolicyListCreateView(generics.ListCreateAPIView):
     serializer_class = PolicySerializer
     permission_classes = (IsAuthenticated, RolePermission)
     required_roles: Iterable[str] = ("teacher", "admin")
+    cursor_ordering = ("-created_at", "-id")
+    page_size = 20
 
     def get_permissions(self) -> list:
         if self.request.method in ("GET", "HEAD", "OPTIONS"):
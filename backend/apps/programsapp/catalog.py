@@ -0,0 +1,40 @@
+"""项目目录（``GET /programs/projects/``）响应的版本化缓存。
+
+缓存 key 由版本号（见 ``core.versioned_cache``）与查询参数组成；项目或报名发生写入时，在事务提交后递增版本号，
+旧版本的缓存不再命中并自然过期。Django cache 不可用时直接查询数据库。
+"""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from core.versioned_cache import CacheVersion, get_or_build
+
+CATALOG_VERSION = CacheVersion("programsapp:catalog:version", "Catalog")
+CATALOG_KEY_PREFIX = "programsapp:catalog"
+# 过期版本的缓存自然淘汰
+CATALOG_CACHE_TIMEOUT = 10 * 60
+
+
+def catalog_version() -> int | None:
+    return CATALOG_VERSION.get()
+
+
+def _bump_version() -> None:
+    CATALOG_VERSION.bump()
+
+
+def invalidate_catalog() -> None:
+    """项目或报名发生写入时调用：事务提交后使目录缓存失效。"""
+    CATALOG_VERSION.invalidate()
+
+
+def get_cached_catalog(params: Mapping[str, Any], build: Callable[[], Any]) -> Any:
+    """返回 params 对应的目录数据；同一版本内命中缓存，否则调用 build 计算并写入。"""
+    version = catalog_version()
+    key = None
+    if version is not None:
+        scope = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()
+        key = f"{CATALOG_KEY_PREFIX}:{version}:{scope}"
+    return get_or_build(key, build, CATALOG_CACHE_TIMEOUT, "Catalog")
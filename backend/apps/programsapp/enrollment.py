@@ -0,0 +1,352 @@
+"""项目报名的名额预留。
+
+名额由 ``TeacherProject.remaining_slots`` 计数：报名时以一条条件 UPDATE
+（``... SET remaining_slots = remaining_slots - 1 WHERE remaining_slots > 0 AND status = 'active'``）
+占用一个名额（同一条语句中递增 ``active_selection_count``），影响行数为 1 即预留成功，
+无需先 COUNT 再比较，也不会超卖，报名之间不需要额外锁定项目行；
+同一事务中随后插入报名记录，重复报名由 ``(project, open_key)`` 唯一约束拦住（见 ``ProjectSelection.open_key``），
+插入失败时名额随事务一起回滚。
+名额已满时报名进入候补（waitlisted），候补号由项目上的 ``waitlist_tail`` 计数器发出。
+取消报名时以条件 UPDATE 把报名从 active 改为 cancelled，只有真正发生状态变化时才归还名额，
+并在同一事务中把名额交给候补号最小的学生。
+
+开启抢报模式（``TeacherProject.rush_mode``）的项目不在请求中直接报名，而是写入排队票据，
+见下方 ``drain_enrollment_queue``。
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, QuerySet, Subquery, Value, When
+from django.db.models.expressions import CombinedExpression
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .catalog import invalidate_catalog
+from .models import EnrollmentTicket, ProjectSelection, TeacherProject, resolve_student_users
+
+
+class EnrollmentError(Exception):
+    """报名失败；code 区分失败原因。"""
+
+    CLOSED = "closed"
+    DUPLICATE = "duplicate"
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+OPEN_STATUSES = (ProjectSelection.SelectionStatus.ACTIVE, ProjectSelection.SelectionStatus.WAITLISTED)
+
+
+def lock_project(project_id: str) -> None:
+    """在当前事务中锁定项目行，直到事务结束。"""
+    if connection.features.has_select_for_update:
+        TeacherProject.objects.select_for_update().filter(pk=project_id).values_list("pk", flat=True).first()
+        return
+    # SQLite 不支持 SELECT ... FOR UPDATE，先读后写的事务会因读锁无法升级而反复冲突；
+    # 以一条不改变数据的 UPDATE 直接取得写锁
+    TeacherProject.objects.filter(pk=project_id).update(waitlist_tail=F("waitlist_tail"))
+
+
+def reserve_seat(project_id: str) -> bool:
+    """为项目占用一个名额；名额已满或项目未开放时返回 False。"""
+    updated = TeacherProject.objects.filter(
+        pk=project_id,
+        status=TeacherProject.ProjectStatus.ACTIVE,
+        remaining_slots__gt=0,
+    ).update(remaining_slots=F("remaining_slots") - 1, active_selection_count=F("active_selection_count") + 1)
+    return updated == 1
+
+
+def release_seat(project_id: str) -> None:
+    """归还一个名额。"""
+    TeacherProject.objects.filter(pk=project_id).update(
+        remaining_slots=F("remaining_slots") + 1, active_selection_count=F("active_selection_count") - 1
+    )
+
+
+def take_waitlist_numbers(project_id: str, count: int = 1) -> int:
+    """为项目连续发出 count 个候补号，返回其中第一个；须在事务中调用。"""
+    TeacherProject.objects.filter(pk=project_id).update(waitlist_tail=F("waitlist_tail") + count)
+    tail = TeacherProject.objects.filter(pk=project_id).values_list("waitlist_tail", flat=True).get()
+    return tail - count + 1
+
+
+def enroll(
+    project: TeacherProject,
+    *,
+    student_name: str,
+    student_account: str,
+    student_id: str = "",
+    notes: str = "",
+) -> ProjectSelection:
+    """占用名额并创建报名记录；名额已满时进入候补。失败时抛出 EnrollmentError。"""
+    if project.status != TeacherProject.ProjectStatus.ACTIVE:
+        raise EnrollmentError(EnrollmentError.CLOSED, "该项目暂未开放报名，请选择其他项目。")
+    selection = ProjectSelection(
+        project=project,
+        student_name=student_name,
+        student_account=student_account,
+        student_id=student_id,
+        notes=notes,
+        status=ProjectSelection.SelectionStatus.ACTIVE,
+    )
+    try:
+        with transaction.atomic():
+            if not reserve_seat(project.pk):
+                selection.status = ProjectSelection.SelectionStatus.WAITLISTED
+                selection.waitlist_number = take_waitlist_numbers(project.pk)
+            selection.save(force_insert=True)
+    except IntegrityError as exc:
+        # (project, open_key) 唯一约束保证同一学生在同一项目只有一条有效或候补中的报名
+        raise EnrollmentError(EnrollmentError.DUPLICATE, "您已报名该项目，请勿重复提交。") from exc
+    return selection
+
+
+def promote_waitlist(project_id: str) -> int:
+    """把空出的名额按候补号依次分给候补学生，返回转正人数；须在事务中调用。"""
+    waitlist = ProjectSelection.objects.filter(
+        project_id=project_id,
+        status=ProjectSelection.SelectionStatus.WAITLISTED,
+    )
+    promoted = 0
+    while True:
+        head = waitlist.order_by("waitlist_number").values_list("pk", flat=True).first()
+        if head is None:
+            break
+        # 转正不受项目暂停影响：候补学生在名额空出前已完成报名
+        if not TeacherProject.objects.filter(pk=project_id, remaining_slots__gt=0).update(
+            remaining_slots=F("remaining_slots") - 1, active_selection_count=F("active_selection_count") + 1
+        ):
+            break
+        # 候补者可能同时取消，条件更新失败时归还名额并看下一位
+        if waitlist.filter(pk=head).update(
+            status=ProjectSelection.SelectionStatus.ACTIVE,
+            waitlist_number=None,
+            updated_at=timezone.now(),
+        ):
+            promoted += 1
+        else:
+            release_seat(project_id)
+    if promoted:
+        invalidate_catalog()
+    return promoted
+
+
+def cancel_selection(selection: ProjectSelection) -> bool:
+    """取消报名或候补；取消有效报名时在同一事务中由候补队首转正。
+
+    报名已被取消时返回 False。
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        cancelled_active = ProjectSelection.objects.filter(
+            pk=selection.pk,
+            status=ProjectSelection.SelectionStatus.ACTIVE,
+        ).update(status=ProjectSelection.SelectionStatus.CANCELLED, updated_at=now)
+        if cancelled_active:
+            release_seat(selection.project_id)
+            promote_waitlist(selection.project_id)
+            cancelled = True
+        else:
+            cancelled = bool(
+                ProjectSelection.objects.filter(
+                    pk=selection.pk,
+                    status=ProjectSelection.SelectionStatus.WAITLISTED,
+                ).update(status=ProjectSelection.SelectionStatus.CANCELLED, waitlist_number=None, updated_at=now)
+            )
+        if cancelled:
+            invalidate_catalog()
+    selection.status = ProjectSelection.SelectionStatus.CANCELLED
+    selection.waitlist_number = None
+    return cancelled
+
+
+def _position(ahead: QuerySet) -> CombinedExpression:
+    # 排在前面的记录数 + 1；同一项目的记录按 project_id 分组只得到一行
+    counted = ahead.order_by().values("project_id").annotate(count=Count("pk")).values("count")[:1]
+    return Coalesce(Subquery(counted), Value(0)) + 1
+
+
+def with_waitlist_positions(queryset: QuerySet, path: str = "") -> QuerySet:
+    """为 queryset 标注 waitlist_rank（候补位置，非候补为 None），列表序列化时不再逐行 COUNT。
+
+    path 为报名记录相对 queryset 模型的查找路径，如票据上的 ``"selection__"``。
+    """
+    waitlisted = ProjectSelection.SelectionStatus.WAITLISTED
+    ahead = ProjectSelection.objects.filter(
+        project_id=OuterRef(f"{path}project_id"),
+        status=waitlisted,
+        waitlist_number__lt=OuterRef(f"{path}waitlist_number"),
+    )
+    annotated: QuerySet = queryset.annotate(
+        waitlist_rank=Case(
+            When(**{f"{path}status": waitlisted, f"{path}waitlist_number__isnull": False}, then=_position(ahead)),
+            default=None,
+            output_field=IntegerField(),
+        )
+    )
+    return annotated
+
+
+def waitlist_position(selection: ProjectSelection) -> int | None:
+    """候补中的报名在项目候补队列中的位置（从 1 开始）；其他状态为 None。"""
+    if selection.status != ProjectSelection.SelectionStatus.WAITLISTED or selection.waitlist_number is None:
+        return None
+    return (
+        ProjectSelection.objects.filter(
+            project_id=selection.project_id,
+            status=ProjectSelection.SelectionStatus.WAITLISTED,
+            waitlist_number__lt=selection.waitlist_number,
+        ).count()
+        + 1
+    )
+
+
+# ---------------------------------------------------------------------------
+# 抢报模式：报名请求写入 EnrollmentTicket 队列后立即返回，由消费者按到达顺序（票据自增主键）批量处理。
+# 保证同一项目同一时刻只有一个写者的是每批开头的项目行锁（lock_project）；
+# cache 中的消费者锁只用于避免重复派发的消费者空转，不提供互斥——进程内 LocMem 下各进程各有一份。
+# ---------------------------------------------------------------------------
+
+# 消费者每批处理的票据数
+DRAIN_BATCH_SIZE = 200
+DRAIN_LOCK_PREFIX = "programsapp:enrollment-drain"
+# 消费者锁的有效期（秒），每处理一批续期一次；进程异常退出后锁自然过期
+DRAIN_LOCK_TIMEOUT = 60
+
+
+def _drain_lock_key(project_id: str) -> str:
+    return f"{DRAIN_LOCK_PREFIX}:{project_id}"
+
+
+def _reject(ticket: EnrollmentTicket, error: EnrollmentError) -> None:
+    ticket.status = EnrollmentTicket.TicketStatus.REJECTED
+    ticket.reason = error.code
+    ticket.message = error.message
+
+
+def _process_batch(project_id: str, batch_size: int) -> int:
+    """在一个事务中处理项目队首的一批票据，返回处理的票据数。"""
+    with transaction.atomic():
+        # 先锁定项目行：即使有多个消费者，同一项目的批次也只能串行执行；
+        # 锁内读取的队首票据不会被另一个消费者同时处理
+        lock_project(project_id)
+        project = TeacherProject.objects.filter(pk=project_id).first()
+        tickets = list(
+            EnrollmentTicket.objects.filter(project_id=project_id, status=EnrollmentTicket.TicketStatus.QUEUED)
+            .order_by("id")[:batch_size]
+        )
+        if not tickets:
+            return 0
+
+        taken = set(
+            ProjectSelection.objects.filter(
+                project_id=project_id,
+                status__in=OPEN_STATUSES,
+                student_account__in={ticket.student_account for ticket in tickets},
+            ).values_list("student_account", flat=True)
+        )
+        remaining = project.remaining_slots if project is not None else 0
+        selections: list[ProjectSelection] = []
+        waitlisted: list[ProjectSelection] = []
+        admitted = 0
+        now = timezone.now()
+        for ticket in tickets:
+            ticket.processed_at = now
+            if project is None or project.status != TeacherProject.ProjectStatus.ACTIVE:
+                _reject(ticket, EnrollmentError(EnrollmentError.CLOSED, "该项目暂未开放报名，请选择其他项目。"))
+            elif ticket.student_account in taken:
+                _reject(ticket, EnrollmentError(EnrollmentError.DUPLICATE, "您已报名该项目，请勿重复提交。"))
+            else:
+                taken.add(ticket.student_account)
+                ticket.selection = ProjectSelection(
+                    project_id=project_id,
+                    student_name=ticket.student_name,
+                    student_account=ticket.student_account,
+                    student_id=ticket.student_id,
+                    notes=ticket.notes,
+                )
+                if admitted < remaining:
+                    admitted += 1
+                    ticket.status = EnrollmentTicket.TicketStatus.ADMITTED
+                    ticket.selection.status = ProjectSelection.SelectionStatus.ACTIVE
+                else:
+                    ticket.status = EnrollmentTicket.TicketStatus.WAITLISTED
+                    ticket.selection.status = ProjectSelection.SelectionStatus.WAITLISTED
+                    waitlisted.append(ticket.selection)
+                selections.append(ticket.selection)
+
+        if admitted:
+            TeacherProject.objects.filter(pk=project_id).update(
+                remaining_slots=F("remaining_slots") - admitted,
+                active_selection_count=F("active_selection_count") + admitted,
+            )
+        if waitlisted:
+            first_number = take_waitlist_numbers(project_id, len(waitlisted))
+            for offset, selection in enumerate(waitlisted):
+                selection.waitlist_number = first_number + offset
+        if selections:
+            # bulk_create 不经过 save()，学生外键在这里批量解析
+            users = resolve_student_users((selection.student_account, selection.student_id) for selection in selections)
+            for selection, user_id in zip(selections, users):
+                selection.student_user_id = user_id
+            ProjectSelection.objects.bulk_create(selections)
+        EnrollmentTicket.objects.bulk_update(tickets, ["status", "reason", "message", "selection", "processed_at"])
+        if selections:
+            invalidate_catalog()
+    return len(tickets)
+
+
+def drain_enrollment_queue(project_id: str, batch_size: int = DRAIN_BATCH_SIZE) -> int:
+    """处理项目队列中的全部票据，返回处理数；已有其他消费者在处理该项目时直接返回。
+
+    消费者锁是尽力而为的：锁不共享或过期时可能有两个消费者同时运行，
+    它们的批次由 ``_process_batch`` 中的项目行锁串行化，不会重复处理票据或超卖名额。
+    """
+    key = _drain_lock_key(project_id)
+    processed = 0
+    while True:
+        if not cache.add(key, 1, timeout=DRAIN_LOCK_TIMEOUT):
+            return processed
+        try:
+            while True:
+                count = _process_batch(project_id, batch_size)
+                if not count:
+                    break
+                processed += count
+                cache.touch(key, DRAIN_LOCK_TIMEOUT)
+        finally:
+            cache.delete(key)
+        # 释放锁之前刚入队的请求，其派发的消费者因拿不到锁已退出，由本消费者接着处理
+        if not EnrollmentTicket.objects.filter(
+            project_id=project_id, status=EnrollmentTicket.TicketStatus.QUEUED
+        ).exists():
+            return processed
+
+
+def with_queue_positions(queryset: QuerySet) -> QuerySet:
+    """为票据 queryset 标注 queue_rank（排队位置，已处理为 None）。"""
+    queued = EnrollmentTicket.TicketStatus.QUEUED
+    ahead = EnrollmentTicket.objects.filter(project_id=OuterRef("project_id"), status=queued, id__lt=OuterRef("pk"))
+    annotated: QuerySet = queryset.annotate(
+        queue_rank=Case(When(status=queued, then=_position(ahead)), default=None, output_field=IntegerField())
+    )
+    return annotated
+
+
+def queue_position(ticket: EnrollmentTicket) -> int | None:
+    """排队中的票据在项目队列中的位置（从 1 开始）；已处理的票据为 None。"""
+    if ticket.status != EnrollmentTicket.TicketStatus.QUEUED:
+        return None
+    return (
+        EnrollmentTicket.objects.filter(
+            project_id=ticket.project_id,
+            status=EnrollmentTicket.TicketStatus.QUEUED,
+            id__lt=ticket.pk,
+        ).count()
+        + 1
+    )
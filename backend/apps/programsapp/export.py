@@ -0,0 +1,282 @@
+"""志愿记录与学生审核的流式导出（CSV / XLSX）。
+
+导出按 ``(created_at, pk)`` 键集分块读取（由列表分页的同名索引支撑），每块的审核事件一次查询取出；
+每处理完一块就把这块的行编码后交给 ``StreamingHttpResponse``，内存占用只与块大小有关，与导出总行数无关。
+这里不用 ``QuerySet.iterator()``：SQLite 与 MySQL（mysqlclient）驱动会先把整个结果集取到客户端。
+
+- CSV 以 UTF-8 输出并带 BOM，Excel 打开中文不乱码；以 ``= + - @`` 或制表符、回车开头的文本前加 ``'``，
+  防止表格软件把学生填写的内容当作公式执行；
+- XLSX 只依赖标准库：压缩包直接写入不可回溯的输出流（zipfile 自动改用数据描述符），
+  文本单元格一律写成内联字符串（``t="inlineStr"``），不会被当作公式，也不需要先收集整张共享字符串表。
+
+审核轨迹按 ``ReviewEvent.trail_events`` 还原后展开为最后一列的文本，每个事件一行。
+"""
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime
+from decimal import Decimal
+from typing import IO, Any, cast
+from xml.sax.saxutils import escape
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import ReviewableModel, ReviewEvent, StudentReviewTicket, VolunteerRecord
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+EXPORT_FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# 每次从数据库读取并写出的行数
+EXPORT_CHUNK_SIZE = 2000
+
+# (表头, 取值函数)
+Column = tuple[str, Callable[[Any], Any]]
+
+
+def _timestamp(value: datetime | None) -> str:
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+def _label(choices: type, value: str) -> str:
+    try:
+        return str(choices(value).label)
+    except ValueError:
+        return value
+
+
+def flatten_trail(events: list[ReviewEvent]) -> str:
+    """审核轨迹展开为文本：每个事件一行「时间 阶段 决定 审核人：备注」。"""
+    lines = []
+    for event in ReviewEvent.trail_events(events):
+        line = " ".join(
+            part
+            for part in (
+                _timestamp(event.created_at),
+                _label(ReviewableModel.ReviewStage, event.stage),
+                _label(ReviewEvent.Decision, event.decision),
+                event.reviewer,
+            )
+            if part
+        )
+        lines.append(f"{line}：{event.note}" if event.note else line)
+    return "\n".join(lines)
+
+
+REVIEW_COLUMNS: list[Column] = [
+    ("审核状态", lambda item: item.get_status_display()),
+    ("审核阶段", lambda item: item.get_review_stage_display()),
+    ("审核意见", lambda item: item.review_notes),
+    ("创建时间", lambda item: _timestamp(item.created_at)),
+    ("更新时间", lambda item: _timestamp(item.updated_at)),
+]
+
+VOLUNTEER_COLUMNS: list[Column] = [
+    ("记录编号", lambda record: record.id),
+    ("学生姓名", lambda record: record.student_name),
+    ("学生账号", lambda record: record.student_account),
+    ("学号", lambda record: record.student_id),
+    ("活动", lambda record: record.activity),
+    ("时长", lambda record: record.hours),
+    ("证明材料", lambda record: record.proof),
+    ("提交渠道", lambda record: record.get_submitted_via_display()),
+    ("关联课题", lambda record: record.project.title if record.project_id else ""),
+    *REVIEW_COLUMNS,
+]
+
+STUDENT_TICKET_COLUMNS: list[Column] = [
+    ("审核编号", lambda ticket: ticket.id),
+    ("学生姓名", lambda ticket: ticket.student_name),
+    ("学号", lambda ticket: ticket.student_id),
+    ("学院", lambda ticket: ticket.college),
+    ("专业", lambda ticket: ticket.major),
+    *REVIEW_COLUMNS,
+]
+
+# 最后一列为展开后的审核轨迹
+TRAIL_HEADER = "审核轨迹"
+
+EXPORT_COLUMNS: dict[type[ReviewableModel], list[Column]] = {
+    VolunteerRecord: VOLUNTEER_COLUMNS,
+    StudentReviewTicket: STUDENT_TICKET_COLUMNS,
+}
+
+
+def _events_by_record(model: type[ReviewableModel], pks: list[str]) -> dict[str, list[ReviewEvent]]:
+    # 不使用 prefetch_related：预取缓存与实例互相引用，整块实例要等到循环垃圾回收才释放
+    field = f"{model.review_event_field}_id"
+    events: dict[str, list[ReviewEvent]] = defaultdict(list)
+    for event in ReviewEvent.objects.filter(**{f"{field}__in": pks}).order_by("created_at", "id"):
+        events[getattr(event, field)].append(event)
+    return events
+
+
+def iter_row_chunks(queryset: QuerySet, columns: list[Column]) -> Iterator[list[list[Any]]]:
+    """按 ``(created_at, pk)`` 键集分块产出数据行；每块的审核事件一次查询取出。"""
+    queryset = queryset.prefetch_related(None).order_by("created_at", "pk")
+    boundary: Q | None = None
+    while True:
+        batch = list((queryset.filter(boundary) if boundary is not None else queryset)[:EXPORT_CHUNK_SIZE])
+        if not batch:
+            return
+        events = _events_by_record(queryset.model, [instance.pk for instance in batch])
+        yield [
+            [value(instance) for _, value in columns] + [flatten_trail(events.get(instance.pk, []))]
+            for instance in batch
+        ]
+        if len(batch) < EXPORT_CHUNK_SIZE:
+            return
+        last = batch[-1]
+        boundary = Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, pk__gt=last.pk)
+
+
+# 表格软件会当作公式解析的文本开头
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_stream(header: list[str], chunks: Iterable[list[list[Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(value) for value in values] for values in chunk)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _StreamSink(io.RawIOBase):
+    """zipfile 的输出目标：收集写入的字节，由生成器分段取走。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._pending = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._pending += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._pending)
+        self._pending.clear()
+        return data
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+).encode()
+_SHEET_TAIL = b"</sheetData></worksheet>"
+
+# XML 1.0 不允许的控制字符
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number: int, values: list[Any], letters: list[str]) -> str:
+    cells = []
+    for letter, value in zip(letters, values):
+        reference = f"{letter}{number}"
+        if isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c r="{reference}"><v>{value}</v></c>')
+        else:
+            # 内联字符串只作为文本显示，以 = 等开头的内容不会被当作公式
+            text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+            cells.append(f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def _xlsx_stream(header: list[str], chunks: Iterable[list[list[Any]]]) -> Iterator[bytes]:
+    letters = [_column_letter(index) for index in range(len(header))]
+    sink = _StreamSink()
+    # 只写不读的流对象，类型存根要求完整的 IO[bytes]
+    with zipfile.ZipFile(cast(IO[bytes], sink), "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD)
+            sheet.write(_xlsx_row(1, header, letters).encode("utf-8"))
+            number = 1
+            for chunk in chunks:
+                rows = []
+                for values in chunk:
+                    number += 1
+                    rows.append(_xlsx_row(number, values, letters))
+                sheet.write("".join(rows).encode("utf-8"))
+                yield sink.drain()
+            sheet.write(_SHEET_TAIL)
+    yield sink.drain()
+
+
+def export_stream(queryset: QuerySet, file_format: str) -> Iterator[bytes]:
+    """按格式逐块产出 queryset 的导出文件内容。"""
+    columns = EXPORT_COLUMNS[queryset.model]
+    header = [title for title, _ in columns] + [TRAIL_HEADER]
+    chunks = iter_row_chunks(queryset, columns)
+    if file_format == FORMAT_XLSX:
+        return _xlsx_stream(header, chunks)
+    return _csv_stream(header, chunks)
@@ -0,0 +1,106 @@
+"""教师审核收件箱：按阶段领取待审核记录并加租约。
+
+领取条件为「待审核、处于指定阶段、未被他人领取或租约已过期」，按 ``created_at`` 先后取前 N 条，
+由 ``(status, review_stage, created_at, claim_expires_at)`` 索引覆盖。
+支持 ``SELECT ... FOR UPDATE SKIP LOCKED`` 的数据库上，并发领取的教师跳过彼此正在领取的行；
+其他数据库（SQLite）逐条以条件 UPDATE 抢占租约，影响行数为 0 说明已被他人领走。
+租约到期后记录自动回到可领取状态，无需清理任务。
+教师自己尚未到期的领取不会被再次领取，而是作为「手上的记录」单独列出。
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import ReviewableModel
+
+# 单次领取的最大条数
+MAX_CLAIM_SIZE = 100
+
+
+def _claimable(now: datetime) -> Q:
+    # 调用方自己尚未到期的领取不在此列，由 held_review_items 单独返回
+    return Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now)
+
+
+def claimed_by_other(instance: ReviewableModel, reviewer: str, now: datetime | None = None) -> bool:
+    """记录是否被其他教师领取且租约未到期。"""
+    now = now or timezone.now()
+    return bool(
+        instance.claimed_by
+        and instance.claimed_by != reviewer
+        and instance.claim_expires_at is not None
+        and instance.claim_expires_at > now
+    )
+
+
+def claim_review_items(
+    queryset: QuerySet,
+    *,
+    stage: str,
+    reviewer: str,
+    limit: int,
+    lease_seconds: float | None = None,
+) -> list[str]:
+    """为 reviewer 领取至多 limit 条指定阶段的待审核记录，返回按创建时间排序的主键列表。"""
+    now = timezone.now()
+    lease = settings.PG_PLUS_REVIEW_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    expires = now + timedelta(seconds=lease)
+    limit = max(1, min(limit, MAX_CLAIM_SIZE))
+    candidates = (
+        queryset.filter(status=ReviewableModel.ReviewStatus.PENDING, review_stage=stage)
+        .filter(_claimable(now))
+        .order_by("created_at", "pk")
+    )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            claimed = list(candidates.select_for_update(skip_locked=True).values_list("pk", flat=True)[:limit])
+            queryset.model.objects.filter(pk__in=claimed).update(claimed_by=reviewer, claim_expires_at=expires)
+        return claimed
+
+    claimed = []
+    seen: set[str] = set()
+    while len(claimed) < limit:
+        batch = [pk for pk in candidates.exclude(pk__in=seen).values_list("pk", flat=True)[: limit * 2]]
+        if not batch:
+            break
+        for pk in batch:
+            seen.add(pk)
+            # 条件 UPDATE：读取之后被他人领走的记录不再满足条件
+            won = (
+                queryset.model.objects.filter(pk=pk, status=ReviewableModel.ReviewStatus.PENDING, review_stage=stage)
+                .filter(_claimable(now))
+                .update(claimed_by=reviewer, claim_expires_at=expires)
+            )
+            if won:
+                claimed.append(pk)
+                if len(claimed) >= limit:
+                    break
+    return claimed
+
+
+def held_review_items(queryset: QuerySet, *, stage: str, reviewer: str) -> list[str]:
+    """reviewer 在指定阶段已领取且租约未到期的待审核记录，按创建时间排序的主键列表。"""
+    return list(
+        queryset.filter(
+            status=ReviewableModel.ReviewStatus.PENDING,
+            review_stage=stage,
+            claimed_by=reviewer,
+            claim_expires_at__gt=timezone.now(),
+        )
+        .order_by("created_at", "pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def release_claim(queryset: QuerySet, pk: str, reviewer: str) -> bool:
+    """释放 reviewer 对记录的领取；记录未被其领取时返回 False。"""
+    released: int = queryset.model.objects.filter(pk=pk, claimed_by=reviewer).update(
+        claimed_by="", claim_expires_at=None
+    )
+    return released == 1
@@ -0,0 +1,93 @@
+"""学生志愿时长台账：按审核状态汇总每位学生的志愿时长。
+
+``VolunteerHoursSummary`` 每个学生用户一行（按 ``student_user`` 外键，账号改名后时长不会被拆成两行），
+保存待审核、已通过、已驳回三个状态下的时长合计；未关联到用户的记录（账号尚未注册）不计入台账，
+账号注册时由 ``link_student_records`` 补记。
+志愿记录写入时在同一事务内计算「旧状态减去、新状态加上」的增量，合并到每个学生一条
+``UPDATE ... SET x = x + delta``，并发审核不会互相覆盖；其他状态（已撤销）不计入台账。
+
+台账可由 ``rebuild_volunteer_hours`` 命令以一次 GROUP BY 聚合从头重建。
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import ReviewableModel, VolunteerHoursSummary, VolunteerRecord
+
+# 计入台账的审核状态及对应列
+HOURS_FIELDS: dict[str, str] = {
+    ReviewableModel.ReviewStatus.PENDING: "pending_hours",
+    ReviewableModel.ReviewStatus.APPROVED: "approved_hours",
+    ReviewableModel.ReviewStatus.REJECTED: "rejected_hours",
+}
+
+# (学生用户主键, 审核状态, 时长)；未关联用户时主键为 None
+LedgerState = tuple[int | None, str, Decimal]
+
+
+def transition_entries(previous: LedgerState | None, current: LedgerState | None) -> list[LedgerState]:
+    """记录从 previous 变为 current 时的台账增量；新建时 previous 为 None，删除时 current 为 None。"""
+    entries = []
+    if previous is not None:
+        user_id, status, hours = previous
+        entries.append((user_id, status, -Decimal(str(hours))))
+    if current is not None:
+        user_id, status, hours = current
+        entries.append((user_id, status, Decimal(str(hours))))
+    return entries
+
+
+def apply_hours_deltas(entries: Iterable[LedgerState]) -> None:
+    """按 (学生用户主键, 审核状态, 时长增量) 更新台账；同一学生的增量合并为一条 UPDATE。"""
+    deltas: dict[int, dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+    for user_id, status, hours in entries:
+        field = HOURS_FIELDS.get(status)
+        if field and user_id is not None:
+            deltas[user_id][field] += hours
+    # 状态与时长都未变化的记录增量互相抵消
+    changes = {}
+    for user_id, fields in deltas.items():
+        nonzero = {field: delta for field, delta in fields.items() if delta}
+        if nonzero:
+            changes[user_id] = nonzero
+    if not changes:
+        return
+    with transaction.atomic():
+        # 首次出现的学生先补一行零值，并发插入由唯一约束去重
+        VolunteerHoursSummary.objects.bulk_create(
+            [VolunteerHoursSummary(student_user_id=user_id) for user_id in sorted(changes)],
+            ignore_conflicts=True,
+        )
+        for user_id in sorted(changes):
+            VolunteerHoursSummary.objects.filter(student_user_id=user_id).update(
+                **{field: F(field) + delta for field, delta in changes[user_id].items()},
+                updated_at=timezone.now(),
+            )
+
+
+def rebuild_hours_ledger() -> int:
+    """以一次聚合从志愿记录重建整张台账，返回台账行数。"""
+    totals = (
+        VolunteerRecord.objects.filter(student_user__isnull=False)
+        .order_by()
+        .values("student_user")
+        .annotate(
+            **{
+                field: Sum("hours", filter=Q(status=status), default=Decimal(0))
+                for status, field in HOURS_FIELDS.items()
+            }
+        )
+    )
+    with transaction.atomic():
+        VolunteerHoursSummary.objects.all().delete()
+        summaries = VolunteerHoursSummary.objects.bulk_create(
+            [VolunteerHoursSummary(student_user_id=row.pop("student_user"), **row) for row in totals.iterator()],
+            batch_size=1000,
+        )
+    return len(summaries)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.programsapp.ledger import rebuild_hours_ledger
+
+
+class Command(BaseCommand):
+    help = "以一次聚合从志愿记录重建学生志愿时长台账。"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rebuilt = rebuild_hours_ledger()
+        self.stdout.write(self.style.SUCCESS(f"已重建 {rebuilt} 名学生的志愿时长台账。"))
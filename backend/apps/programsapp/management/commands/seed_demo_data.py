@@ -4,10 +4,12 @@ from decimal import Decimal
 from typing import Any
 
 from django.core.management.base import BaseCommand
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
 
 from apps.programsapp.models import (
     ProjectSelection,
+    ReviewableModel,
+    ReviewEvent,
     StudentReviewTicket,
     TeacherProject,
     VolunteerRecord,
@@ -201,9 +203,24 @@ class Command(BaseCommand):
                 },
             )
 
+    def _seed_review_trail(self, record: ReviewableModel, trail: list[dict[str, Any]]) -> None:
+        record.review_events.all().delete()
+        events = []
+        for entry in trail:
+            event = record.review_event(
+                decision=ReviewEvent.Decision.LEGACY,
+                reviewer=entry["reviewer"],
+                note=entry["note"],
+                timestamp=parse_datetime(entry["timestamp"]),
+            )
+            # 轨迹中记录的是当时的阶段
+            event.stage = entry["stage"]
+            events.append(event)
+        ReviewEvent.objects.bulk_create(events)
+
     def _seed_volunteers(self) -> None:
         for payload in VOLUNTEER_RECORDS:
-            VolunteerRecord.objects.update_or_create(
+            record, _ = VolunteerRecord.objects.update_or_create(
                 id=payload["id"],
                 defaults={
                     "student_name": payload["student_name"],
@@ -214,15 +231,15 @@ class Command(BaseCommand):
                     "require_ocr": payload["require_ocr"],
                     "status": payload["status"],
                     "review_stage": payload["review_stage"],
-                    "review_trail": payload["review_trail"],
                     "review_notes": payload["review_notes"],
                     "submitted_via": payload["submitted_via"],
                 },
             )
+            self._seed_review_trail(record, payload["review_trail"])
 
     def _seed_student_reviews(self) -> None:
         for payload in STUDENT_REVIEW_TICKETS:
-            StudentReviewTicket.objects.update_or_create(
+            ticket, _ = StudentReviewTicket.objects.update_or_create(
                 id=payload["id"],
                 defaults={
                     "student_name": payload["student_name"],
@@ -231,10 +248,10 @@ class Command(BaseCommand):
                     "major": payload["major"],
                     "review_stage": payload["review_stage"],
                     "status": payload["status"],
-                    "review_trail": payload["review_trail"],
                     "review_notes": payload["review_notes"],
                 },
             )
+            self._seed_review_trail(ticket, payload["review_trail"])
 
     def _seed_accounts(self) -> None:
         for payload in DEMO_ACCOUNTS:
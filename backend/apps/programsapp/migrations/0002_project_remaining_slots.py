@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:06
+
+from typing import Any
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_remaining_slots(apps: Any, schema_editor: Any) -> None:
+    # 剩余名额 = 总名额 - 当前有效报名数
+    TeacherProject = apps.get_model('programsapp', 'TeacherProject')
+    projects = TeacherProject.objects.annotate(
+        active_count=Count('selections', filter=Q(selections__status='active'))
+    ).values_list('pk', 'slots', 'active_count')
+    for pk, slots, active_count in projects.iterator():
+        TeacherProject.objects.filter(pk=pk).update(remaining_slots=slots - active_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherproject',
+            name='remaining_slots',
+            field=models.IntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(backfill_remaining_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0002_project_remaining_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherproject',
+            name='rush_mode',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='EnrollmentTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_name', models.CharField(max_length=128)),
+                ('student_account', models.CharField(max_length=128)),
+                ('student_id', models.CharField(blank=True, max_length=32)),
+                ('notes', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('queued', '排队中'), ('admitted', '已录取'), ('rejected', '未录取')], default='queued', max_length=32)),
+                ('reason', models.CharField(blank=True, max_length=32)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_tickets', to='programsapp.teacherproject')),
+                ('selection', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='programsapp.projectselection')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['project', 'status', 'id'], name='ticket_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0003_enrollment_tickets'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='projectselection',
+            name='unique_active_selection_per_student',
+        ),
+        migrations.AddField(
+            model_name='projectselection',
+            name='waitlist_number',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='teacherproject',
+            name='waitlist_tail',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='enrollmentticket',
+            name='status',
+            field=models.CharField(choices=[('queued', '排队中'), ('admitted', '已录取'), ('waitlisted', '候补中'), ('rejected', '未录取')], default='queued', max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='projectselection',
+            name='status',
+            field=models.CharField(choices=[('active', '已选择'), ('waitlisted', '候补中'), ('cancelled', '已取消')], default='active', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='projectselection',
+            index=models.Index(fields=['project', 'status', 'waitlist_number'], name='selection_waitlist_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectselection',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['active', 'waitlisted'])), fields=('project', 'student_account'), name='unique_open_selection_per_student'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:13
+
+from typing import Any
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_selection_count(apps: Any, schema_editor: Any) -> None:
+    TeacherProject = apps.get_model('programsapp', 'TeacherProject')
+    ProjectSelection = apps.get_model('programsapp', 'ProjectSelection')
+    active = (
+        ProjectSelection.objects.filter(project=OuterRef('pk'), status='active')
+        .order_by()
+        .values('project')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    TeacherProject.objects.update(active_selection_count=Coalesce(Subquery(active), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0004_selection_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacherproject',
+            name='active_selection_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_selection_count, migrations.RunPython.noop),
+    ]
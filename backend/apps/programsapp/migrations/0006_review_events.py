@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+from typing import Any
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+# 每批读取的记录数
+BACKFILL_BATCH_SIZE = 500
+
+
+def _events_for(ReviewEvent: Any, record: Any, record_type: str, field: str) -> list[Any]:
+    events = []
+    for entry in record.review_trail or []:
+        if not isinstance(entry, dict):
+            continue
+        timestamp = parse_datetime(str(entry.get('timestamp') or '')) or record.updated_at
+        events.append(
+            ReviewEvent(
+                record_type=record_type,
+                stage=str(entry.get('stage') or record.review_stage)[:32],
+                decision='legacy',
+                reviewer=str(entry.get('reviewer') or '')[:128],
+                note=str(entry.get('note') or ''),
+                created_at=timestamp,
+                **{field: record},
+            )
+        )
+    return events
+
+
+def backfill_review_events(apps: Any, schema_editor: Any) -> None:
+    # 把原 review_trail 列表按主键分批转成审核事件
+    ReviewEvent = apps.get_model('programsapp', 'ReviewEvent')
+    sources = (
+        (apps.get_model('programsapp', 'VolunteerRecord'), 'volunteer', 'volunteer_record'),
+        (apps.get_model('programsapp', 'StudentReviewTicket'), 'student_ticket', 'student_ticket'),
+    )
+    for model, record_type, field in sources:
+        last_pk = ''
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'review_stage', 'review_trail', 'updated_at')[:BACKFILL_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            events = []
+            for record in batch:
+                events.extend(_events_for(ReviewEvent, record, record_type, field))
+            ReviewEvent.objects.bulk_create(events, batch_size=BACKFILL_BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0005_project_selection_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('volunteer', '志愿记录'), ('student_ticket', '学生审核')], max_length=32)),
+                ('stage', models.CharField(choices=[('stage1', '一审'), ('stage2', '二审'), ('stage3', '三审'), ('completed', '已完成')], max_length=32)),
+                ('decision', models.CharField(choices=[('advance', '通过'), ('reject', '驳回'), ('reset', '重置'), ('reopen', '管理员重开'), ('cancel', '管理员撤销'), ('resubmit', '学生重新提交'), ('legacy', '历史记录')], max_length=32)),
+                ('reviewer', models.CharField(blank=True, max_length=128)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student_ticket', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='review_events', to='programsapp.studentreviewticket')),
+                ('volunteer_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='review_events', to='programsapp.volunteerrecord')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['reviewer', 'created_at'], name='review_event_reviewer_idx'), models.Index(fields=['record_type', 'created_at'], name='review_event_type_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_review_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0006_review_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentreviewticket',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentreviewticket',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='volunteerrecord',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerrecord',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddIndex(
+            model_name='studentreviewticket',
+            index=models.Index(fields=['status', 'review_stage', 'created_at', 'claim_expires_at'], name='student_ticket_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrecord',
+            index=models.Index(fields=['status', 'review_stage', 'created_at', 'claim_expires_at'], name='volunteer_inbox_idx'),
+        ),
+    ]
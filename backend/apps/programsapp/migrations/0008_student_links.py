@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+from typing import Any
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+# 每批处理的记录数
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_student_users(apps: Any, schema_editor: Any) -> None:
+    # 按学生账号（优先）或学号把已有记录关联到用户
+    Student = apps.get_model(settings.AUTH_USER_MODEL)
+    for model_name in ('VolunteerRecord', 'ProjectSelection'):
+        model = apps.get_model('programsapp', model_name)
+        last_pk = ''
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk, student_user__isnull=True)
+                .order_by('pk')
+                .only('pk', 'student_account', 'student_id')[:BACKFILL_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            accounts = {record.student_account for record in batch if record.student_account}
+            numbers = {record.student_id for record in batch if record.student_id}
+            by_account = {}
+            by_number = {}
+            for pk, username, number in Student.objects.filter(
+                Q(username__in=accounts) | Q(student_id__in=numbers)
+            ).values_list('pk', 'username', 'student_id'):
+                by_account[username] = pk
+                by_number[number] = pk
+            linked = []
+            for record in batch:
+                user_id = by_account.get(record.student_account) or by_number.get(record.student_id)
+                if user_id is not None:
+                    record.student_user_id = user_id
+                    linked.append(record)
+            model.objects.bulk_update(linked, ['student_user'], batch_size=BACKFILL_BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0007_review_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectselection',
+            name='student_user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='project_selections', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='volunteerrecord',
+            name='student_user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='volunteer_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='projectselection',
+            index=models.Index(fields=['student_user', 'status'], name='selection_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectselection',
+            index=models.Index(fields=['student_account', 'status'], name='selection_account_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrecord',
+            index=models.Index(fields=['student_user', 'status'], name='volunteer_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrecord',
+            index=models.Index(fields=['student_account', 'status'], name='volunteer_account_status_idx'),
+        ),
+        migrations.RunPython(backfill_student_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0008_student_links'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentreviewticket',
+            index=models.Index(fields=['created_at', 'id'], name='student_ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrecord',
+            index=models.Index(fields=['created_at', 'id'], name='volunteer_created_idx'),
+        ),
+    ]
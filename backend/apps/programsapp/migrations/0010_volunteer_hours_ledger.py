@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:36
+
+from decimal import Decimal
+from typing import Any
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+import django.db.models.deletion
+
+# 计入台账的审核状态及对应列
+HOURS_FIELDS = {'pending': 'pending_hours', 'approved': 'approved_hours', 'rejected': 'rejected_hours'}
+
+
+def backfill_hours_ledger(apps: Any, schema_editor: Any) -> None:
+    # 一次 GROUP BY 聚合出每位学生各状态的时长合计；未关联用户的记录不计入
+    VolunteerRecord = apps.get_model('programsapp', 'VolunteerRecord')
+    VolunteerHoursSummary = apps.get_model('programsapp', 'VolunteerHoursSummary')
+    totals = (
+        VolunteerRecord.objects.filter(student_user__isnull=False)
+        .order_by()
+        .values('student_user')
+        .annotate(
+            **{
+                field: Sum('hours', filter=Q(status=status), default=Decimal(0))
+                for status, field in HOURS_FIELDS.items()
+            }
+        )
+    )
+    VolunteerHoursSummary.objects.bulk_create(
+        (VolunteerHoursSummary(student_user_id=row.pop('student_user'), **row) for row in totals.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0009_list_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerHoursSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('approved_hours', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10)),
+                ('pending_hours', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10)),
+                ('rejected_hours', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='volunteer_hours', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['approved_hours', 'id'],
+                'indexes': [models.Index(fields=['approved_hours', 'id'], name='volunteer_hours_approved_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_hours_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+from django.db import migrations
+
+# review_trail 已由 0006 回填为 ReviewEvent。删除列放在单独的迁移中：PostgreSQL 上回填的批量插入
+# 会留下待触发的延迟外键检查，同一事务中随后的 ALTER TABLE 会报 pending trigger events
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0010_volunteer_hours_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='studentreviewticket',
+            name='review_trail',
+        ),
+        migrations.RemoveField(
+            model_name='volunteerrecord',
+            name='review_trail',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programsapp', '0011_remove_review_trail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='projectselection',
+            name='unique_open_selection_per_student',
+        ),
+        migrations.AddField(
+            model_name='projectselection',
+            name='open_key',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(status__in=['active', 'waitlisted'], then=models.F('student_account')), default=None), output_field=models.CharField(max_length=128, null=True)),
+        ),
+        migrations.AddConstraint(
+            model_name='projectselection',
+            constraint=models.UniqueConstraint(fields=('project', 'open_key'), name='unique_open_selection_per_student'),
+        ),
+    ]
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from .catalog import invalidate_catalog
+
+if TYPE_CHECKING:
+    from django.db.models.fields.related_descriptors import RelatedManager
+
 
 def generate_project_id() -> str:
     return f"proj-{uuid.uuid4().hex[:10]}"
@@ -24,6 +34,66 @@ def generate_student_ticket_id() -> str:
     return f"stu-{uuid.uuid4().hex[:10]}"
 
 
+def resolve_student_users(pairs: Iterable[tuple[str, str]]) -> list[int | None]:
+    """按 (学生账号, 学号) 批量解析对应的用户主键；账号匹配优先于学号匹配，找不到为 None。"""
+    from django.contrib.auth import get_user_model
+
+    pairs = list(pairs)
+    accounts = {account for account, _ in pairs if account}
+    numbers = {number for _, number in pairs if number}
+    if not accounts and not numbers:
+        return [None] * len(pairs)
+    by_account: dict[str, int] = {}
+    by_number: dict[str, int] = {}
+    rows = get_user_model().objects.filter(
+        models.Q(username__in=accounts) | models.Q(student_id__in=numbers)
+    ).values_list("pk", "username", "student_id")
+    for pk, username, number in rows:
+        by_account[username] = pk
+        by_number[number] = pk
+    return [by_account.get(account) or by_number.get(number) for account, number in pairs]
+
+
+class StudentLinkedMixin(models.Model):
+    """按学生账号/学号关联到用户的记录：新建或修改账号、学号时解析 student_user 外键，按学生查询走索引。"""
+
+    student_account = models.CharField(max_length=128)
+    student_id = models.CharField(max_length=32, blank=True)
+    # 子类声明指向用户的 student_user 外键
+    student_user_id: int | None
+    # 读出时的账号与学号，见 from_db
+    _saved_link: tuple[Any, ...]
+
+    # 决定关联用户的字段
+    LINK_FIELDS = ("student_account", "student_id")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any) -> Any:
+        instance = super().from_db(db, field_names, values)
+        instance._saved_link = instance._link_key()
+        return instance
+
+    def _link_key(self) -> tuple[Any, ...]:
+        return tuple(self.__dict__.get(name) for name in self.LINK_FIELDS)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        update_fields = kwargs.get("update_fields")
+        if self._state.adding:
+            if self.student_user_id is None:
+                self.student_user_id = resolve_student_users([(self.student_account, self.student_id)])[0]
+        elif self._link_key() != getattr(self, "_saved_link", None) and (
+            update_fields is None or set(update_fields) & set(self.LINK_FIELDS)
+        ):
+            self.student_user_id = resolve_student_users([(self.student_account, self.student_id)])[0]
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "student_user"}
+        super().save(*args, **kwargs)
+        self._saved_link = self._link_key()
+
+
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -56,22 +126,37 @@ class ReviewableModel(TimestampedModel):
         default=ReviewStatus.PENDING,
     )
     review_notes = models.TextField(blank=True)
-    review_trail = models.JSONField(default=list, blank=True)
+    # 审核收件箱的领取租约（见 inbox.py）；租约到期后视为未领取
+    claimed_by = models.CharField(max_length=128, blank=True)
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    # 子类指定在 ReviewEvent 上的记录类型与外键字段
+    review_record_type = ""
+    review_event_field = ""
+    # ReviewEvent 上指向子类的外键的反向关系
+    review_events: RelatedManager[ReviewEvent]
 
     class Meta:
         abstract = True
 
-    def append_review_log(self, *, stage: str, reviewer: str, note: str | None = None) -> None:
-        logs: list[dict[str, Any]] = list(self.review_trail or [])
-        logs.append(
-            {
-                "stage": stage,
-                "reviewer": reviewer,
-                "note": note or "",
-                "timestamp": timezone.now().isoformat(),
-            }
+    def review_event(
+        self,
+        *,
+        decision: str,
+        reviewer: str,
+        note: str | None = None,
+        timestamp: Any = None,
+    ) -> "ReviewEvent":
+        """构造一条（未保存的）审核事件，阶段取当前 review_stage。"""
+        return ReviewEvent(
+            record_type=self.review_record_type,
+            stage=self.review_stage,
+            decision=decision,
+            reviewer=reviewer,
+            note=note or "",
+            created_at=timestamp or timezone.now(),
+            **{self.review_event_field: self},
         )
-        self.review_trail = logs
 
 
 class TeacherProject(TimestampedModel):
@@ -91,6 +176,13 @@ class TeacherProject(TimestampedModel):
     points = models.FloatField(default=0)
     deadline = models.DateField(null=True, blank=True)
     slots = models.PositiveIntegerField(default=1)
+    # 剩余名额与有效报名数，由报名/取消在同一条条件 UPDATE 中原子增减（见 enrollment.py）
+    remaining_slots = models.IntegerField(default=1, editable=False)
+    active_selection_count = models.PositiveIntegerField(default=0, editable=False)
+    # 已发出的候补号上限，新候补以 F() 递增后取号
+    waitlist_tail = models.PositiveBigIntegerField(default=0, editable=False)
+    # 抢报模式：报名请求先排队并立即返回票据，由每个项目唯一的消费者按到达顺序批量处理
+    rush_mode = models.BooleanField(default=False)
     status = models.CharField(
         max_length=32,
         choices=ProjectStatus.choices,
@@ -104,20 +196,55 @@ class TeacherProject(TimestampedModel):
         related_name="published_projects",
     )
 
+    # 由报名流程维护的计数列；整行保存时不回写，避免用内存中的旧值覆盖并发的名额增减
+    DERIVED_FIELDS = ("remaining_slots", "active_selection_count", "waitlist_tail")
+    # 读出时的总名额，见 from_db
+    _saved_slots: int | None
+
     class Meta:
         ordering = ["-created_at"]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.id})"
 
-    @property
-    def selected_count(self) -> int:
-        return self.selections.filter(status=ProjectSelection.SelectionStatus.ACTIVE).count()
-
-
-class ProjectSelection(TimestampedModel):
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any) -> "TeacherProject":
+        instance = super().from_db(db, field_names, values)
+        instance._saved_slots = instance.__dict__.get("slots")
+        return instance
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self._state.adding:
+            self.remaining_slots = self.slots
+            super().save(*args, **kwargs)
+            self._saved_slots = self.slots
+            return
+        update_fields = kwargs.get("update_fields")
+        if not args and update_fields is None and not kwargs.get("force_insert"):
+            update_fields = kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.fields
+                if field.concrete and not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        previous = getattr(self, "_saved_slots", None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # 调整总名额时把差值同步到剩余名额上，新增的名额依次分给候补
+            if previous is not None and previous != self.slots and (update_fields is None or "slots" in update_fields):
+                TeacherProject.objects.filter(pk=self.pk).update(
+                    remaining_slots=F("remaining_slots") + (self.slots - previous)
+                )
+                if self.slots > previous:
+                    from .enrollment import promote_waitlist
+
+                    promote_waitlist(self.pk)
+        self._saved_slots = self.slots
+
+
+class ProjectSelection(StudentLinkedMixin, TimestampedModel):
     class SelectionStatus(models.TextChoices):
         ACTIVE = "active", "已选择"
+        WAITLISTED = "waitlisted", "候补中"
         CANCELLED = "cancelled", "已取消"
 
     id = models.CharField(
@@ -132,30 +259,96 @@ class ProjectSelection(TimestampedModel):
         on_delete=models.CASCADE,
     )
     student_name = models.CharField(max_length=128)
-    student_account = models.CharField(max_length=128)
-    student_id = models.CharField(max_length=32, blank=True)
+    student_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="project_selections",
+        # 由 (student_user, status) 复合索引覆盖
+        db_index=False,
+    )
     status = models.CharField(
         max_length=32,
         choices=SelectionStatus.choices,
         default=SelectionStatus.ACTIVE,
     )
     notes = models.TextField(blank=True)
+    # 候补号，按项目递增；候补位置即同项目中号码更小的候补数 + 1
+    waitlist_number = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    # 有效或候补中的报名取学生账号，已取消为 NULL；由数据库随 status 计算。
+    # (project, open_key) 上的普通唯一约束拦住重复报名：MySQL 不支持部分索引，但唯一索引允许多个 NULL
+    open_key = models.GeneratedField(
+        expression=models.Case(
+            models.When(status__in=["active", "waitlisted"], then=F("student_account")),
+            default=None,
+        ),
+        output_field=models.CharField(max_length=128, null=True),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ["-created_at"]
         constraints = [
-            models.UniqueConstraint(
-                fields=["project", "student_account"],
-                condition=models.Q(status="active"),
-                name="unique_active_selection_per_student",
-            )
+            models.UniqueConstraint(fields=["project", "open_key"], name="unique_open_selection_per_student"),
+        ]
+        indexes = [
+            models.Index(fields=["project", "status", "waitlist_number"], name="selection_waitlist_idx"),
+            models.Index(fields=["student_user", "status"], name="selection_student_status_idx"),
+            models.Index(fields=["student_account", "status"], name="selection_account_status_idx"),
         ]
 
     def __str__(self) -> str:
         return f"{self.project_id} -> {self.student_account}"
 
 
-class VolunteerRecord(ReviewableModel):
+class EnrollmentTicket(models.Model):
+    """抢报模式下排队中的报名请求；自增主键即到达顺序。"""
+
+    class TicketStatus(models.TextChoices):
+        QUEUED = "queued", "排队中"
+        ADMITTED = "admitted", "已录取"
+        WAITLISTED = "waitlisted", "候补中"
+        REJECTED = "rejected", "未录取"
+
+    project = models.ForeignKey(
+        TeacherProject,
+        related_name="enrollment_tickets",
+        on_delete=models.CASCADE,
+    )
+    student_name = models.CharField(max_length=128)
+    student_account = models.CharField(max_length=128)
+    student_id = models.CharField(max_length=32, blank=True)
+    notes = models.TextField(blank=True)
+    status = models.CharField(
+        max_length=32,
+        choices=TicketStatus.choices,
+        default=TicketStatus.QUEUED,
+    )
+    # 未录取原因，取值同 EnrollmentError.code
+    reason = models.CharField(max_length=32, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    selection = models.ForeignKey(
+        ProjectSelection,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["project", "status", "id"], name="ticket_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.project_id} #{self.pk} -> {self.student_account}"
+
+
+class VolunteerRecord(StudentLinkedMixin, ReviewableModel):
     class SubmitChannel(models.TextChoices):
         STUDENT = "student", "学生提交"
         TEACHER = "teacher", "教师创建"
@@ -167,8 +360,15 @@ class VolunteerRecord(ReviewableModel):
         editable=False,
     )
     student_name = models.CharField(max_length=128)
-    student_account = models.CharField(max_length=128)
-    student_id = models.CharField(max_length=32, blank=True)
+    student_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="volunteer_records",
+        # 由 (student_user, status) 复合索引覆盖
+        db_index=False,
+    )
     activity = models.CharField(max_length=255)
     hours = models.DecimalField(max_digits=6, decimal_places=2)
     proof = models.CharField(max_length=255, blank=True)
@@ -186,12 +386,87 @@ class VolunteerRecord(ReviewableModel):
         related_name="volunteer_records",
     )
 
+    review_record_type = "volunteer"
+    review_event_field = "volunteer_record"
+    # 决定时长台账归属与数额的列
+    LEDGER_FIELDS = ("student_user", "status", "hours")
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "review_stage", "created_at", "claim_expires_at"],
+                name="volunteer_inbox_idx",
+            ),
+            models.Index(fields=["student_user", "status"], name="volunteer_student_status_idx"),
+            models.Index(fields=["student_account", "status"], name="volunteer_account_status_idx"),
+            # 列表游标分页的排序键
+            models.Index(fields=["created_at", "id"], name="volunteer_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.student_name} - {self.activity}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # update_fields 中的外键既可以写字段名也可以写 student_user_id
+            update_fields = {"student_user" if name == "student_user_id" else name for name in update_fields}
+            # 修改账号或学号时 StudentLinkedMixin 会重新解析关联用户
+            if update_fields & set(self.LINK_FIELDS):
+                update_fields.add("student_user")
+        if update_fields is not None and not update_fields & set(self.LEDGER_FIELDS):
+            super().save(*args, **kwargs)
+            return
+        from .ledger import apply_hours_deltas, transition_entries
+
+        with transaction.atomic():
+            # 加锁读取库中旧值：并发审核同一条记录时，台账增量按实际落库的先后计算
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    VolunteerRecord.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list(*self.LEDGER_FIELDS)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            current = self.ledger_state()
+            if previous is not None and update_fields is not None:
+                # 未写入的列在库中仍为旧值
+                current = tuple(
+                    new if name in update_fields else old
+                    for name, old, new in zip(self.LEDGER_FIELDS, previous, current)
+                )
+            apply_hours_deltas(transition_entries(previous, current))
+
+    def ledger_state(self) -> tuple[int | None, str, Decimal]:
+        return (self.student_user_id, self.status, self.hours)
+
+
+class VolunteerHoursSummary(models.Model):
+    """学生志愿时长台账（见 ledger.py），由志愿记录写入时以 F() 增量维护。"""
+
+    student_user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="volunteer_hours",
+    )
+    approved_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal(0))
+    pending_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal(0))
+    rejected_hours = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal(0))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["approved_hours", "id"]
+        indexes = [
+            # 按已通过时长阈值筛选（如低于毕业要求的学生）
+            models.Index(fields=["approved_hours", "id"], name="volunteer_hours_approved_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.student_user_id}: {self.approved_hours}h"
+
 
 class StudentReviewTicket(ReviewableModel):
     id = models.CharField(
@@ -205,8 +480,146 @@ class StudentReviewTicket(ReviewableModel):
     college = models.CharField(max_length=128)
     major = models.CharField(max_length=128)
 
+    review_record_type = "student_ticket"
+    review_event_field = "student_ticket"
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "review_stage", "created_at", "claim_expires_at"],
+                name="student_ticket_inbox_idx",
+            ),
+            models.Index(fields=["created_at", "id"], name="student_ticket_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.student_name} ({self.student_id})"
+
+
+class ReviewEvent(models.Model):
+    """审核流水：每次审核/复核/重新提交追加一行，只做 INSERT。
+
+    记录的审核轨迹为其最近一次 reset / reopen（含）或 resubmit（不含）之后的事件，
+    与原先整体改写的 review_trail 列表一致。
+    """
+
+    class RecordType(models.TextChoices):
+        VOLUNTEER = "volunteer", "志愿记录"
+        STUDENT_TICKET = "student_ticket", "学生审核"
+
+    class Decision(models.TextChoices):
+        ADVANCE = "advance", "通过"
+        REJECT = "reject", "驳回"
+        RESET = "reset", "重置"
+        REOPEN = "reopen", "管理员重开"
+        CANCEL = "cancel", "管理员撤销"
+        RESUBMIT = "resubmit", "学生重新提交"
+        LEGACY = "legacy", "历史记录"
+
+    # 从这些事件开始重新计算轨迹；resubmit 本身不出现在轨迹中
+    TRAIL_START_DECISIONS = (Decision.RESET, Decision.REOPEN)
+    TRAIL_RESTART_DECISIONS = (Decision.RESUBMIT,)
+
+    record_type = models.CharField(max_length=32, choices=RecordType.choices)
+    volunteer_record = models.ForeignKey(
+        VolunteerRecord,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="review_events",
+    )
+    student_ticket = models.ForeignKey(
+        StudentReviewTicket,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="review_events",
+    )
+    stage = models.CharField(max_length=32, choices=ReviewableModel.ReviewStage.choices)
+    decision = models.CharField(max_length=32, choices=Decision.choices)
+    reviewer = models.CharField(max_length=128, blank=True)
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["reviewer", "created_at"], name="review_event_reviewer_idx"),
+            models.Index(fields=["record_type", "created_at"], name="review_event_type_time_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.record_type}:{self.decision}@{self.stage} by {self.reviewer}"
+
+    def as_trail_entry(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "decision": self.decision,
+            "reviewer": self.reviewer,
+            "note": self.note,
+            "timestamp": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def trail_events(cls, events: list["ReviewEvent"]) -> list["ReviewEvent"]:
+        """按时间排序的事件中属于当前审核轨迹的部分。"""
+        start = 0
+        for index, event in enumerate(events):
+            if event.decision in cls.TRAIL_START_DECISIONS:
+                start = index
+            elif event.decision in cls.TRAIL_RESTART_DECISIONS:
+                start = index + 1
+        return events[start:]
+
+    @classmethod
+    def trail(cls, events: list["ReviewEvent"]) -> list[dict[str, Any]]:
+        """由按时间排序的事件还原审核轨迹。"""
+        return [event.as_trail_entry() for event in cls.trail_events(events)]
+
+
+@receiver(post_save, sender=TeacherProject)
+@receiver(post_delete, sender=TeacherProject)
+@receiver(post_save, sender=ProjectSelection)
+@receiver(post_delete, sender=ProjectSelection)
+def refresh_project_catalog(sender: type[models.Model], raw: bool = False, **kwargs: Any) -> None:
+    # 以 QuerySet.update / bulk_create 写入的路径不触发信号，由 enrollment.py 自行调用
+    if not raw:
+        invalidate_catalog()
+
+
+@receiver(post_save, sender=VolunteerRecord)
+@receiver(post_delete, sender=VolunteerRecord)
+@receiver(post_save, sender=StudentReviewTicket)
+@receiver(post_delete, sender=StudentReviewTicket)
+def refresh_review_stats(sender: type[models.Model], raw: bool = False, **kwargs: Any) -> None:
+    # 批量审核走 bulk_update，不触发信号，由 views._bulk_review 自行调用
+    if not raw:
+        from .stats import invalidate_review_stats
+
+        invalidate_review_stats()
+
+
+@receiver(post_delete, sender=VolunteerRecord)
+def release_volunteer_hours(sender: type[models.Model], instance: VolunteerRecord, **kwargs: Any) -> None:
+    from .ledger import apply_hours_deltas, transition_entries
+
+    apply_hours_deltas(transition_entries(instance.ledger_state(), None))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def link_student_records(sender: type[models.Model], instance: Any, created: bool, raw: bool = False, **kwargs: Any) -> None:
+    # 账号创建前提交的记录在账号创建时补上外键
+    if not created or raw:
+        return
+    match = models.Q(student_account=instance.username)
+    if getattr(instance, "student_id", ""):
+        match |= models.Q(student_id=instance.student_id)
+    from .ledger import apply_hours_deltas
+
+    with transaction.atomic():
+        # 新关联的志愿记录补记到该学生的时长台账
+        records = VolunteerRecord.objects.select_for_update().filter(match, student_user__isnull=True)
+        apply_hours_deltas((instance.pk, status, hours) for status, hours in records.values_list("status", "hours"))
+        for model in (VolunteerRecord, ProjectSelection):
+            model.objects.filter(match, student_user__isnull=True).update(student_user=instance)
@@ -2,11 +2,21 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import ProjectSelection, StudentReviewTicket, TeacherProject, VolunteerRecord
+from .enrollment import queue_position, waitlist_position
+from .models import (
+    EnrollmentTicket,
+    ProjectSelection,
+    ReviewableModel,
+    ReviewEvent,
+    StudentReviewTicket,
+    TeacherProject,
+    VolunteerHoursSummary,
+    VolunteerRecord,
+)
 
 
 class TeacherProjectSerializer(serializers.ModelSerializer):
-    selected_count = serializers.IntegerField(read_only=True)
+    selected_count = serializers.SerializerMethodField()
 
     class Meta:
         model = TeacherProject
@@ -17,15 +27,23 @@ class TeacherProjectSerializer(serializers.ModelSerializer):
             "points",
             "deadline",
             "slots",
+            "remaining_slots",
+            "rush_mode",
             "status",
             "selected_count",
+            "active_selection_count",
             "created_at",
             "updated_at",
         ]
 
+    def get_selected_count(self, obj: TeacherProject) -> int:
+        # 列表与详情查询以 Count 注解给出；新建/更新后返回的实例未注解，读取计数列
+        return getattr(obj, "selected_count", obj.active_selection_count)
+
 
 class ProjectSelectionSerializer(serializers.ModelSerializer):
     project_id = serializers.CharField(read_only=True)
+    waitlist_position = serializers.SerializerMethodField()
 
     class Meta:
         model = ProjectSelection
@@ -37,18 +55,85 @@ class ProjectSelectionSerializer(serializers.ModelSerializer):
             "student_account",
             "student_id",
             "status",
+            "waitlist_position",
             "notes",
             "created_at",
             "updated_at",
         ]
+        # 报名状态只能经由报名、取消与候补转正流程改变，这些流程同时维护项目的名额计数
+        read_only_fields = ["status"]
         extra_kwargs = {
             "project": {"write_only": True},
             "student_name": {"required": True},
             "student_account": {"required": True},
         }
 
+    def get_fields(self) -> dict[str, serializers.Field]:
+        fields = super().get_fields()
+        if self.instance is not None:
+            # 报名后不能改换项目：名额占用在原项目上
+            fields["project"].read_only = True
+        return fields
+
+    def get_waitlist_position(self, obj: ProjectSelection) -> int | None:
+        # 列表查询集已由 with_waitlist_positions 标注位置
+        if hasattr(obj, "waitlist_rank"):
+            rank: int | None = obj.waitlist_rank
+            return rank
+        return waitlist_position(obj)
+
+
+class EnrollmentTicketSerializer(serializers.ModelSerializer):
+    project_id = serializers.CharField(read_only=True)
+    selection_id = serializers.CharField(read_only=True, allow_null=True)
+    queue_position = serializers.SerializerMethodField()
+    waitlist_position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EnrollmentTicket
+        fields = [
+            "id",
+            "project_id",
+            "student_name",
+            "student_account",
+            "student_id",
+            "status",
+            "reason",
+            "message",
+            "selection_id",
+            "queue_position",
+            "waitlist_position",
+            "created_at",
+            "processed_at",
+        ]
+        read_only_fields = fields
+
+    def get_queue_position(self, obj: EnrollmentTicket) -> int | None:
+        if hasattr(obj, "queue_rank"):
+            rank: int | None = obj.queue_rank
+            return rank
+        return queue_position(obj)
+
+    def get_waitlist_position(self, obj: EnrollmentTicket) -> int | None:
+        if obj.status != EnrollmentTicket.TicketStatus.WAITLISTED:
+            return None
+        if hasattr(obj, "waitlist_rank"):
+            rank: int | None = obj.waitlist_rank
+            return rank
+        if obj.selection is None:
+            return None
+        return waitlist_position(obj.selection)
+
+
+class ReviewTrailMixin(serializers.Serializer):
+    # 由预取的 ReviewEvent 还原的审核轨迹
+    review_trail = serializers.SerializerMethodField()
 
-class VolunteerRecordSerializer(serializers.ModelSerializer):
+    def get_review_trail(self, obj: ReviewableModel) -> list[dict]:
+        return ReviewEvent.trail(list(obj.review_events.all()))
+
+
+class VolunteerRecordSerializer(ReviewTrailMixin, serializers.ModelSerializer):
     hours = serializers.DecimalField(
         max_digits=6,
         decimal_places=2,
@@ -69,6 +154,8 @@ class VolunteerRecordSerializer(serializers.ModelSerializer):
             "status",
             "review_stage",
             "review_notes",
+            "claimed_by",
+            "claim_expires_at",
             "review_trail",
             "submitted_via",
             "project",
@@ -78,11 +165,12 @@ class VolunteerRecordSerializer(serializers.ModelSerializer):
         read_only_fields = [
             "status",
             "review_stage",
-            "review_trail",
+            "claimed_by",
+            "claim_expires_at",
         ]
 
 
-class StudentReviewTicketSerializer(serializers.ModelSerializer):
+class StudentReviewTicketSerializer(ReviewTrailMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentReviewTicket
         fields = [
@@ -94,10 +182,16 @@ class StudentReviewTicketSerializer(serializers.ModelSerializer):
             "status",
             "review_stage",
             "review_notes",
+            "claimed_by",
+            "claim_expires_at",
             "review_trail",
             "created_at",
             "updated_at",
         ]
+        read_only_fields = [
+            "claimed_by",
+            "claim_expires_at",
+        ]
 
 
 class ReviewDecisionSerializer(serializers.Serializer):
@@ -109,6 +203,48 @@ class ReviewDecisionSerializer(serializers.Serializer):
     note = serializers.CharField(allow_blank=True, required=False, default="")
 
 
+class BulkReviewDecisionSerializer(ReviewDecisionSerializer):
+    # 单次最多处理 500 条
+    ids = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        allow_empty=False,
+        max_length=500,
+    )
+
+
+class InboxClaimSerializer(serializers.Serializer):
+    stage = serializers.ChoiceField(
+        choices=[
+            ReviewableModel.ReviewStage.STAGE1,
+            ReviewableModel.ReviewStage.STAGE2,
+            ReviewableModel.ReviewStage.STAGE3,
+        ],
+        default=ReviewableModel.ReviewStage.STAGE1,
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
 class OverrideDecisionSerializer(serializers.Serializer):
     action = serializers.ChoiceField(choices=["reopen", "cancel"])
     note = serializers.CharField(allow_blank=True, required=False, default="")
+
+
+class VolunteerHoursSummarySerializer(serializers.ModelSerializer):
+    student_account = serializers.CharField(source="student_user.username", read_only=True)
+    student_id = serializers.CharField(source="student_user.student_id", read_only=True)
+    approved_hours = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    pending_hours = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    rejected_hours = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+
+    class Meta:
+        model = VolunteerHoursSummary
+        fields = [
+            "student_user",
+            "student_account",
+            "student_id",
+            "approved_hours",
+            "pending_hours",
+            "rejected_hours",
+            "updated_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,91 @@
+"""教师 / 管理员审核看板的统计数据（``GET /programs/stats/``）。
+
+统计全部来自数据库端的 GROUP BY 聚合：两类审核记录按 ``(status, review_stage)`` 计数、
+志愿时长按状态求和、课题按报名状态统计人数，共四条查询，不再把全表下发给浏览器计数。
+
+结果短暂缓存。审核写入后在事务提交时递增统计版本号（见 ``core.versioned_cache``）；课题名额由报名写入改变，
+缓存 key 同时带上项目目录的版本号，报名或撤销后填报率随目录缓存一起刷新。
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.versioned_cache import CacheVersion, get_or_build
+
+from .catalog import catalog_version
+from .models import ProjectSelection, StudentReviewTicket, TeacherProject, VolunteerRecord
+
+STATS_VERSION = CacheVersion("programsapp:stats:version", "Stats")
+STATS_KEY_PREFIX = "programsapp:stats"
+# 看板统计允许的最长陈旧时间（秒）
+STATS_CACHE_TIMEOUT = 30
+# 时长统一保留两位小数，与 VolunteerRecordSerializer 输出的数值一致
+HOURS_QUANTUM = Decimal("0.01")
+
+
+def stats_version() -> int | None:
+    return STATS_VERSION.get()
+
+
+def _bump_version() -> None:
+    STATS_VERSION.bump()
+
+
+def invalidate_review_stats() -> None:
+    """审核记录发生写入时调用：事务提交后使统计缓存失效。"""
+    STATS_VERSION.invalidate()
+
+
+def _stage_counts(model: type[VolunteerRecord] | type[StudentReviewTicket]) -> list[dict[str, Any]]:
+    rows = model.objects.order_by().values("status", "review_stage").annotate(count=Count("pk"))
+    return sorted(rows, key=lambda row: (row["status"], row["review_stage"]))
+
+
+def _hours_by_status() -> list[dict[str, Any]]:
+    rows = VolunteerRecord.objects.order_by().values("status").annotate(count=Count("pk"), hours=Sum("hours"))
+    return [
+        {
+            "status": row["status"],
+            "count": row["count"],
+            "hours": (row["hours"] or Decimal(0)).quantize(HOURS_QUANTUM),
+        }
+        for row in sorted(rows, key=lambda row: row["status"])
+    ]
+
+
+def _project_fill_rates() -> list[dict[str, Any]]:
+    statuses = ProjectSelection.SelectionStatus
+    rows = (
+        TeacherProject.objects.order_by("-created_at")
+        .values("id", "title", "status", "slots")
+        .annotate(
+            selected_count=Count("selections", filter=Q(selections__status=statuses.ACTIVE)),
+            waitlisted_count=Count("selections", filter=Q(selections__status=statuses.WAITLISTED)),
+        )
+    )
+    return [
+        {**row, "fill_rate": round(row["selected_count"] / row["slots"], 4) if row["slots"] else None}
+        for row in rows
+    ]
+
+
+def build_review_stats() -> dict[str, Any]:
+    return {
+        "volunteer_records": {"by_stage": _stage_counts(VolunteerRecord), "hours_by_status": _hours_by_status()},
+        "student_reviews": {"by_stage": _stage_counts(StudentReviewTicket)},
+        "projects": _project_fill_rates(),
+        "generated_at": timezone.now().isoformat(),
+    }
+
+
+def get_review_stats() -> dict[str, Any]:
+    """返回看板统计；同一版本内命中缓存，否则重新聚合并写入。"""
+    version, projects_version = stats_version(), catalog_version()
+    key = None
+    if version is not None and projects_version is not None:
+        key = f"{STATS_KEY_PREFIX}:{version}:{projects_version}"
+    return get_or_build(key, build_review_stats, STATS_CACHE_TIMEOUT, "Stats")
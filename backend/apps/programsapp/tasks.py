@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.db import transaction
+
+from .enrollment import EnrollmentError, drain_enrollment_queue
+from .models import EnrollmentTicket, TeacherProject
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="programsapp.drain_enrollment_queue")
+def drain_enrollments(project_id: str) -> int:
+    """Background consumer that admits the queued enrolments of one rush-mode project in arrival order."""
+
+    processed = drain_enrollment_queue(project_id)
+    if processed:
+        logger.info("Processed %s queued enrolments for project %s", processed, project_id)
+    return processed
+
+
+def _dispatch(project_id: str) -> None:
+    # Try to enqueue Celery task; fallback to in-process execution if broker unavailable.
+    try:
+        drain_enrollments.delay(project_id)
+    except Exception:
+        drain_enrollments(project_id)
+
+
+def enqueue_enrollment(
+    project: TeacherProject,
+    *,
+    student_name: str,
+    student_account: str,
+    student_id: str = "",
+    notes: str = "",
+) -> EnrollmentTicket:
+    """Queue an enrolment for a rush-mode project and wake its consumer once the transaction commits."""
+
+    if project.status != TeacherProject.ProjectStatus.ACTIVE:
+        raise EnrollmentError(EnrollmentError.CLOSED, "该项目暂未开放报名，请选择其他项目。")
+    ticket = EnrollmentTicket.objects.create(
+        project=project,
+        student_name=student_name,
+        student_account=student_account,
+        student_id=student_id,
+        notes=notes,
+    )
+    transaction.on_commit(lambda: _dispatch(project.pk))
+    return ticket
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+from apps.programsapp.models import StudentReviewTicket, VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _record(account: str, **kwargs: Any) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal("2.0"),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_teacher_bulk_advances_pending_records(
+    api_client: APIClient, teacher_user: Student, django_assert_max_num_queries: DjangoAssertNumQueries
+) -> None:
+    pending = [_record(f"s{index}") for index in range(5)]
+    approved = _record(
+        "done",
+        status=VolunteerRecord.ReviewStatus.APPROVED,
+        review_stage=VolunteerRecord.ReviewStage.COMPLETED,
+    )
+    api_client.force_authenticate(user=teacher_user)
+    ids = [record.id for record in pending] + [approved.id, "vol-missing"]
+
+    with django_assert_max_num_queries(8):
+        response = api_client.post(
+            "/api/v1/programs/volunteer-records/bulk-review/",
+            {"ids": ids, "decision": "advance", "reviewer": teacher_user.username, "note": "批量通过"},
+            format="json",
+        )
+
+    assert response.status_code == 200
+    assert response.data["updated"] == 5
+    results = {item["id"]: item for item in response.data["results"]}
+    assert results[approved.id]["result"] == "ineligible"
+    assert results["vol-missing"]["result"] == "not_found"
+    for record in pending:
+        assert results[record.id] == {
+            "id": record.id,
+            "result": "ok",
+            "status": VolunteerRecord.ReviewStatus.PENDING,
+            "review_stage": VolunteerRecord.ReviewStage.STAGE2,
+        }
+        record.refresh_from_db()
+        assert record.review_stage == VolunteerRecord.ReviewStage.STAGE2
+        assert record.review_events.get().note == "批量通过"
+
+
+@pytest.mark.django_db
+def test_teacher_bulk_rejects_student_tickets(api_client: APIClient, teacher_user: Student) -> None:
+    tickets = [
+        StudentReviewTicket.objects.create(student_name=f"学生{index}", student_id=f"2024{index}", college="计算机", major="软件")
+        for index in range(3)
+    ]
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.post(
+        "/api/v1/programs/student-reviews/bulk-review/",
+        {"ids": [ticket.id for ticket in tickets], "decision": "reject", "note": "材料不全"},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["updated"] == 3
+    assert set(StudentReviewTicket.objects.values_list("status", flat=True)) == {StudentReviewTicket.ReviewStatus.REJECTED}
+
+
+@pytest.mark.django_db
+def test_admin_cannot_bulk_review(api_client: APIClient, admin_user: Student) -> None:
+    record = _record("s1")
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.post(
+        "/api/v1/programs/volunteer-records/bulk-review/",
+        {"ids": [record.id], "decision": "advance"},
+        format="json",
+    )
+
+    assert response.status_code == 403
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+from apps.programsapp import enrollment
+from apps.programsapp.enrollment import EnrollmentError, _drain_lock_key, drain_enrollment_queue
+from apps.programsapp.models import EnrollmentTicket, ProjectSelection, TeacherProject
+
+
+def _queue(project: TeacherProject, account: str) -> EnrollmentTicket:
+    return EnrollmentTicket.objects.create(project=project, student_name=account, student_account=account)
+
+
+@pytest.mark.django_db
+def test_rush_mode_returns_ticket_and_admits_in_arrival_order(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="热门课题", slots=1, rush_mode=True)
+
+    responses = [
+        api_client.post(
+            "/api/v1/programs/selections/",
+            {"project": project.pk, "student_name": name, "student_account": f"{name}@example.com"},
+            format="json",
+        )
+        for name in ("first", "second")
+    ]
+
+    assert [response.status_code for response in responses] == [202, 202]
+    assert [response.data["queue_position"] for response in responses] == [1, 2]
+    assert not ProjectSelection.objects.exists()
+
+    assert drain_enrollment_queue(project.pk) == 2
+
+    first = api_client.get(f"/api/v1/programs/enrollment-tickets/{responses[0].data['id']}/")
+    second = api_client.get(f"/api/v1/programs/enrollment-tickets/{responses[1].data['id']}/")
+    assert first.data["status"] == EnrollmentTicket.TicketStatus.ADMITTED
+    assert first.data["selection_id"] == ProjectSelection.objects.get(status=ProjectSelection.SelectionStatus.ACTIVE).pk
+    assert first.data["queue_position"] is None
+    assert second.data["status"] == EnrollmentTicket.TicketStatus.WAITLISTED
+    assert second.data["waitlist_position"] == 1
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db
+def test_drain_processes_batches_and_rejects_duplicates() -> None:
+    project = TeacherProject.objects.create(title="批量课题", slots=3, rush_mode=True)
+    tickets = [_queue(project, account) for account in ("a", "b", "a", "c", "d")]
+
+    assert drain_enrollment_queue(project.pk, batch_size=2) == 5
+
+    statuses = [EnrollmentTicket.objects.get(pk=ticket.pk) for ticket in tickets]
+    assert [(ticket.status, ticket.reason) for ticket in statuses] == [
+        (EnrollmentTicket.TicketStatus.ADMITTED, ""),
+        (EnrollmentTicket.TicketStatus.ADMITTED, ""),
+        (EnrollmentTicket.TicketStatus.REJECTED, EnrollmentError.DUPLICATE),
+        (EnrollmentTicket.TicketStatus.ADMITTED, ""),
+        (EnrollmentTicket.TicketStatus.WAITLISTED, ""),
+    ]
+    assert set(
+        ProjectSelection.objects.filter(status=ProjectSelection.SelectionStatus.ACTIVE).values_list(
+            "student_account", flat=True
+        )
+    ) == {"a", "b", "c"}
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db
+def test_drain_skips_when_another_consumer_holds_the_lock() -> None:
+    project = TeacherProject.objects.create(title="锁课题", slots=2, rush_mode=True)
+    ticket = _queue(project, "a")
+    cache.add(_drain_lock_key(project.pk), 1)
+    try:
+        assert drain_enrollment_queue(project.pk) == 0
+    finally:
+        cache.delete(_drain_lock_key(project.pk))
+
+    ticket.refresh_from_db()
+    assert ticket.status == EnrollmentTicket.TicketStatus.QUEUED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_consumers_are_serialised_by_the_project_row_lock(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 进程内 LocMem 下消费者锁不跨进程：这里让每个消费者都拿到锁，模拟多个进程同时消费
+    monkeypatch.setattr(enrollment.cache, "add", lambda *args, **kwargs: True)
+    project = TeacherProject.objects.create(title="并发课题", slots=5, rush_mode=True)
+    tickets = [_queue(project, f"s{index}") for index in range(40)]
+
+    def consume(_: int) -> int:
+        try:
+            while True:
+                try:
+                    return drain_enrollment_queue(project.pk, batch_size=3)
+                except OperationalError as exc:
+                    # 共享内存 SQLite 遇到写锁立即报错，代替 busy timeout 重试
+                    if "locked" not in str(exc):
+                        raise
+                    time.sleep(0.001)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(consume, range(4)))
+
+    # 每张票据恰好处理一次：重复处理的票据会被当作重复报名拒绝
+    assert not EnrollmentTicket.objects.filter(
+        status__in=[EnrollmentTicket.TicketStatus.QUEUED, EnrollmentTicket.TicketStatus.REJECTED]
+    ).exists()
+    assert ProjectSelection.objects.filter(project=project).count() == len(tickets)
+    assert ProjectSelection.objects.filter(project=project, status=ProjectSelection.SelectionStatus.ACTIVE).count() == 5
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db
+def test_ticket_list_annotates_positions_in_one_query(api_client: APIClient, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    project = TeacherProject.objects.create(title="热门课题", slots=1, rush_mode=True)
+    for account in ("a", "b", "c"):
+        _queue(project, account)
+    drain_enrollment_queue(project.pk)
+    for account in ("d", "e"):
+        _queue(project, account)
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/v1/programs/enrollment-tickets/", {"project": project.pk})
+
+    positions = {
+        item["student_account"]: (item["queue_position"], item["waitlist_position"]) for item in response.data
+    }
+    assert positions == {"a": (None, None), "b": (None, 1), "c": (None, 2), "d": (1, None), "e": (2, None)}
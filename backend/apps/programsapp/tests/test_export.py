@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import csv
+import io
+import tracemalloc
+import zipfile
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.http import HttpResponseBase, StreamingHttpResponse
+from rest_framework.test import APIClient
+
+from apps.programsapp import export
+from apps.programsapp.models import ReviewEvent, StudentReviewTicket, VolunteerRecord
+from apps.scoringapp.models import Student
+from apps.scoringapp.sheets import iter_xlsx_rows
+
+
+def _record(account: str, **kwargs: Any) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal("2.5"),
+        **kwargs,
+    )
+
+
+def _content(response: HttpResponseBase) -> bytes:
+    assert isinstance(response, StreamingHttpResponse)
+    return response.getvalue()
+
+
+@pytest.mark.django_db
+def test_csv_export_applies_list_filters_and_flattens_trail(api_client: APIClient, teacher_user: Student) -> None:
+    record = _record("s1", status=VolunteerRecord.ReviewStatus.APPROVED)
+    record.review_event(decision=ReviewEvent.Decision.ADVANCE, reviewer="张老师", note="材料齐全").save()
+    _record("s2")
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.get("/api/v1/programs/volunteer-records/export/", {"status": "approved"})
+
+    assert response.status_code == 200
+    assert response["Content-Disposition"].endswith('.csv"')
+    rows = list(csv.reader(io.StringIO(_content(response).decode("utf-8-sig"))))
+    header, (row,) = rows[0], rows[1:]
+    values = dict(zip(header, row))
+    assert values["记录编号"] == record.id
+    assert values["时长"] == "2.50"
+    assert values["审核状态"] == "已通过"
+    assert values["审核轨迹"].endswith("一审 通过 张老师：材料齐全")
+
+
+@pytest.mark.django_db
+def test_xlsx_export_round_trips(api_client: APIClient, teacher_user: Student) -> None:
+    tickets = [
+        StudentReviewTicket.objects.create(student_name=f"学生{index}", student_id=f"2024{index}", college="计算机", major="软件<&>")
+        for index in range(3)
+    ]
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.get("/api/v1/programs/student-reviews/export/", {"file_format": "xlsx"})
+
+    assert response.status_code == 200
+    rows = [values for _, values in iter_xlsx_rows(io.BytesIO(_content(response)))]
+    assert rows[0][:5] == ["审核编号", "学生姓名", "学号", "学院", "专业"]
+    assert sorted(row[0] for row in rows[1:]) == sorted(ticket.id for ticket in tickets)
+    assert {row[4] for row in rows[1:]} == {"软件<&>"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("file_format", ["csv", "xlsx"])
+def test_export_neutralises_formulas(api_client: APIClient, teacher_user: Student, file_format: str) -> None:
+    payloads = ["=HYPERLINK(\"http://evil\")", "+1", "-2+3", "@SUM(A1)", "\tcmd", "\rcmd"]
+    for index, name in enumerate(payloads):
+        VolunteerRecord.objects.create(
+            student_name=name, student_account=f"s{index}", activity="社区服务", hours=Decimal("1.0")
+        )
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.get("/api/v1/programs/volunteer-records/export/", {"file_format": file_format})
+
+    content = _content(response)
+    if file_format == "csv":
+        rows = list(csv.reader(io.StringIO(content.decode("utf-8-sig"), newline="")))
+        column = rows[0].index("学生姓名")
+        assert sorted(row[column] for row in rows[1:]) == sorted("'" + payload for payload in payloads)
+    else:
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert "<f>" not in sheet
+        assert '<c r="B2" t="inlineStr"><is><t xml:space="preserve">=HYPERLINK("http://evil")</t></is></c>' in sheet
+
+
+@pytest.mark.django_db
+def test_export_rejects_unknown_format_and_students(
+    api_client: APIClient, teacher_user: Student, student_user: Student
+) -> None:
+    api_client.force_authenticate(user=teacher_user)
+    assert api_client.get("/api/v1/programs/volunteer-records/export/", {"file_format": "pdf"}).status_code == 400
+
+    api_client.force_authenticate(user=student_user)
+    assert api_client.get("/api/v1/programs/volunteer-records/export/").status_code == 403
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("file_format", ["csv", "xlsx"])
+def test_export_memory_does_not_grow_with_row_count(monkeypatch: pytest.MonkeyPatch, file_format: str) -> None:
+    monkeypatch.setattr(export, "EXPORT_CHUNK_SIZE", 100)
+
+    def peak_while_streaming(rows: int) -> int:
+        existing = VolunteerRecord.objects.count()
+        VolunteerRecord.objects.bulk_create(
+            VolunteerRecord(
+                student_name=f"s{index}", student_account=f"s{index}", activity="社区服务" * 10, hours=Decimal("1.0")
+            )
+            for index in range(existing, rows)
+        )
+        queryset = VolunteerRecord.objects.select_related("project").prefetch_related("review_events")
+        tracemalloc.start()
+        try:
+            size = sum(len(piece) for piece in export.export_stream(queryset, file_format))
+            assert size
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small = peak_while_streaming(500)
+    large = peak_while_streaming(2500)
+    assert large < small * 2
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+from pytest_django import DjangoAssertNumQueries, DjangoCaptureOnCommitCallbacks
+from rest_framework.test import APIClient
+
+from apps.programsapp.catalog import _bump_version
+from apps.programsapp.enrollment import cancel_selection, enroll
+from apps.programsapp.models import ProjectSelection, TeacherProject
+
+
+def _enroll(project: TeacherProject, account: str) -> ProjectSelection:
+    return enroll(project, student_name=account, student_account=account)
+
+
+@pytest.mark.django_db
+def test_selection_counter_follows_enroll_cancel_and_promotion() -> None:
+    project = TeacherProject.objects.create(title="计数课题", slots=1)
+    holder = _enroll(project, "a")
+    _enroll(project, "b")
+    project.refresh_from_db()
+    assert project.active_selection_count == 1
+
+    cancel_selection(holder)
+    project.refresh_from_db()
+    assert project.active_selection_count == 1
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db
+def test_project_list_uses_single_query_and_caches(api_client: APIClient, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    projects = [TeacherProject.objects.create(title=f"课题{index}", slots=3) for index in range(5)]
+    for index, project in enumerate(projects):
+        for account in range(index % 3):
+            _enroll(project, f"s{account}")
+    _bump_version()
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/v1/programs/projects/")
+    assert response.status_code == 200
+    counts = {item["id"]: item["selected_count"] for item in response.data}
+    assert counts == {project.pk: index % 3 for index, project in enumerate(projects)}
+    assert all(item["active_selection_count"] == item["selected_count"] for item in response.data)
+
+    with django_assert_num_queries(0):
+        cached = api_client.get("/api/v1/programs/projects/")
+    assert cached.data == response.data
+
+
+@pytest.mark.django_db
+def test_project_list_cache_invalidated_by_selection_write(api_client: APIClient, django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks) -> None:
+    project = TeacherProject.objects.create(title="缓存课题", slots=2)
+    _bump_version()
+    assert api_client.get("/api/v1/programs/projects/").data[0]["selected_count"] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _enroll(project, "a")
+
+    response = api_client.get("/api/v1/programs/projects/")
+    assert response.data[0]["selected_count"] == 1
+    assert response.data[0]["remaining_slots"] == 1
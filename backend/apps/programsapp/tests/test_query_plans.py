@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+from rest_framework.test import APIClient
+
+from apps.programsapp.models import ProjectSelection, TeacherProject, VolunteerHoursSummary, VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _index_used(queryset: QuerySet) -> str | None:
+    """返回查询计划使用的索引名（SQLite / MySQL），未使用索引时为 None。"""
+    if connection.vendor == "sqlite":
+        for line in queryset.explain().splitlines():
+            for marker in ("USING COVERING INDEX ", "USING INDEX "):
+                if marker in line:
+                    index: str = line.split(marker, 1)[1].split(" ", 1)[0]
+                    return index
+        return None
+    if connection.vendor == "mysql":
+        plan = json.loads(queryset.explain(format="json"))
+
+        def find_key(node: Any) -> str | None:
+            if isinstance(node, dict):
+                if node.get("key"):
+                    return str(node["key"])
+                nodes = list(node.values())
+            elif isinstance(node, list):
+                nodes = node
+            else:
+                return None
+            for child in nodes:
+                key = find_key(child)
+                if key:
+                    return key
+            return None
+
+        return find_key(plan)
+    pytest.skip(f"query plan assertions are written for SQLite and MySQL, not {connection.vendor}")
+
+
+@pytest.fixture
+def populated(db: None) -> Student:
+    student = Student.objects.create_user(username="plan-student", student_id="20240001", password="pass")
+    project = TeacherProject.objects.create(title="计划课题", slots=50)
+    for index in range(30):
+        VolunteerRecord.objects.create(
+            student_name=f"s{index}",
+            student_account="plan-student" if index % 3 == 0 else f"other{index}",
+            activity="社区服务",
+            hours=Decimal("1.0"),
+        )
+        ProjectSelection.objects.create(
+            project=project,
+            student_name=f"s{index}",
+            student_account="plan-student" if index == 0 else f"other{index}",
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return student
+
+
+@pytest.mark.django_db
+def test_records_link_to_student_on_create(populated: Student) -> None:
+    assert VolunteerRecord.objects.filter(student_user=populated).count() == 10
+    assert ProjectSelection.objects.filter(student_user=populated).count() == 1
+
+
+@pytest.mark.django_db
+def test_student_record_lookups_use_indexes(populated: Student) -> None:
+    # 去掉模型默认排序：小表上规划器可能改走 (created_at, id) 索引以省去排序
+    records = VolunteerRecord.objects.order_by()
+    selections = ProjectSelection.objects.order_by()
+    assert _index_used(records.filter(student_user=populated, status="pending")) == "volunteer_student_status_idx"
+    assert _index_used(records.filter(student_user=populated)) == "volunteer_student_status_idx"
+    assert _index_used(selections.filter(student_user=populated)) == "selection_student_status_idx"
+    assert _index_used(selections.filter(student_account="plan-student")) == "selection_account_status_idx"
+
+
+@pytest.mark.django_db
+def test_review_queue_uses_stage_index(populated: Student) -> None:
+    queue = VolunteerRecord.objects.filter(status="pending", review_stage="stage1").order_by("created_at")
+    assert _index_used(queue) == "volunteer_inbox_idx"
+
+
+@pytest.mark.django_db
+def test_records_link_when_account_is_created_later() -> None:
+    record = VolunteerRecord.objects.create(
+        student_name="新生", student_account="late", student_id="20249999", activity="迎新", hours=Decimal("1.0")
+    )
+    assert record.student_user is None
+
+    student = Student.objects.create_user(username="late-login", student_id="20249999", password="pass")
+
+    record.refresh_from_db()
+    assert record.student_user == student
+
+
+@pytest.mark.django_db
+def test_records_relink_when_account_or_student_id_changes(api_client: APIClient) -> None:
+    first = Student.objects.create_user(username="first", student_id="20240101", password="pass")
+    second = Student.objects.create_user(username="second", student_id="20240102", password="pass")
+    record = VolunteerRecord.objects.create(
+        student_name="学生", student_account="first", activity="社区服务", hours=Decimal("2.0")
+    )
+    project = TeacherProject.objects.create(title="关联课题", slots=5)
+    selection = ProjectSelection.objects.create(project=project, student_name="学生", student_account="first")
+
+    record = VolunteerRecord.objects.get(pk=record.pk)
+    record.student_account = "second"
+    record.save(update_fields=["student_account"])
+    assert VolunteerRecord.objects.get(pk=record.pk).student_user == second
+    # 时长台账随关联用户一起转移
+    assert first.volunteer_hours.pending_hours == 0
+    assert second.volunteer_hours.pending_hours == Decimal("2.0")
+
+    response = api_client.patch(
+        f"/api/v1/programs/selections/{selection.pk}/", {"student_account": "second"}, format="json"
+    )
+    assert response.status_code == 200
+    assert ProjectSelection.objects.get(pk=selection.pk).student_user == second
+
+    record.student_account = "nobody"
+    record.save()
+    assert VolunteerRecord.objects.get(pk=record.pk).student_user is None
+    assert VolunteerHoursSummary.objects.get(student_user=second).pending_hours == 0
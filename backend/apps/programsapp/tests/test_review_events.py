@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from importlib import import_module
+
+import pytest
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from apps.programsapp.models import ReviewEvent, VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _record(account: str) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal("2.0"),
+    )
+
+
+def _review(api_client: APIClient, record: VolunteerRecord, decision: str, note: str = "") -> Response:
+    return api_client.post(
+        f"/api/v1/programs/volunteer-records/{record.id}/review/",
+        {"decision": decision, "reviewer": "teacher", "note": note},
+        format="json",
+    )
+
+
+@pytest.mark.django_db
+def test_reviews_append_events_and_reset_restarts_trail(api_client: APIClient, teacher_user: Student) -> None:
+    record = _record("s1")
+    api_client.force_authenticate(user=teacher_user)
+
+    _review(api_client, record, "advance", "一审通过")
+    _review(api_client, record, "advance", "二审通过")
+    response = _review(api_client, record, "reset", "重新审核")
+
+    assert ReviewEvent.objects.filter(volunteer_record=record).count() == 3
+    assert [entry["note"] for entry in response.data["review_trail"]] == ["重新审核"]
+    assert list(
+        ReviewEvent.objects.filter(reviewer="teacher").values_list("decision", flat=True)
+    ) == ["advance", "advance", "reset"]
+
+
+@pytest.mark.django_db
+def test_list_prefetches_review_events(
+    api_client: APIClient, teacher_user: Student, django_assert_num_queries: DjangoAssertNumQueries
+) -> None:
+    for index in range(4):
+        record = _record(f"s{index}")
+        record.review_event(decision=ReviewEvent.Decision.ADVANCE, reviewer="t", note=str(index)).save()
+    api_client.force_authenticate(user=teacher_user)
+    api_client.get("/api/v1/programs/volunteer-records/")
+
+    with django_assert_num_queries(2):
+        response = api_client.get("/api/v1/programs/volunteer-records/")
+
+    assert response.status_code == 200
+    assert sorted(item["review_trail"][0]["note"] for item in response.data) == ["0", "1", "2", "3"]
+
+
+@pytest.mark.django_db
+def test_backfill_converts_legacy_trails() -> None:
+    migration = import_module("apps.programsapp.migrations.0006_review_events")
+    record = _record("s1")
+    # 模拟迁移前仍带有 review_trail 列的记录
+    setattr(record, "review_trail", [
+        {"stage": "stage1", "reviewer": "张老师", "note": "资料完整", "timestamp": "2024-04-15T10:00:00Z"},
+        {"stage": "stage2", "reviewer": "李老师", "note": "符合政策", "timestamp": "2024-04-16T09:00:00Z"},
+    ])
+
+    events = migration._events_for(ReviewEvent, record, "volunteer", "volunteer_record")
+    ReviewEvent.objects.bulk_create(events)
+
+    trail = ReviewEvent.trail(list(record.review_events.all()))
+    assert [(entry["stage"], entry["reviewer"], entry["decision"]) for entry in trail] == [
+        ("stage1", "张老师", "legacy"),
+        ("stage2", "李老师", "legacy"),
+    ]
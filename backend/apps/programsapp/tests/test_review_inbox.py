@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.db import OperationalError, connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.programsapp.inbox import claim_review_items, held_review_items
+from apps.programsapp.models import VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _record(account: str, **kwargs: Any) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal("2.0"),
+        **kwargs,
+    )
+
+
+def _teacher(username: str) -> Student:
+    return Student.objects.create_user(username=username, student_id=username, password="pass", role="teacher")
+
+
+@pytest.mark.django_db
+def test_inbox_hands_out_disjoint_batches(api_client: APIClient, teacher_user: Student) -> None:
+    records = [_record(f"s{index}") for index in range(5)]
+    _record("later", review_stage=VolunteerRecord.ReviewStage.STAGE2)
+    other = _teacher("teacher-b")
+
+    api_client.force_authenticate(user=teacher_user)
+    first = api_client.post("/api/v1/programs/volunteer-records/inbox/", {"stage": "stage1", "limit": 3}, format="json")
+    api_client.force_authenticate(user=other)
+    second = api_client.post("/api/v1/programs/volunteer-records/inbox/", {"stage": "stage1", "limit": 3}, format="json")
+
+    assert first.status_code == 200
+    first_ids = [item["id"] for item in first.data["results"]]
+    second_ids = [item["id"] for item in second.data["results"]]
+    assert first_ids == [record.id for record in records[:3]]
+    assert second_ids == [record.id for record in records[3:]]
+    assert all(item["claimed_by"] == teacher_user.username for item in first.data["results"])
+
+
+@pytest.mark.django_db
+def test_expired_claims_return_to_queue() -> None:
+    record = _record("s1")
+    assert claim_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer="a", limit=5) == [record.id]
+    assert claim_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer="b", limit=5) == []
+
+    VolunteerRecord.objects.filter(pk=record.pk).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert claim_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer="b", limit=5) == [record.id]
+
+
+@pytest.mark.django_db
+def test_review_rejected_while_claimed_by_someone_else(api_client: APIClient, teacher_user: Student) -> None:
+    record = _record("s1")
+    claim_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer="someone-else", limit=1)
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.post(
+        f"/api/v1/programs/volunteer-records/{record.id}/review/",
+        {"decision": "advance"},
+        format="json",
+    )
+
+    assert response.status_code == 409
+    record.refresh_from_db()
+    assert record.review_stage == VolunteerRecord.ReviewStage.STAGE1
+
+
+@pytest.mark.django_db
+def test_review_and_release_clear_the_claim(api_client: APIClient, teacher_user: Student) -> None:
+    reviewed, released = _record("s1"), _record("s2")
+    api_client.force_authenticate(user=teacher_user)
+    api_client.post("/api/v1/programs/volunteer-records/inbox/", {"limit": 2}, format="json")
+
+    api_client.post(f"/api/v1/programs/volunteer-records/{reviewed.id}/review/", {"decision": "advance"}, format="json")
+    response = api_client.post(f"/api/v1/programs/volunteer-records/{released.id}/release/")
+
+    assert response.status_code == 204
+    assert not VolunteerRecord.objects.exclude(claimed_by="").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_claims_never_overlap() -> None:
+    for index in range(60):
+        _record(f"s{index}")
+
+    def retrying(operation: Callable[[], Any]) -> Any:
+        while True:
+            try:
+                return operation()
+            except OperationalError as exc:
+                # 测试用的共享内存 SQLite 遇到写锁立即报错，这里代替 busy timeout 重试
+                if "locked" not in str(exc):
+                    raise
+                time.sleep(0.001)
+
+    def work(reviewer: str) -> list[str]:
+        taken: list[str] = []
+        try:
+            while True:
+                # 与收件箱接口一致：领取中途遇锁重试时，已抢到的记录出现在 held 中
+                batch = retrying(
+                    lambda: held_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer=reviewer)
+                    + claim_review_items(VolunteerRecord.objects.all(), stage="stage1", reviewer=reviewer, limit=5)
+                )
+                if not batch:
+                    return taken
+                taken.extend(batch)
+                # 审核完成：记录离开一审队列
+                retrying(
+                    lambda: VolunteerRecord.objects.filter(pk__in=batch).update(
+                        review_stage=VolunteerRecord.ReviewStage.STAGE2, claimed_by="", claim_expires_at=None
+                    )
+                )
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(work, [f"teacher-{index}" for index in range(6)]))
+
+    claimed = [pk for batch in results for pk in batch]
+    assert len(claimed) == len(set(claimed)) == 60
+
+
+@pytest.mark.django_db
+def test_inbox_lists_own_claims_as_held(api_client: APIClient, teacher_user: Student) -> None:
+    records = [_record(f"s{index}") for index in range(3)]
+    url = "/api/v1/programs/volunteer-records/inbox/"
+    api_client.force_authenticate(user=teacher_user)
+
+    first = api_client.post(url, {"stage": "stage1", "limit": 2}, format="json")
+    assert [item["id"] for item in first.data["results"]] == [record.id for record in records[:2]]
+    assert first.data["held"] == []
+
+    # 再次领取只拿到新的记录，手上尚未到期的记录单独列在 held 中
+    second = api_client.post(url, {"stage": "stage1", "limit": 2}, format="json")
+    assert [item["id"] for item in second.data["results"]] == [records[2].id]
+    assert [item["id"] for item in second.data["held"]] == [record.id for record in records[:2]]
+
+    third = api_client.post(url, {"stage": "stage1", "limit": 2}, format="json")
+    assert third.data["results"] == []
+    assert len(third.data["held"]) == 3
@@ -4,7 +4,7 @@ from decimal import Decimal
 
 import pytest
 
-from apps.programsapp.models import VolunteerRecord
+from apps.programsapp.models import ReviewEvent, VolunteerRecord
 
 
 @pytest.mark.django_db
@@ -31,8 +31,8 @@ def test_teacher_can_review_volunteer(api_client, teacher_user):
     record.refresh_from_db()
     assert record.review_stage == VolunteerRecord.ReviewStage.STAGE2
     assert record.status == VolunteerRecord.ReviewStatus.PENDING
-    assert len(record.review_trail) == 1
-    assert record.review_trail[0]["reviewer"] == teacher_user.username
+    assert len(response.data["review_trail"]) == 1
+    assert response.data["review_trail"][0]["reviewer"] == teacher_user.username
 
 
 @pytest.mark.django_db
@@ -73,10 +73,8 @@ def test_admin_can_override_reviewed_record(api_client, admin_user):
         status=VolunteerRecord.ReviewStatus.APPROVED,
         review_stage=VolunteerRecord.ReviewStage.COMPLETED,
         review_notes="老师审核通过",
-        review_trail=[
-            {"stage": "completed", "reviewer": "teacherA", "note": "ok", "timestamp": "2024-05-01T10:00:00Z"}
-        ],
     )
+    record.review_event(decision=ReviewEvent.Decision.ADVANCE, reviewer="teacherA", note="ok").save()
     api_client.force_authenticate(user=admin_user)
 
     response = api_client.post(
@@ -89,8 +87,9 @@ def test_admin_can_override_reviewed_record(api_client, admin_user):
     record.refresh_from_db()
     assert record.status == VolunteerRecord.ReviewStatus.PENDING
     assert record.review_stage == VolunteerRecord.ReviewStage.STAGE1
-    assert record.review_trail
-    assert record.review_trail[-1]["note"].startswith("管理员复核")
+    trail = response.data["review_trail"]
+    assert [entry["decision"] for entry in trail] == [ReviewEvent.Decision.REOPEN]
+    assert trail[-1]["note"].startswith("管理员复核")
 
 
 @pytest.mark.django_db
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from pytest_django import DjangoAssertNumQueries, DjangoCaptureOnCommitCallbacks
+from rest_framework.test import APIClient
+
+from apps.programsapp.enrollment import enroll
+from apps.programsapp.models import StudentReviewTicket, TeacherProject, VolunteerRecord
+from apps.programsapp.stats import _bump_version
+from apps.scoringapp.models import Student
+
+STATS_URL = "/api/v1/programs/stats/"
+
+
+def _record(account: str, hours: str, **kwargs: Any) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal(hours),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_stats_aggregate_counts_hours_and_fill_rates(
+    api_client: APIClient, teacher_user: Student, django_assert_max_num_queries: DjangoAssertNumQueries
+) -> None:
+    _record("a", "2.0")
+    _record("b", "1.5", review_stage=VolunteerRecord.ReviewStage.STAGE2)
+    _record(
+        "c",
+        "4.0",
+        status=VolunteerRecord.ReviewStatus.APPROVED,
+        review_stage=VolunteerRecord.ReviewStage.COMPLETED,
+    )
+    StudentReviewTicket.objects.create(student_name="学生", student_id="2024", college="计算机", major="软件")
+    project = TeacherProject.objects.create(title="课题", slots=2)
+    for account in ("s1", "s2", "s3"):
+        enroll(project, student_name=account, student_account=account)
+    _bump_version()
+    api_client.force_authenticate(user=teacher_user)
+
+    with django_assert_max_num_queries(4):
+        response = api_client.get(STATS_URL)
+
+    assert response.status_code == 200
+    volunteers = response.data["volunteer_records"]
+    assert volunteers["by_stage"] == [
+        {"status": "approved", "review_stage": "completed", "count": 1},
+        {"status": "pending", "review_stage": "stage1", "count": 1},
+        {"status": "pending", "review_stage": "stage2", "count": 1},
+    ]
+    assert volunteers["hours_by_status"] == [
+        {"status": "approved", "count": 1, "hours": Decimal("4.00")},
+        {"status": "pending", "count": 2, "hours": Decimal("3.50")},
+    ]
+    assert response.data["student_reviews"]["by_stage"] == [
+        {"status": "pending", "review_stage": "stage1", "count": 1}
+    ]
+    (row,) = response.data["projects"]
+    assert (row["selected_count"], row["waitlisted_count"], row["fill_rate"]) == (2, 1, 1.0)
+
+
+@pytest.mark.django_db
+def test_stats_are_cached_until_a_review_write(
+    api_client: APIClient,
+    teacher_user: Student,
+    django_assert_num_queries: DjangoAssertNumQueries,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    record = _record("a", "2.0")
+    _bump_version()
+    api_client.force_authenticate(user=teacher_user)
+    api_client.get(STATS_URL)
+
+    with django_assert_num_queries(0):
+        api_client.get(STATS_URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.post(
+            "/api/v1/programs/volunteer-records/bulk-review/",
+            {"ids": [record.id], "decision": "reject"},
+            format="json",
+        )
+
+    by_stage = api_client.get(STATS_URL).data["volunteer_records"]["by_stage"]
+    assert by_stage == [{"status": "rejected", "review_stage": "stage1", "count": 1}]
+
+
+@pytest.mark.django_db
+def test_students_cannot_read_stats(api_client: APIClient, student_user: Student) -> None:
+    api_client.force_authenticate(user=student_user)
+
+    assert api_client.get(STATS_URL).status_code == 403
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import OperationalError, connection
+from rest_framework.test import APIClient
+
+from apps.programsapp.enrollment import EnrollmentError, cancel_selection, enroll
+from apps.programsapp.models import ProjectSelection, TeacherProject
+
+
+def _enroll(project: TeacherProject, index: int) -> ProjectSelection:
+    return enroll(
+        project,
+        student_name=f"学生{index}",
+        student_account=f"student{index}@example.com",
+        student_id=f"2024{index:04d}",
+    )
+
+
+@pytest.mark.django_db
+def test_enroll_reserves_seat_until_full() -> None:
+    project = TeacherProject.objects.create(title="机器学习课题", slots=2)
+    assert project.remaining_slots == 2
+
+    _enroll(project, 1)
+    _enroll(project, 2)
+    overflow = _enroll(project, 3)
+
+    assert overflow.status == ProjectSelection.SelectionStatus.WAITLISTED
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert project.active_selection_count == 2
+
+
+@pytest.mark.django_db
+def test_duplicate_enrollment_does_not_consume_seat() -> None:
+    project = TeacherProject.objects.create(title="数据库课题", slots=3)
+    _enroll(project, 1)
+
+    with pytest.raises(EnrollmentError) as excinfo:
+        _enroll(project, 1)
+
+    assert excinfo.value.code == EnrollmentError.DUPLICATE
+    project.refresh_from_db()
+    assert project.remaining_slots == 2
+
+
+@pytest.mark.django_db
+def test_open_key_blocks_duplicates_until_cancelled() -> None:
+    # 普通唯一约束（MySQL 同样支持）作用于 open_key，不依赖部分索引
+    project = TeacherProject.objects.create(title="分布式课题", slots=1)
+    first = _enroll(project, 1)
+    _enroll(project, 2)
+
+    for index in (1, 2):
+        with pytest.raises(EnrollmentError) as excinfo:
+            _enroll(project, index)
+        assert excinfo.value.code == EnrollmentError.DUPLICATE
+
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert project.waitlist_tail == 1
+    assert ProjectSelection.objects.filter(project=project).count() == 2
+
+    cancel_selection(first)
+    assert ProjectSelection.objects.get(pk=first.pk).open_key is None
+    assert _enroll(project, 1).status == ProjectSelection.SelectionStatus.WAITLISTED
+
+
+@pytest.mark.django_db
+def test_cancel_releases_seat_once() -> None:
+    project = TeacherProject.objects.create(title="编译原理课题", slots=1)
+    selection = _enroll(project, 1)
+
+    assert cancel_selection(selection) is True
+    assert cancel_selection(selection) is False
+
+    project.refresh_from_db()
+    assert project.remaining_slots == 1
+    assert _enroll(project, 2).status == ProjectSelection.SelectionStatus.ACTIVE
+
+
+@pytest.mark.django_db
+def test_changing_slots_adjusts_remaining() -> None:
+    project = TeacherProject.objects.create(title="操作系统课题", slots=2)
+    _enroll(project, 1)
+
+    project = TeacherProject.objects.get(pk=project.pk)
+    project.slots = 5
+    project.save()
+
+    project.refresh_from_db()
+    assert project.remaining_slots == 4
+
+
+@pytest.mark.django_db
+def test_selection_api_waitlists_when_full(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="网络课题", slots=1)
+    payload = {"project": project.pk, "student_name": "张三", "student_account": "zhangsan@example.com"}
+
+    first = api_client.post("/api/v1/programs/selections/", payload, format="json")
+    second = api_client.post(
+        "/api/v1/programs/selections/",
+        {**payload, "student_name": "李四", "student_account": "lisi@example.com"},
+        format="json",
+    )
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.data["status"] == ProjectSelection.SelectionStatus.WAITLISTED
+    assert second.data["waitlist_position"] == 1
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_enrollments_never_oversell() -> None:
+    slots = 50
+    attempts = 1000
+    project = TeacherProject.objects.create(title="热门课题", slots=slots)
+
+    def attempt(index: int) -> str:
+        try:
+            while True:
+                try:
+                    return _enroll(project, index).status
+                except EnrollmentError as exc:
+                    return exc.code
+                except OperationalError as exc:
+                    # 测试用的共享内存 SQLite 遇到写锁立即报错而不是等待，这里代替 busy timeout 重试
+                    if "locked" not in str(exc):
+                        raise
+                    time.sleep(0.001)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(attempt, range(attempts)))
+
+    assert outcomes.count(ProjectSelection.SelectionStatus.ACTIVE) == slots
+    assert outcomes.count(ProjectSelection.SelectionStatus.WAITLISTED) == attempts - slots
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert ProjectSelection.objects.filter(project=project, status=ProjectSelection.SelectionStatus.ACTIVE).count() == slots
+    numbers = list(
+        ProjectSelection.objects.filter(project=project, status=ProjectSelection.SelectionStatus.WAITLISTED)
+        .order_by("waitlist_number")
+        .values_list("waitlist_number", flat=True)
+    )
+    assert numbers == list(range(1, attempts - slots + 1))
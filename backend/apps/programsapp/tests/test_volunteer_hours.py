@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.programsapp.models import VolunteerHoursSummary, VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _student(username: str) -> Student:
+    return Student.objects.create_user(username=username, student_id=f"id-{username}", password="password123")
+
+
+def _record(account: str, hours: str, **kwargs: Any) -> VolunteerRecord:
+    return VolunteerRecord.objects.create(
+        student_name=account,
+        student_account=account,
+        activity="社区服务",
+        hours=Decimal(hours),
+        **kwargs,
+    )
+
+
+def _ledger(user: Student) -> tuple[Decimal, Decimal, Decimal]:
+    summary = VolunteerHoursSummary.objects.get(student_user=user)
+    return summary.pending_hours, summary.approved_hours, summary.rejected_hours
+
+
+@pytest.mark.django_db
+def test_ledger_follows_review_and_override(api_client: APIClient, teacher_user: Student, admin_user: Student) -> None:
+    student = _student("s1")
+    record = _record("s1", "3.0")
+    _record("s1", "1.5")
+    assert _ledger(student) == (Decimal("4.5"), 0, 0)
+
+    api_client.force_authenticate(user=teacher_user)
+    for _ in range(3):
+        api_client.post(f"/api/v1/programs/volunteer-records/{record.id}/review/", {"decision": "advance"}, format="json")
+    assert _ledger(student) == (Decimal("1.5"), Decimal("3.0"), 0)
+
+    api_client.force_authenticate(user=admin_user)
+    api_client.post(f"/api/v1/programs/volunteer-records/{record.id}/override/", {"action": "cancel"}, format="json")
+    assert _ledger(student) == (Decimal("1.5"), 0, 0)
+
+
+@pytest.mark.django_db
+def test_ledger_follows_bulk_review_edits_and_deletes(
+    api_client: APIClient, teacher_user: Student, student_user: Student
+) -> None:
+    other = _student("s1")
+    rejected = _record("s1", "2.0")
+    edited = _record(student_user.username, "1.0")
+    deleted = _record(student_user.username, "5.0")
+
+    api_client.force_authenticate(user=teacher_user)
+    response = api_client.post(
+        "/api/v1/programs/volunteer-records/bulk-review/",
+        {"ids": [rejected.id], "decision": "reject"},
+        format="json",
+    )
+    assert response.data["updated"] == 1
+    assert api_client.patch(
+        f"/api/v1/programs/volunteer-records/{edited.id}/", {"hours": "2.5"}, format="json"
+    ).status_code == 200
+    assert api_client.delete(f"/api/v1/programs/volunteer-records/{deleted.id}/").status_code == 204
+
+    assert _ledger(other) == (0, 0, Decimal("2.0"))
+    assert _ledger(student_user) == (Decimal("2.5"), 0, 0)
+
+
+@pytest.mark.django_db
+def test_ledger_is_keyed_by_user_across_renames_and_late_registration() -> None:
+    student = _student("old-name")
+    _record("old-name", "2.0")
+    Student.objects.filter(pk=student.pk).update(username="new-name")
+    _record("new-name", "1.0")
+    assert _ledger(student) == (Decimal("3.0"), 0, 0)
+    assert VolunteerHoursSummary.objects.count() == 1
+
+    # 账号注册前提交的记录不计入台账，注册时补记
+    _record("late", "4.0")
+    assert VolunteerHoursSummary.objects.count() == 1
+    late = _student("late")
+    assert _ledger(late) == (Decimal("4.0"), 0, 0)
+
+
+@pytest.mark.django_db
+def test_threshold_filter_and_student_scope(
+    api_client: APIClient, teacher_user: Student, student_user: Student
+) -> None:
+    approved = {"status": VolunteerRecord.ReviewStatus.APPROVED, "review_stage": VolunteerRecord.ReviewStage.COMPLETED}
+    for username in ("low", "high"):
+        _student(username)
+    _record("low", "4.0", **approved)
+    _record("high", "12.0", **approved)
+    _record(student_user.username, "6.0", **approved)
+
+    api_client.force_authenticate(user=teacher_user)
+    response = api_client.get("/api/v1/programs/volunteer-hours/", {"approved_below": "10"})
+    assert [row["student_account"] for row in response.data] == ["low", student_user.username]
+    assert api_client.get("/api/v1/programs/volunteer-hours/", {"approved_below": "x"}).status_code == 400
+    detail = api_client.get("/api/v1/programs/volunteer-hours/high/")
+    assert detail.data["approved_hours"] == Decimal("12.00")
+
+    api_client.force_authenticate(user=student_user)
+    response = api_client.get("/api/v1/programs/volunteer-hours/")
+    assert [row["student_account"] for row in response.data] == [student_user.username]
+
+
+@pytest.mark.django_db
+def test_rebuild_command_recomputes_ledger() -> None:
+    first, second = _student("s1"), _student("s2")
+    _record("s1", "2.0")
+    _record("s1", "3.0", status=VolunteerRecord.ReviewStatus.REJECTED)
+    _record("s2", "1.0", status=VolunteerRecord.ReviewStatus.CANCELLED)
+    _record("unregistered", "8.0")
+    VolunteerHoursSummary.objects.update(pending_hours=Decimal("99"))
+
+    call_command("rebuild_volunteer_hours")
+
+    assert _ledger(first) == (Decimal("2.0"), 0, Decimal("3.0"))
+    assert _ledger(second) == (0, 0, 0)
+    assert VolunteerHoursSummary.objects.count() == 2
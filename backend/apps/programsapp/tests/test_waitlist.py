@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import pytest
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+from apps.programsapp.enrollment import cancel_selection, enroll, waitlist_position
+from apps.programsapp.models import ProjectSelection, TeacherProject
+
+
+def _enroll(project: TeacherProject, account: str) -> ProjectSelection:
+    return enroll(project, student_name=account, student_account=account)
+
+
+@pytest.mark.django_db
+def test_waitlist_positions_follow_arrival_order() -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    _enroll(project, "a")
+    waiting = [_enroll(project, account) for account in ("b", "c", "d")]
+
+    assert [selection.status for selection in waiting] == [ProjectSelection.SelectionStatus.WAITLISTED] * 3
+    assert [waitlist_position(selection) for selection in waiting] == [1, 2, 3]
+
+    cancel_selection(waiting[1])
+    waiting[2].refresh_from_db()
+    assert waitlist_position(waiting[2]) == 2
+
+
+@pytest.mark.django_db
+def test_cancel_promotes_head_of_waitlist() -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    holder = _enroll(project, "a")
+    first = _enroll(project, "b")
+    second = _enroll(project, "c")
+
+    assert cancel_selection(holder) is True
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    project.refresh_from_db()
+    assert first.status == ProjectSelection.SelectionStatus.ACTIVE
+    assert first.waitlist_number is None
+    assert second.status == ProjectSelection.SelectionStatus.WAITLISTED
+    assert waitlist_position(second) == 1
+    assert project.remaining_slots == 0
+
+
+@pytest.mark.django_db
+def test_raising_slots_promotes_waitlist() -> None:
+    project = TeacherProject.objects.create(title="扩容课题", slots=1)
+    _enroll(project, "a")
+    _enroll(project, "b")
+    _enroll(project, "c")
+
+    project = TeacherProject.objects.get(pk=project.pk)
+    project.slots = 2
+    project.save()
+
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert list(
+        ProjectSelection.objects.filter(project=project).order_by("student_account").values_list("status", flat=True)
+    ) == [
+        ProjectSelection.SelectionStatus.ACTIVE,
+        ProjectSelection.SelectionStatus.ACTIVE,
+        ProjectSelection.SelectionStatus.WAITLISTED,
+    ]
+
+
+@pytest.mark.django_db
+def test_waitlisted_student_cannot_enroll_twice(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    _enroll(project, "a")
+    _enroll(project, "b")
+
+    response = api_client.post(
+        "/api/v1/programs/selections/",
+        {"project": project.pk, "student_name": "b", "student_account": "b"},
+        format="json",
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_selection_update_cannot_change_status_or_project(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    other = TeacherProject.objects.create(title="其他课题", slots=1)
+    _enroll(project, "a")
+    waitlisted = _enroll(project, "b")
+
+    response = api_client.patch(
+        f"/api/v1/programs/selections/{waitlisted.pk}/",
+        {"status": ProjectSelection.SelectionStatus.ACTIVE, "project": other.pk, "notes": "改备注"},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    waitlisted.refresh_from_db()
+    assert waitlisted.status == ProjectSelection.SelectionStatus.WAITLISTED
+    assert waitlisted.project_id == project.pk
+    assert waitlisted.notes == "改备注"
+    other.refresh_from_db()
+    assert other.remaining_slots == 1
+
+
+@pytest.mark.django_db
+def test_cancel_action_promotes_waitlist(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    first = _enroll(project, "a")
+    second = _enroll(project, "b")
+
+    response = api_client.post(f"/api/v1/programs/selections/{first.pk}/cancel/")
+    assert response.status_code == 200
+    assert response.data["status"] == ProjectSelection.SelectionStatus.CANCELLED
+    assert api_client.post(f"/api/v1/programs/selections/{first.pk}/cancel/").status_code == 400
+
+    second.refresh_from_db()
+    assert second.status == ProjectSelection.SelectionStatus.ACTIVE
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert project.active_selection_count == 1
+
+
+@pytest.mark.django_db
+def test_promote_action_fills_free_seats(api_client: APIClient) -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    _enroll(project, "a")
+    waitlisted = _enroll(project, "b")
+    # 名额被管理员直接修正，未经过 TeacherProject.save 的自动转正
+    TeacherProject.objects.filter(pk=project.pk).update(slots=2, remaining_slots=1)
+
+    response = api_client.post("/api/v1/programs/selections/promote/", {"project": project.pk}, format="json")
+
+    assert response.status_code == 200
+    assert response.data["promoted"] == 1
+    waitlisted.refresh_from_db()
+    assert waitlisted.status == ProjectSelection.SelectionStatus.ACTIVE
+    project.refresh_from_db()
+    assert project.remaining_slots == 0
+    assert project.active_selection_count == 2
+
+
+@pytest.mark.django_db
+def test_selection_list_annotates_positions_in_one_query(api_client: APIClient, django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    project = TeacherProject.objects.create(title="候补课题", slots=1)
+    for account in ("a", "b", "c", "d"):
+        _enroll(project, account)
+    cancel_selection(ProjectSelection.objects.get(student_account="c"))
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/v1/programs/selections/", {"project": project.pk})
+
+    positions = {item["student_account"]: item["waitlist_position"] for item in response.data}
+    assert positions == {"a": None, "b": 1, "c": None, "d": 2}
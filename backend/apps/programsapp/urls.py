@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    EnrollmentTicketViewSet,
     ProjectSelectionViewSet,
+    ReviewStatsView,
     StudentReviewTicketViewSet,
     TeacherProjectViewSet,
+    VolunteerHoursSummaryViewSet,
     VolunteerRecordViewSet,
 )
 
 router = DefaultRouter()
 router.register("projects", TeacherProjectViewSet, basename="program-projects")
 router.register("selections", ProjectSelectionViewSet, basename="program-selections")
+router.register("enrollment-tickets", EnrollmentTicketViewSet, basename="program-enrollment-tickets")
 router.register("volunteer-records", VolunteerRecordViewSet, basename="program-volunteers")
 router.register("student-reviews", StudentReviewTicketViewSet, basename="program-student-reviews")
+router.register("volunteer-hours", VolunteerHoursSummaryViewSet, basename="program-volunteer-hours")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("stats/", ReviewStatsView.as_view(), name="program-stats"),
+    *router.urls,
+]
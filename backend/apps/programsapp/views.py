@@ -1,29 +1,57 @@
 from __future__ import annotations
 
-from typing import Sequence
-
-from django.db import IntegrityError, transaction
-from django.db.models import Count, Q
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, QuerySet
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from apps.authapp.permissions import RolePermission
+from .catalog import get_cached_catalog
+from .enrollment import (
+    EnrollmentError,
+    cancel_selection,
+    enroll,
+    lock_project,
+    promote_waitlist,
+    with_queue_positions,
+    with_waitlist_positions,
+)
+from .export import CONTENT_TYPES, EXPORT_FORMATS, FORMAT_CSV, export_stream
+from .inbox import claim_review_items, claimed_by_other, held_review_items, release_claim
+from .ledger import apply_hours_deltas, transition_entries
+from .stats import get_review_stats, invalidate_review_stats
+from .tasks import enqueue_enrollment
 from .models import (
+    EnrollmentTicket,
     ProjectSelection,
+    ReviewEvent,
+    ReviewableModel,
     StudentReviewTicket,
     TeacherProject,
+    VolunteerHoursSummary,
     VolunteerRecord,
 )
 from .serializers import (
+    BulkReviewDecisionSerializer,
+    InboxClaimSerializer,
+    EnrollmentTicketSerializer,
     ProjectSelectionSerializer,
     OverrideDecisionSerializer,
     ReviewDecisionSerializer,
     StudentReviewTicketSerializer,
     TeacherProjectSerializer,
+    VolunteerHoursSummarySerializer,
     VolunteerRecordSerializer,
 )
 
@@ -54,17 +82,189 @@ def _next_stage(current: str) -> str:
     return REVIEW_STAGES[idx + 1]
 
 
+REVIEW_UPDATE_FIELDS = ["review_stage", "status", "review_notes", "claimed_by", "claim_expires_at", "updated_at"]
+
+
+def _apply_review(
+    instance: ReviewableModel, *, decision: str, reviewer: str, note: str, timestamp: datetime
+) -> ReviewEvent:
+    """在内存中执行审核决定，返回待插入的审核事件。"""
+    if decision == "reject":
+        instance.status = ReviewableModel.ReviewStatus.REJECTED
+        instance.review_notes = note
+    elif decision == "reset":
+        instance.review_stage = ReviewableModel.ReviewStage.STAGE1
+        instance.status = ReviewableModel.ReviewStatus.PENDING
+        instance.review_notes = note
+    else:
+        next_stage = _next_stage(instance.review_stage)
+        instance.review_stage = next_stage
+        if next_stage == ReviewableModel.ReviewStage.COMPLETED:
+            instance.status = ReviewableModel.ReviewStatus.APPROVED
+        instance.review_notes = note
+    # 审核完成即释放收件箱领取
+    instance.claimed_by = ""
+    instance.claim_expires_at = None
+    instance.updated_at = timestamp
+    return instance.review_event(decision=decision, reviewer=reviewer, note=note, timestamp=timestamp)
+
+
+def _apply_override(
+    instance: ReviewableModel, *, action: str, reviewer: str, note: str, timestamp: datetime
+) -> ReviewEvent:
+    if action == "reopen":
+        instance.review_stage = ReviewableModel.ReviewStage.STAGE1
+        instance.status = ReviewableModel.ReviewStatus.PENDING
+    else:
+        instance.status = ReviewableModel.ReviewStatus.CANCELLED
+    instance.review_notes = note
+    instance.claimed_by = ""
+    instance.claim_expires_at = None
+    instance.updated_at = timestamp
+    return instance.review_event(
+        decision=action,
+        reviewer=reviewer,
+        note=f"管理员复核：{note}" if note else "管理员复核",
+        timestamp=timestamp,
+    )
+
+
+def _bulk_review(view: viewsets.GenericViewSet, request: Request) -> Response:
+    """对一批记录执行同一审核决定：一个事务、一次读取、一次 bulk_update，只返回逐条结果。
+
+    advance / reject 只作用于待审核的记录，reset 作用于所有找到的记录。
+    """
+    serializer = BulkReviewDecisionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    payload = serializer.validated_data
+    decision = payload["decision"]
+    reviewer = payload.get("reviewer") or "系统"
+    note = payload.get("note") or ""
+    ids = list(dict.fromkeys(payload["ids"]))
+    username = getattr(request.user, "username", "")
+    now = timezone.now()
+    # bulk_update 不经过 VolunteerRecord.save，时长台账增量在这里汇总（记录已加锁）
+    tracks_hours = view.get_queryset().model is VolunteerRecord
+    ledger = []
+
+    results = []
+    with transaction.atomic():
+        instances = {
+            instance.pk: instance
+            for instance in view.filter_queryset(view.get_queryset())
+            .filter(pk__in=ids)
+            .prefetch_related(None)
+            # 只锁记录本身：select_related 的课题是可空外键（外连接），PostgreSQL 不允许对外连接的可空一侧加 FOR UPDATE；
+            # 不支持 OF 的数据库（MySQL 8.0 之前）对外连接加锁没有这个限制
+            .select_for_update(of=("self",) if connection.features.has_select_for_update_of else ())
+        }
+        changed = []
+        events = []
+        for pk in ids:
+            instance = instances.get(pk)
+            if instance is None:
+                results.append({"id": pk, "result": "not_found"})
+                continue
+            if decision != "reset" and instance.status != ReviewableModel.ReviewStatus.PENDING:
+                results.append({"id": pk, "result": "ineligible", "status": instance.status})
+                continue
+            if claimed_by_other(instance, username, now):
+                results.append({"id": pk, "result": "claimed", "claimed_by": instance.claimed_by})
+                continue
+            previous = instance.ledger_state() if tracks_hours else None
+            events.append(_apply_review(instance, decision=decision, reviewer=reviewer, note=note, timestamp=now))
+            if tracks_hours:
+                ledger.extend(transition_entries(previous, instance.ledger_state()))
+            changed.append(instance)
+            results.append(
+                {"id": pk, "result": "ok", "status": instance.status, "review_stage": instance.review_stage}
+            )
+        if changed:
+            view.get_queryset().model.objects.bulk_update(changed, REVIEW_UPDATE_FIELDS)
+            ReviewEvent.objects.bulk_create(events)
+            apply_hours_deltas(ledger)
+            invalidate_review_stats()
+    return Response({"updated": len(changed), "results": results})
+
+
+def _export(view: viewsets.GenericViewSet, request: Request, basename: str) -> StreamingHttpResponse:
+    """按列表接口的筛选条件流式导出全部记录（``?file_format=csv|xlsx``）。"""
+    file_format = request.query_params.get("file_format", FORMAT_CSV)
+    if file_format not in EXPORT_FORMATS:
+        raise ValidationError(f"不支持的导出格式: {file_format}")
+    queryset = view.filter_queryset(view.get_queryset())
+    response = StreamingHttpResponse(export_stream(queryset, file_format), content_type=CONTENT_TYPES[file_format])
+    filename = f"{basename}-{timezone.localdate():%Y%m%d}.{file_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _claim_conflict_response(instance: ReviewableModel) -> Response:
+    return Response(
+        {"detail": f"该记录已被 {instance.claimed_by} 领取，请稍后再试。"},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _review_inbox(view: viewsets.GenericViewSet, request: Request) -> Response:
+    """领取当前教师的下一批待审核记录（带租约），返回序列化后的记录。
+
+    ``results`` 为本次新领取的记录；``held`` 为此前已领取、租约尚未到期的记录，不会重复领取。
+    """
+    serializer = InboxClaimSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    payload = serializer.validated_data
+    queryset = view.filter_queryset(view.get_queryset())
+    reviewer = getattr(request.user, "username", "")
+    held = held_review_items(queryset, stage=payload["stage"], reviewer=reviewer)
+    claimed = claim_review_items(queryset, stage=payload["stage"], reviewer=reviewer, limit=payload["limit"])
+    records = {record.pk: record for record in queryset.filter(pk__in=[*held, *claimed])}
+    return Response(
+        {
+            "lease_seconds": settings.PG_PLUS_REVIEW_LEASE_SECONDS,
+            "results": view.get_serializer([records[pk] for pk in claimed if pk in records], many=True).data,
+            "held": view.get_serializer([records[pk] for pk in held if pk in records], many=True).data,
+        }
+    )
+
+
+def _release_claim(view: viewsets.GenericViewSet, request: Request, pk: str | None) -> Response:
+    instance = view.get_object()
+    if not release_claim(view.get_queryset(), instance.pk, getattr(request.user, "username", "")):
+        return Response({"detail": "您未领取该记录。"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ReviewStatsView(APIView):
+    """审核看板统计：各阶段记录数、志愿时长与课题填报率。"""
+
+    permission_classes = [permissions.IsAuthenticated, RolePermission]
+    required_roles: Sequence[str] = ("teacher", "admin")
+
+    def get(self, request: Request) -> Response:
+        return Response(get_review_stats())
+
+
 class TeacherProjectViewSet(viewsets.ModelViewSet):
     serializer_class = TeacherProjectSerializer
     permission_classes = [DemoFriendlyPermission]
 
     def get_queryset(self):
-        queryset = TeacherProject.objects.all().order_by("-created_at")
+        queryset = TeacherProject.objects.annotate(
+            selected_count=Count("selections", filter=Q(selections__status=ProjectSelection.SelectionStatus.ACTIVE))
+        ).order_by("-created_at")
         status_param = self.request.query_params.get("status")
         if status_param:
             queryset = queryset.filter(status=status_param)
         return queryset
 
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        def build() -> list:
+            queryset = self.filter_queryset(self.get_queryset())
+            return list(self.get_serializer(queryset, many=True).data)
+
+        return Response(get_cached_catalog(dict(request.query_params.items()), build))
+
 
 class ProjectSelectionViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSelectionSerializer
@@ -73,6 +273,9 @@ class ProjectSelectionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            # 写操作会改变候补位置，只在只读请求上标注
+            queryset = with_waitlist_positions(queryset)
         student_account = self.request.query_params.get("student_account")
         if student_account:
             queryset = queryset.filter(student_account=student_account)
@@ -81,47 +284,98 @@ class ProjectSelectionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(project_id=project_id)
         return queryset
 
-    def perform_create(self, serializer):
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         project = serializer.validated_data["project"]
-        student_account = serializer.validated_data.get("student_account")
+        if not project.rush_mode:
+            self.perform_create(serializer)
+            headers = self.get_success_headers(serializer.data)
+            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        # 抢报模式：只写入排队票据并立即返回，客户端凭票据轮询结果
+        data = serializer.validated_data
+        try:
+            ticket = enqueue_enrollment(
+                project,
+                student_name=data["student_name"],
+                student_account=data["student_account"],
+                student_id=data.get("student_id", ""),
+                notes=data.get("notes", ""),
+            )
+        except EnrollmentError as exc:
+            raise ValidationError(exc.message) from exc
+        return Response(EnrollmentTicketSerializer(ticket).data, status=status.HTTP_202_ACCEPTED)
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        student_account = data.get("student_account")
         if not student_account:
             raise ValidationError("学生账号不能为空。")
-        if project.status != TeacherProject.ProjectStatus.ACTIVE:
-            raise ValidationError("该项目暂未开放报名，请选择其他项目。")
-        if project.selected_count >= project.slots:
-            raise ValidationError("该项目名额已满，请选择其他项目。")
-        existing = ProjectSelection.objects.filter(
-            project=project,
-            student_account=student_account,
-            status=ProjectSelection.SelectionStatus.ACTIVE,
-        ).exists()
-        if existing:
-            raise ValidationError("您已报名该项目，请勿重复提交。")
         try:
-            with transaction.atomic():
-                serializer.save(status=ProjectSelection.SelectionStatus.ACTIVE)
-        except IntegrityError as exc:
-            raise ValidationError("报名冲突，请稍后再试。") from exc
+            serializer.instance = enroll(
+                data["project"],
+                student_name=data["student_name"],
+                student_account=student_account,
+                student_id=data.get("student_id", ""),
+                notes=data.get("notes", ""),
+            )
+        except EnrollmentError as exc:
+            raise ValidationError(exc.message) from exc
 
     def destroy(self, request: Request, *args, **kwargs) -> Response:
         instance = self.get_object()
-        instance.status = ProjectSelection.SelectionStatus.CANCELLED
-        instance.save(update_fields=["status", "updated_at"])
+        cancel_selection(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=["post"])
+    def cancel(self, request: Request, pk: str | None = None) -> Response:
+        instance = self.get_object()
+        if not cancel_selection(instance):
+            return Response({"detail": "该报名已取消。"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(instance).data)
+
+    @action(detail=False, methods=["post"])
+    def promote(self, request: Request) -> Response:
+        """把项目的空余名额按候补号依次分给候补学生。"""
+        project = TeacherProject.objects.filter(pk=request.data.get("project")).first()
+        if project is None:
+            raise ValidationError({"project": "项目不存在。"})
+        with transaction.atomic():
+            lock_project(project.pk)
+            promoted = promote_waitlist(project.pk)
+        return Response({"project_id": project.pk, "promoted": promoted})
+
+
+class EnrollmentTicketViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = EnrollmentTicketSerializer
+    permission_classes = [DemoFriendlyPermission]
+    queryset = EnrollmentTicket.objects.select_related("selection")
+
+    def get_queryset(self) -> QuerySet[EnrollmentTicket]:
+        queryset = with_waitlist_positions(with_queue_positions(super().get_queryset()), path="selection__")
+        student_account = self.request.query_params.get("student_account")
+        if student_account:
+            queryset = queryset.filter(student_account=student_account)
+        project_id = self.request.query_params.get("project")
+        if project_id:
+            queryset = queryset.filter(project_id=project_id)
+        return queryset
+
 
 class VolunteerRecordViewSet(viewsets.ModelViewSet):
     serializer_class = VolunteerRecordSerializer
     permission_classes = [permissions.IsAuthenticated, RolePermission]
-    queryset = VolunteerRecord.objects.select_related("project").all()
+    queryset = VolunteerRecord.objects.select_related("project").prefetch_related("review_events")
     required_roles: Sequence[str] = ("teacher", "admin")
+    cursor_ordering = ("-created_at", "-id")
+    page_size = 50
 
     def get_permissions(self):
         self.required_roles = self._required_roles_for_action()
         return [permission() for permission in self.permission_classes]
 
     def _required_roles_for_action(self) -> Sequence[str]:
-        teacher_only = {"update", "partial_update", "destroy", "review"}
+        teacher_only = {"update", "partial_update", "destroy", "review", "bulk_review", "inbox", "release"}
         student_submit = {"create"}
         admin_only = {"override"}
         read_only = {"list", "retrieve"}
@@ -139,9 +393,7 @@ class VolunteerRecordViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         user = getattr(self.request, "user", None)
         if user and getattr(user, "role", "") == "student":
-            username = getattr(user, "username", "")
-            student_id = getattr(user, "student_id", "")
-            queryset = queryset.filter(Q(student_account=username) | Q(student_id=student_id))
+            queryset = queryset.filter(student_user=user)
         student_account = self.request.query_params.get("student_account")
         if student_account:
             queryset = queryset.filter(student_account=student_account)
@@ -156,7 +408,6 @@ class VolunteerRecordViewSet(viewsets.ModelViewSet):
             submitted_via=submitted_via,
             status=VolunteerRecord.ReviewStatus.PENDING,
             review_stage=VolunteerRecord.ReviewStage.STAGE1,
-            review_trail=[],
         )
 
     def update(self, request: Request, *args, **kwargs):
@@ -181,8 +432,14 @@ class VolunteerRecordViewSet(viewsets.ModelViewSet):
         instance.refresh_from_db()
         instance.review_stage = VolunteerRecord.ReviewStage.STAGE1
         instance.status = VolunteerRecord.ReviewStatus.PENDING
-        instance.review_trail = []
-        instance.save(update_fields=["review_stage", "status", "review_trail", "updated_at"])
+        with transaction.atomic():
+            instance.save(update_fields=["review_stage", "status", "updated_at"])
+            # 学生修改后审核重新开始，此前的轨迹不再展示
+            instance.review_event(
+                decision=ReviewEvent.Decision.RESUBMIT,
+                reviewer=getattr(request.user, "username", ""),
+            ).save()
+        instance._prefetched_objects_cache = {}
         response.data = VolunteerRecordSerializer(instance, context=self.get_serializer_context()).data
         return response
 
@@ -204,37 +461,39 @@ class VolunteerRecordViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         payload = serializer.validated_data
         instance = self.get_object()
-        decision = payload["decision"]
-        reviewer = payload.get("reviewer") or "系统"
-        note = payload.get("note") or ""
-        if decision == "reject":
-            instance.status = VolunteerRecord.ReviewStatus.REJECTED
-            instance.review_notes = note
-        elif decision == "reset":
-            instance.review_stage = VolunteerRecord.ReviewStage.STAGE1
-            instance.status = VolunteerRecord.ReviewStatus.PENDING
-            instance.review_notes = note
-            instance.review_trail = []
-        else:
-            next_stage = _next_stage(instance.review_stage)
-            instance.review_stage = next_stage
-            if next_stage == VolunteerRecord.ReviewStage.COMPLETED:
-                instance.status = VolunteerRecord.ReviewStatus.APPROVED
-            instance.review_notes = note
-        logs = list(instance.review_trail or [])
-        logs.append(
-            {
-                "stage": instance.review_stage,
-                "reviewer": reviewer,
-                "note": note,
-                "timestamp": timezone.now().isoformat(),
-            }
+        if claimed_by_other(instance, getattr(request.user, "username", "")):
+            return _claim_conflict_response(instance)
+        event = _apply_review(
+            instance,
+            decision=payload["decision"],
+            reviewer=payload.get("reviewer") or "系统",
+            note=payload.get("note") or "",
+            timestamp=timezone.now(),
         )
-        instance.review_trail = logs
-        instance.save(update_fields=["review_stage", "status", "review_notes", "review_trail", "updated_at"])
+        with transaction.atomic():
+            instance.save(update_fields=REVIEW_UPDATE_FIELDS)
+            event.save()
+        # 预取的审核事件已过期
+        instance._prefetched_objects_cache = {}
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="bulk-review")
+    def bulk_review(self, request: Request) -> Response:
+        return _bulk_review(self, request)
+
+    @action(detail=False, methods=["post"])
+    def inbox(self, request: Request) -> Response:
+        return _review_inbox(self, request)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request: Request) -> StreamingHttpResponse:
+        return _export(self, request, "volunteer-records")
+
+    @action(detail=True, methods=["post"])
+    def release(self, request: Request, pk: str | None = None) -> Response:
+        return _release_claim(self, request, pk)
+
     @action(detail=True, methods=["post"])
     def override(self, request: Request, pk: str | None = None) -> Response:
         serializer = OverrideDecisionSerializer(data=request.data)
@@ -246,44 +505,67 @@ class VolunteerRecordViewSet(viewsets.ModelViewSet):
                 {"detail": "待审核任务需由教师处理，管理员不可直接审核。"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        action = payload["action"]
-        note = payload.get("note") or ""
-        reviewer = getattr(request.user, "username", "admin")
-        logs = list(instance.review_trail or [])
-        if action == "reopen":
-            instance.review_stage = VolunteerRecord.ReviewStage.STAGE1
-            instance.status = VolunteerRecord.ReviewStatus.PENDING
-            instance.review_notes = note
-            logs = []
-        else:
-            instance.status = VolunteerRecord.ReviewStatus.CANCELLED
-            instance.review_notes = note
-        logs.append(
-            {
-                "stage": instance.review_stage,
-                "reviewer": reviewer,
-                "note": f"管理员复核：{note}" if note else "管理员复核",
-                "timestamp": timezone.now().isoformat(),
-            }
+        event = _apply_override(
+            instance,
+            action=payload["action"],
+            reviewer=getattr(request.user, "username", "admin"),
+            note=payload.get("note") or "",
+            timestamp=timezone.now(),
         )
-        instance.review_trail = logs
-        instance.save(update_fields=["review_stage", "status", "review_notes", "review_trail", "updated_at"])
+        with transaction.atomic():
+            instance.save(update_fields=REVIEW_UPDATE_FIELDS)
+            event.save()
+        # 预取的审核事件已过期
+        instance._prefetched_objects_cache = {}
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
+class VolunteerHoursSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """学生志愿时长台账；教师可按已通过时长阈值筛选，学生只能看到自己的台账。"""
+
+    serializer_class = VolunteerHoursSummarySerializer
+    permission_classes = [permissions.IsAuthenticated, RolePermission]
+    queryset = VolunteerHoursSummary.objects.select_related("student_user")
+    required_roles: Sequence[str] = ("student", "teacher", "admin")
+    # 按学生当前的用户名查找
+    lookup_field = "student_user__username"
+    lookup_url_kwarg = "student_account"
+    cursor_ordering = ("approved_hours", "id")
+    page_size = 100
+
+    def get_queryset(self) -> QuerySet[VolunteerHoursSummary]:
+        queryset = super().get_queryset()
+        user = self.request.user
+        if getattr(user, "role", "") == "student":
+            return queryset.filter(student_user=user)
+        params = self.request.query_params
+        try:
+            below = params.get("approved_below")
+            if below is not None:
+                queryset = queryset.filter(approved_hours__lt=Decimal(below))
+            at_least = params.get("approved_at_least")
+            if at_least is not None:
+                queryset = queryset.filter(approved_hours__gte=Decimal(at_least))
+        except InvalidOperation as exc:
+            raise ValidationError("时长阈值必须是数字。") from exc
+        return queryset
+
+
 class StudentReviewTicketViewSet(viewsets.ModelViewSet):
     serializer_class = StudentReviewTicketSerializer
     permission_classes = [permissions.IsAuthenticated, RolePermission]
-    queryset = StudentReviewTicket.objects.all()
+    queryset = StudentReviewTicket.objects.prefetch_related("review_events")
     required_roles: Sequence[str] = ("teacher", "admin")
+    cursor_ordering = ("-created_at", "-id")
+    page_size = 50
 
     def get_permissions(self):
         self.required_roles = self._required_roles_for_action()
         return [permission() for permission in self.permission_classes]
 
     def _required_roles_for_action(self) -> Sequence[str]:
-        teacher_only = {"create", "update", "partial_update", "destroy", "review"}
+        teacher_only = {"create", "update", "partial_update", "destroy", "review", "bulk_review", "inbox", "release"}
         admin_only = {"override"}
         if self.action in admin_only:
             return ("admin",)
@@ -297,37 +579,39 @@ class StudentReviewTicketViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         payload = serializer.validated_data
         instance = self.get_object()
-        decision = payload["decision"]
-        reviewer = payload.get("reviewer") or "系统"
-        note = payload.get("note") or ""
-        if decision == "reject":
-            instance.status = StudentReviewTicket.ReviewStatus.REJECTED
-            instance.review_notes = note
-        elif decision == "reset":
-            instance.review_stage = StudentReviewTicket.ReviewStage.STAGE1
-            instance.status = StudentReviewTicket.ReviewStatus.PENDING
-            instance.review_notes = note
-            instance.review_trail = []
-        else:
-            next_stage = _next_stage(instance.review_stage)
-            instance.review_stage = next_stage
-            if next_stage == StudentReviewTicket.ReviewStage.COMPLETED:
-                instance.status = StudentReviewTicket.ReviewStatus.APPROVED
-            instance.review_notes = note
-        logs = list(instance.review_trail or [])
-        logs.append(
-            {
-                "stage": instance.review_stage,
-                "reviewer": reviewer,
-                "note": note,
-                "timestamp": timezone.now().isoformat(),
-            }
+        if claimed_by_other(instance, getattr(request.user, "username", "")):
+            return _claim_conflict_response(instance)
+        event = _apply_review(
+            instance,
+            decision=payload["decision"],
+            reviewer=payload.get("reviewer") or "系统",
+            note=payload.get("note") or "",
+            timestamp=timezone.now(),
         )
-        instance.review_trail = logs
-        instance.save(update_fields=["review_stage", "status", "review_notes", "review_trail", "updated_at"])
+        with transaction.atomic():
+            instance.save(update_fields=REVIEW_UPDATE_FIELDS)
+            event.save()
+        # 预取的审核事件已过期
+        instance._prefetched_objects_cache = {}
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="bulk-review")
+    def bulk_review(self, request: Request) -> Response:
+        return _bulk_review(self, request)
+
+    @action(detail=False, methods=["post"])
+    def inbox(self, request: Request) -> Response:
+        return _review_inbox(self, request)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request: Request) -> StreamingHttpResponse:
+        return _export(self, request, "student-reviews")
+
+    @action(detail=True, methods=["post"])
+    def release(self, request: Request, pk: str | None = None) -> Response:
+        return _release_claim(self, request, pk)
+
     @action(detail=True, methods=["post"])
     def override(self, request: Request, pk: str | None = None) -> Response:
         serializer = OverrideDecisionSerializer(data=request.data)
@@ -339,27 +623,17 @@ class StudentReviewTicketViewSet(viewsets.ModelViewSet):
                 {"detail": "待审核任务需由教师处理，管理员不可直接审核。"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        action = payload["action"]
-        note = payload.get("note") or ""
-        reviewer = getattr(request.user, "username", "admin")
-        logs = list(instance.review_trail or [])
-        if action == "reopen":
-            instance.review_stage = StudentReviewTicket.ReviewStage.STAGE1
-            instance.status = StudentReviewTicket.ReviewStatus.PENDING
-            instance.review_notes = note
-            logs = []
-        else:
-            instance.status = StudentReviewTicket.ReviewStatus.CANCELLED
-            instance.review_notes = note
-        logs.append(
-            {
-                "stage": instance.review_stage,
-                "reviewer": reviewer,
-                "note": f"管理员复核：{note}" if note else "管理员复核",
-                "timestamp": timezone.now().isoformat(),
-            }
+        event = _apply_override(
+            instance,
+            action=payload["action"],
+            reviewer=getattr(request.user, "username", "admin"),
+            note=payload.get("note") or "",
+            timestamp=timezone.now(),
         )
-        instance.review_trail = logs
-        instance.save(update_fields=["review_stage", "status", "review_notes", "review_trail", "updated_at"])
+        with transaction.atomic():
+            instance.save(update_fields=REVIEW_UPDATE_FIELDS)
+            event.save()
+        # 预取的审核事件已过期
+        instance._prefetched_objects_cache = {}
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
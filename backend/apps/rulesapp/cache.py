@@ -0,0 +1,125 @@
+"""分数配置（ScoreLimit + ScoreCategoryRule）的版本化进程内缓存。
+
+每个进程持有一份带版本号的只读快照；版本号由 ``core.versioned_cache`` 维护。
+配置写入提交后递增版本号，其他进程在下一次复核时发现版本变化并重新加载。
+Django cache 不可用时退化为按复核间隔直接从数据库重新加载。
+
+事务内修改了配置的线程在该事务结束前绕过快照直接读库，保证读到自己的写入，
+也避免把可能被回滚的数据写进快照。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+
+from core.versioned_cache import CacheVersion, run_after_commit
+
+CONFIG_VERSION_KEY = "rulesapp:score-config:version"
+CONFIG_VERSION = CacheVersion(CONFIG_VERSION_KEY, "Score config")
+
+
+@dataclass(frozen=True)
+class CategoryRule:
+    name: str
+    cap: float
+    ratio: int
+    order: int
+
+
+@dataclass(frozen=True)
+class ScoreConfig:
+    version: int | None
+    a_max: float
+    b_max: float
+    c_max: float
+    category_rules: tuple[CategoryRule, ...]
+
+    @property
+    def limits(self) -> tuple[float, float, float]:
+        return self.a_max, self.b_max, self.c_max
+
+
+class _TxnState(threading.local):
+    def __init__(self) -> None:
+        # 本线程修改配置时所在的最外层 Atomic；事务未结束前绕过快照
+        self.bypass_owner: object | None = None
+
+
+_lock = threading.Lock()
+_snapshot: ScoreConfig | None = None
+_checked_at = 0.0
+_txn = _TxnState()
+
+
+def _load(version: int | None) -> ScoreConfig:
+    from .models import ScoreCategoryRule, ScoreLimit
+
+    limit = ScoreLimit.objects.order_by("id").values_list("a_max", "b_max", "c_max").first()
+    if limit is None:
+        # 单例尚未创建时沿用模型字段默认值
+        default = ScoreLimit()
+        limit = (default.a_max, default.b_max, default.c_max)
+    a_max, b_max, c_max = limit
+    rules = tuple(
+        CategoryRule(name=name, cap=float(cap), ratio=int(ratio), order=int(order))
+        for name, cap, ratio, order in ScoreCategoryRule.objects.order_by("order", "id").values_list(
+            "name", "cap", "ratio", "order"
+        )
+    )
+    return ScoreConfig(version=version, a_max=float(a_max), b_max=float(b_max), c_max=float(c_max), category_rules=rules)
+
+
+def _bypassing() -> bool:
+    owner = _txn.bypass_owner
+    if owner is None:
+        return False
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and connection.atomic_blocks and connection.atomic_blocks[0] is owner:
+        return True
+    # 所在事务已结束（提交或回滚）
+    _txn.bypass_owner = None
+    return False
+
+
+def get_score_config() -> ScoreConfig:
+    """返回当前分数配置；快照有效时不产生任何数据库查询。"""
+    global _snapshot, _checked_at
+
+    if _bypassing():
+        return _load(version=None)
+
+    now = time.monotonic()
+    snapshot = _snapshot
+    recheck = settings.PG_PLUS_SCORE_CONFIG_RECHECK_SECONDS
+    if snapshot is not None and now - _checked_at < recheck:
+        return snapshot
+
+    version = CONFIG_VERSION.get()
+    if snapshot is not None and version is not None and snapshot.version == version:
+        _checked_at = now
+        return snapshot
+
+    with _lock:
+        fresh = _load(version)
+        _snapshot = fresh
+        _checked_at = now
+    return fresh
+
+
+def _bump_version() -> None:
+    global _snapshot
+
+    _snapshot = None
+    CONFIG_VERSION.bump()
+
+
+def invalidate_score_config() -> None:
+    """配置发生写入时调用：事务提交后通知所有进程重新加载。"""
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and connection.atomic_blocks:
+        _txn.bypass_owner = connection.atomic_blocks[0]
+    run_after_commit(_bump_version)
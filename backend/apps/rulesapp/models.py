@@ -7,8 +7,12 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from .cache import invalidate_score_config
+
 if TYPE_CHECKING:
 	from apps.scoringapp.models import Student
 
@@ -107,3 +111,12 @@ class ScoreCategoryRule(models.Model):
 
 	def __str__(self) -> str:  # pragma: no cover - trivial
 		return f"{self.name}({self.ratio}%)"
+
+
+@receiver(post_save, sender=ScoreLimit)
+@receiver(post_delete, sender=ScoreLimit)
+@receiver(post_save, sender=ScoreCategoryRule)
+@receiver(post_delete, sender=ScoreCategoryRule)
+def invalidate_cached_score_config(sender: type[models.Model], **kwargs: object) -> None:
+	"""分数配置变化后使各进程的配置快照失效。"""
+	invalidate_score_config()
@@ -6,6 +6,7 @@ from pathlib import Path
 import pytest
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.uploadedfile import SimpleUploadedFile
+from pytest_django import DjangoAssertNumQueries, DjangoCaptureOnCommitCallbacks
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -127,3 +128,33 @@ def test_reject_clears_material(
     review = ProofReview.objects.get(object_id=expertise.pk)
     assert review.status == ProofReview.STATUS_REJECTED
     assert review.reason == "资料不完整"
+
+
+@pytest.mark.django_db
+def test_score_limits_are_served_from_snapshot(django_assert_num_queries: DjangoAssertNumQueries) -> None:
+    from apps.scoringapp.models import get_score_limits
+
+    get_score_limits()
+    with django_assert_num_queries(0):
+        assert get_score_limits() == (80, 15, 5)
+
+
+@pytest.mark.django_db
+def test_score_limit_put_invalidates_snapshot(
+    api_client: APIClient, admin_user: Student, django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    from django.core.cache import cache
+
+    from apps.rulesapp.cache import CONFIG_VERSION_KEY, get_score_config
+
+    before = get_score_config()
+    api_client.force_authenticate(admin_user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.put("/api/v1/rules/score-limits/", {"b_max": 9}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        # read-your-writes inside the still-open transaction
+        assert get_score_config().b_max == 9
+
+    assert get_score_config().b_max == 9
+    assert cache.get(CONFIG_VERSION_KEY) > before.version
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Any, cast
 
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
@@ -13,7 +14,9 @@ from rest_framework.serializers import BaseSerializer
 from rest_framework.views import APIView
 
 from apps.authapp.permissions import RolePermission
+from apps.scoringapp.tasks import enqueue_rescore
 
+from .cache import invalidate_score_config
 from .models import Policy, ProofReview, ScoreCategoryRule, ScoreLimit
 from .serializers import PolicySerializer, ProofReviewSerializer, ScoreCategoryRuleSerializer, ScoreLimitSerializer
 
@@ -35,10 +38,19 @@ class ScoreLimitView(APIView):
         obj = ScoreLimit.objects.first()
         if not obj:
             obj = ScoreLimit()
+        previous = (obj.a_max, obj.b_max, obj.c_max)
         serializer = ScoreLimitSerializer(obj, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+        with transaction.atomic():
+            # post_save 信号会在提交后使配置快照失效
+            limit = serializer.save()
+            job = None
+            if (limit.a_max, limit.b_max, limit.c_max) != previous:
+                # 上限变化后已有总分失效，提交后在后台全量重算
+                job = enqueue_rescore(reason="分数上限变更")
+        data = dict(serializer.data)
+        data["rescore_job"] = str(job.pk) if job else None
+        return Response(data)
 
 
 class ScoreCategoryRuleView(APIView):
@@ -90,9 +102,12 @@ class ScoreCategoryRuleView(APIView):
         if cleaned and total_ratio != 100:
             return Response({"detail": "所有加分比例之和必须为 100%"}, status=status.HTTP_400_BAD_REQUEST)
 
-        ScoreCategoryRule.objects.all().delete()
-        if cleaned:
-            ScoreCategoryRule.objects.bulk_create([ScoreCategoryRule(**item) for item in cleaned])
+        with transaction.atomic():
+            ScoreCategoryRule.objects.all().delete()
+            if cleaned:
+                ScoreCategoryRule.objects.bulk_create([ScoreCategoryRule(**item) for item in cleaned])
+            # bulk_create 不触发 post_save，显式通知配置快照失效
+            invalidate_score_config()
         rules = ScoreCategoryRule.objects.order_by("order", "id")
         serializer = ScoreCategoryRuleSerializer(rules, many=True)
         return Response(serializer.data)
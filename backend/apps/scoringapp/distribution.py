@@ -0,0 +1,258 @@
+"""分数分布统计：直方图、均值、中位数、分位数与学生百分位。
+
+统计范围（scope）为全体学生或某个届别分组，指标为总分与 A/B/C 三类得分（B/C 按当前上限截断）。
+每个指标只需一条按分桶 GROUP BY 的聚合查询：各桶的人数、分数和、最小/最大值，
+由此得到精确的人数、均值与极值；中位数与分位数在直方图上按桶内线性插值估算。
+
+结果以带版本号的 key 缓存：版本由排名引擎每次重排后递增的总分版本号与分数配置版本号组成。
+排名引擎每次重排都登记一次刷新（``schedule_refresh``），事务提交、版本号递增之后，
+在新版本下预先算好全体与受影响分组的分布并写入缓存，读取方只做一次缓存查找。
+同一事务中的多次重排合并为一次刷新；其余使版本号变化的写入（如删除学生、修改分数配置），
+以及未登记刷新的分组，仍在新版本下第一次读取时重新计算。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any
+
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Floor, Least
+
+from core.versioned_cache import get_or_build, run_after_commit
+
+from .ranking import COHORT_FIELDS, Cohort
+
+DISTRIBUTION_KEY_PREFIX = "scoringapp:distribution"
+# 每个指标的直方图分桶数
+BUCKET_COUNT = 50
+# 过期版本的缓存自然淘汰
+DISTRIBUTION_CACHE_TIMEOUT = 24 * 60 * 60
+
+METRIC_TOTAL = "total"
+METRIC_SUBJECT = "subject"
+METRIC_ACADEMIC = "academic"
+METRIC_COMPREHENSIVE = "comprehensive"
+METRICS = (METRIC_TOTAL, METRIC_SUBJECT, METRIC_ACADEMIC, METRIC_COMPREHENSIVE)
+
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+def _metric_bounds(limits: tuple[float, float, float]) -> dict[str, float]:
+    a_max, b_max, c_max = limits
+    return {
+        METRIC_TOTAL: 100.0,
+        METRIC_SUBJECT: float(a_max),
+        METRIC_ACADEMIC: float(b_max),
+        METRIC_COMPREHENSIVE: float(c_max),
+    }
+
+
+def _metric_expression(metric: str, limits: tuple[float, float, float]) -> Any:
+    _, b_max, c_max = limits
+    if metric == METRIC_TOTAL:
+        return F("total_score")
+    if metric == METRIC_SUBJECT:
+        return Coalesce(F("subject_score__calculated_score"), Value(0.0), output_field=models.FloatField())
+    if metric == METRIC_ACADEMIC:
+        return Least(F("academic_raw_total"), Value(float(b_max)), output_field=models.FloatField())
+    return Least(F("comprehensive_raw_total"), Value(float(c_max)), output_field=models.FloatField())
+
+
+def _interpolate(histogram: list[dict[str, Any]], count: int, fraction: float) -> float | None:
+    """在直方图上估算给定累计比例处的分数。"""
+    if not count:
+        return None
+    target = fraction * count
+    seen = 0
+    for bucket in histogram:
+        if bucket["count"] and seen + bucket["count"] >= target:
+            within = (target - seen) / bucket["count"]
+            return float(bucket["lower"] + within * (bucket["upper"] - bucket["lower"]))
+        seen += bucket["count"]
+    return histogram[-1]["upper"] if histogram else None
+
+
+def _metric_stats(queryset: Any, metric: str, limits: tuple[float, float, float]) -> dict[str, Any]:
+    upper = _metric_bounds(limits)[metric]
+    width = upper / BUCKET_COUNT if upper > 0 else 1.0
+    value = _metric_expression(metric, limits)
+    bucket_expr = Least(Floor(value / width), Value(BUCKET_COUNT - 1), output_field=models.IntegerField())
+    rows = (
+        queryset.annotate(metric_value=value, bucket=bucket_expr)
+        .order_by()
+        .values("bucket")
+        .annotate(n=Count("id"), total=Sum("metric_value"), low=Min("metric_value"), high=Max("metric_value"))
+    )
+    counts = [0] * BUCKET_COUNT
+    count = 0
+    value_sum = 0.0
+    minimum: float | None = None
+    maximum: float | None = None
+    for row in rows:
+        index = min(max(int(row["bucket"] or 0), 0), BUCKET_COUNT - 1)
+        counts[index] += row["n"]
+        count += row["n"]
+        value_sum += row["total"] or 0.0
+        minimum = row["low"] if minimum is None else min(minimum, row["low"])
+        maximum = row["high"] if maximum is None else max(maximum, row["high"])
+
+    histogram = [
+        {"lower": round(index * width, 6), "upper": round((index + 1) * width, 6), "count": counts[index]}
+        for index in range(BUCKET_COUNT)
+    ]
+    return {
+        "count": count,
+        "mean": value_sum / count if count else None,
+        "min": minimum,
+        "max": maximum,
+        "median": _interpolate(histogram, count, 0.5),
+        "quantiles": {f"p{q}": _interpolate(histogram, count, q / 100) for q in QUANTILES},
+        "histogram": histogram,
+    }
+
+
+def _scope_key(cohort: Cohort | None) -> str:
+    if cohort is None:
+        return "all"
+    return f"cohort:{cohort.college}|{cohort.major}|{cohort.admission_year}"
+
+
+def _cache_key(cohort: Cohort | None) -> str | None:
+    from apps.rulesapp.cache import get_score_config
+
+    from .simulation import totals_version
+
+    version = totals_version()
+    config_version = get_score_config().version
+    if version is None or config_version is None:
+        return None
+    # scope 中可能含任意字符，哈希后作为 key 的一部分以满足缓存后端的 key 约束
+    scope = hashlib.sha1(_scope_key(cohort).encode()).hexdigest()
+    return f"{DISTRIBUTION_KEY_PREFIX}:{version}:{config_version}:{scope}"
+
+
+def compute_distribution(cohort: Cohort | None = None) -> dict[str, Any]:
+    """直接从数据库计算一个范围内所有指标的分布（每个指标一条聚合查询）。"""
+    from .models import Student, get_score_limits
+
+    limits = get_score_limits()
+    queryset = Student.objects.all()
+    if cohort is not None:
+        queryset = queryset.filter(**cohort._asdict())
+    metrics = {metric: _metric_stats(queryset, metric, limits) for metric in METRICS}
+    return {
+        "scope": None if cohort is None else cohort._asdict(),
+        "population": metrics[METRIC_TOTAL]["count"],
+        "metrics": metrics,
+    }
+
+
+def get_distribution(cohort: Cohort | None = None) -> dict[str, Any]:
+    """返回分布统计；同一版本内直接命中缓存。"""
+    return get_or_build(
+        _cache_key(cohort), lambda: compute_distribution(cohort), DISTRIBUTION_CACHE_TIMEOUT, "Distribution"
+    )
+
+
+class _RefreshState(threading.local):
+    def __init__(self) -> None:
+        self.cohorts: set[Cohort] = set()
+        self.all_cohorts = False
+        # 登记刷新时的最外层 Atomic；外层事务回滚后遗留的登记据此丢弃
+        self.owner: object | None = None
+        self.sequence = 0
+
+
+_refresh = _RefreshState()
+
+
+def _flush_refresh(sequence: int) -> None:
+    # 只有最后登记的回调执行刷新：它排在同一事务中所有版本号递增之后
+    if sequence != _refresh.sequence:
+        return
+    cohorts, _refresh.cohorts = _refresh.cohorts, set()
+    all_cohorts, _refresh.all_cohorts = _refresh.all_cohorts, False
+    _refresh.owner = None
+    if all_cohorts:
+        from .models import Student
+
+        cohorts.update(Cohort(*values) for values in Student.objects.values_list(*COHORT_FIELDS).distinct())
+    # 版本号是全局的，任何一次递增都会让全体范围的缓存失效，因此总是刷新全体
+    get_distribution()
+    for cohort in cohorts:
+        get_distribution(cohort)
+
+
+def schedule_refresh(cohort: Cohort | None = None, *, all_cohorts: bool = False) -> None:
+    """排名引擎重排时调用：事务提交后在新版本下预先计算全体（及给定分组）的分布。"""
+    connection = transaction.get_connection()
+    owner = connection.atomic_blocks[0] if connection.atomic_blocks else None
+    if owner is not _refresh.owner:
+        _refresh.cohorts = set()
+        _refresh.all_cohorts = False
+        _refresh.owner = owner
+    if cohort is not None:
+        _refresh.cohorts.add(cohort)
+    _refresh.all_cohorts = _refresh.all_cohorts or all_cohorts
+    _refresh.sequence += 1
+    sequence = _refresh.sequence
+    run_after_commit(lambda: _flush_refresh(sequence))
+
+
+def _share_below(stats: dict[str, Any], value: float) -> float:
+    """分数低于 value 的学生占比（0-1），桶内按线性插值估算。"""
+    count: int = stats["count"]
+    if not count:
+        return 0.0
+    below = 0.0
+    for bucket in stats["histogram"]:
+        if value >= bucket["upper"]:
+            below += bucket["count"]
+            continue
+        if value > bucket["lower"]:
+            below += bucket["count"] * (value - bucket["lower"]) / (bucket["upper"] - bucket["lower"])
+        break
+    return min(below / count, 1.0)
+
+
+def student_percentiles(student: Any) -> dict[str, Any]:
+    """学生在全体与所在届别中各指标的百分位。
+
+    总分的「前 X%」由名次精确给出；A/B/C 三类得分按直方图估算。
+    """
+    from .models import SubjectScore, get_score_limits
+
+    limits = get_score_limits()
+    _, b_max, c_max = limits
+    subject = SubjectScore.objects.filter(student_id=student.pk).values_list("calculated_score", flat=True).first()
+    values = {
+        METRIC_TOTAL: student.total_score,
+        METRIC_SUBJECT: subject or 0.0,
+        METRIC_ACADEMIC: min(student.academic_raw_total, b_max),
+        METRIC_COMPREHENSIVE: min(student.comprehensive_raw_total, c_max),
+    }
+    scopes = {
+        "all": (None, student.ranking),
+        "cohort": (student.cohort, student.cohort_ranking),
+    }
+    result: dict[str, Any] = {}
+    for name, (cohort, rank) in scopes.items():
+        distribution = get_distribution(cohort)
+        population = distribution["population"]
+        metrics: dict[str, Any] = {}
+        for metric in METRICS:
+            stats = distribution["metrics"][metric]
+            share_below = _share_below(stats, values[metric])
+            if metric == METRIC_TOTAL and population and rank:
+                top_percent = rank / population * 100
+            else:
+                top_percent = (1 - share_below) * 100
+            metrics[metric] = {
+                "value": values[metric],
+                "percentile": round(share_below * 100, 2),
+                "top_percent": round(top_percent, 2),
+            }
+        result[name] = {"population": population, "metrics": metrics}
+    return result
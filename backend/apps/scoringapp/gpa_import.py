@@ -0,0 +1,190 @@
+"""从教务导出的绩点表批量导入学科成绩。
+
+表格逐行流式读取，按批次以一次查询解析学号、一次查询读取已有成绩，再以
+bulk_create / bulk_update 写入；calculated_score 在写入前按当前 a_max 批量算出。
+整个导入在一个 ``bulk_score_writes()`` 块中执行，结束时只重算一次总分与排名。
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from django.utils import timezone
+
+from .models import Student, SubjectScore, get_score_limits
+from .recalculation import bulk_score_writes, mark_dirty
+from .sheets import SheetFormatError, iter_sheet_rows
+
+# 每批写入的行数
+IMPORT_BATCH_SIZE = 500
+# 报告中保留的错误明细条数，超出部分只计数
+MAX_REPORTED_ERRORS = 1000
+
+HEADER_ALIASES = {
+    "student_id": ("student_id", "学号"),
+    "gpa": ("gpa", "绩点"),
+}
+
+GPA_MIN = 0.0
+GPA_MAX = 4.0
+
+
+class GpaImportError(SheetFormatError):
+    """表格整体无法导入（格式或表头错误）。"""
+
+
+@dataclass
+class GpaImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, row: int, student_id: str, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "student_id": student_id, "error": message})
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class _PendingRow:
+    row: int
+    student_id: str
+    gpa: float
+
+
+def _normalize_student_id(value: str) -> str:
+    # 表格软件可能把纯数字学号存成浮点数（如 20230001.0）
+    if value.endswith(".0") and value[:-2].isdigit():
+        return value[:-2]
+    return value
+
+
+def _header_columns(values: list[str]) -> dict[str, int]:
+    normalized = [value.strip().lower() for value in values]
+    columns: dict[str, int] = {}
+    for key, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[key] = normalized.index(alias)
+                break
+        else:
+            raise GpaImportError(f"表头缺少列: {' / '.join(aliases)}")
+    return columns
+
+
+def _apply_batch(batch: list[_PendingRow], a_max: float, report: GpaImportReport) -> None:
+    student_pks = dict(
+        Student.objects.filter(student_id__in=[item.student_id for item in batch]).values_list("student_id", "pk")
+    )
+    existing = {
+        score.student_id: score
+        for score in SubjectScore.objects.filter(student_id__in=student_pks.values()).only(
+            "id", "student_id", "gpa", "a_value", "calculated_score"
+        )
+    }
+    now = timezone.now()
+    to_create: list[SubjectScore] = []
+    to_update: list[SubjectScore] = []
+    for item in batch:
+        pk = student_pks.get(item.student_id)
+        if pk is None:
+            report.add_error(item.row, item.student_id, "学号不存在")
+            continue
+        calculated = min(item.gpa / 4 * a_max, a_max)
+        score = existing.get(pk)
+        if score is None:
+            to_create.append(SubjectScore(student_id=pk, gpa=item.gpa, a_value=a_max, calculated_score=calculated))
+        elif (score.gpa, score.a_value, score.calculated_score) == (item.gpa, a_max, calculated):
+            report.unchanged += 1
+            continue
+        else:
+            score.gpa = item.gpa
+            score.a_value = a_max
+            score.calculated_score = calculated
+            score.updated_at = now
+            to_update.append(score)
+        mark_dirty(pk)
+
+    if to_create:
+        SubjectScore.objects.bulk_create(to_create, batch_size=IMPORT_BATCH_SIZE)
+    if to_update:
+        SubjectScore.objects.bulk_update(
+            to_update, ["gpa", "a_value", "calculated_score", "updated_at"], batch_size=IMPORT_BATCH_SIZE
+        )
+    report.created += len(to_create)
+    report.updated += len(to_update)
+
+
+def import_gpa_rows(
+    rows: Iterable[tuple[int, list[str]]],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> GpaImportReport:
+    """导入 ``(行号, 单元格)`` 序列，第一个非空行为表头；返回逐行错误报告。
+
+    行级错误（学号不存在、绩点非法、学号重复）只记入报告，其余行照常导入；
+    表头缺失或文件损坏时抛出 ``SheetFormatError`` 并整体回滚。
+    """
+    a_max = get_score_limits()[0]
+    report = GpaImportReport()
+    columns: dict[str, int] | None = None
+    seen: set[str] = set()
+    batch: list[_PendingRow] = []
+
+    with bulk_score_writes():
+        for row_number, values in rows:
+            if not any(values):
+                continue
+            if columns is None:
+                columns = _header_columns(values)
+                continue
+
+            report.rows += 1
+            student_id = _normalize_student_id(
+                values[columns["student_id"]] if columns["student_id"] < len(values) else ""
+            )
+            raw_gpa = values[columns["gpa"]] if columns["gpa"] < len(values) else ""
+            if not student_id:
+                report.add_error(row_number, student_id, "学号为空")
+                continue
+            try:
+                gpa = float(raw_gpa)
+            except ValueError:
+                report.add_error(row_number, student_id, f"绩点不是数字: {raw_gpa!r}")
+                continue
+            if not GPA_MIN <= gpa <= GPA_MAX:
+                report.add_error(row_number, student_id, "绩点必须在0到4之间")
+                continue
+            if student_id in seen:
+                report.add_error(row_number, student_id, "学号在表格中重复出现，已忽略")
+                continue
+            seen.add(student_id)
+
+            batch.append(_PendingRow(row=row_number, student_id=student_id, gpa=gpa))
+            if len(batch) >= batch_size:
+                _apply_batch(batch, a_max, report)
+                batch = []
+
+        if columns is None:
+            raise GpaImportError("表格为空")
+        if batch:
+            _apply_batch(batch, a_max, report)
+    return report
+
+
+def import_gpa_file(fileobj: IO[bytes], filename: str = "", batch_size: int = IMPORT_BATCH_SIZE) -> GpaImportReport:
+    """从 CSV/XLSX 文件导入绩点。"""
+    return import_gpa_rows(iter_sheet_rows(fileobj, filename), batch_size=batch_size)
@@ -0,0 +1,157 @@
+"""排名历史快照。
+
+每次快照只记录自上一次快照以来名次（全局或届别内）或总分发生变化的学生：上一次记录的值
+保存在 Student 的 snapshot_* 列上，变化的学生由一条带列比较条件的查询找出。变化记录按学生 id
+分段（``RankingSnapshotBlock.BLOCK_SIZE`` 个 id 一段）打包成定长数组，每段一行。
+
+查询某个学生的时间线只需读取其所在分段的各次快照（每次快照至多一行），按 id 偏移二分查找；
+快照之间未出现的点表示沿用上一次记录的值。
+"""
+from __future__ import annotations
+
+import bisect
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import RankingSnapshot, RankingSnapshotBlock, Student
+
+# 读取变化学生时每批的行数
+SNAPSHOT_CHUNK_SIZE = 2000
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+@dataclass(frozen=True)
+class TimelinePoint:
+    taken_at: datetime
+    ranking: int
+    cohort_ranking: int
+    total_score: float
+
+
+def _pack(typecode: str, values: list[int] | list[float]) -> bytes:
+    packed = array(typecode, values)
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(typecode: str, payload: bytes | memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(bytes(payload))
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode_block(
+    snapshot: RankingSnapshot,
+    block: int,
+    rows: list[tuple[int, int, int, float]],
+) -> RankingSnapshotBlock:
+    base = block * RankingSnapshotBlock.BLOCK_SIZE
+    return RankingSnapshotBlock(
+        snapshot=snapshot,
+        block=block,
+        offsets=_pack("H", [pk - base for pk, _, _, _ in rows]),
+        ranks=_pack("I", [ranking for _, ranking, _, _ in rows]),
+        cohort_ranks=_pack("I", [cohort_ranking for _, _, cohort_ranking, _ in rows]),
+        totals=_pack("d", [total for _, _, _, total in rows]),
+    )
+
+
+def _changed_since_last_snapshot() -> Q:
+    return (
+        Q(snapshot_total_score__isnull=True)
+        | Q(snapshot_ranking__isnull=True)
+        | Q(snapshot_cohort_ranking__isnull=True)
+        | ~Q(ranking=F("snapshot_ranking"))
+        | ~Q(cohort_ranking=F("snapshot_cohort_ranking"))
+        | ~Q(total_score=F("snapshot_total_score"))
+    )
+
+
+def _iter_changed() -> Iterator[list[tuple[int, int, int, float]]]:
+    """按主键分块读取自上次快照以来变化的学生 (pk, ranking, cohort_ranking, total_score)。"""
+    last_pk = 0
+    while True:
+        rows = list(
+            Student.objects.filter(_changed_since_last_snapshot(), pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "ranking", "cohort_ranking", "total_score")[:SNAPSHOT_CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield rows
+
+
+def take_ranking_snapshot() -> RankingSnapshot:
+    """记录一次排名快照，只保存变化的学生；没有变化时也会留下一条空快照作为时间点。"""
+    block_size = RankingSnapshotBlock.BLOCK_SIZE
+    with transaction.atomic():
+        snapshot = RankingSnapshot.objects.create(student_count=Student.objects.count())
+        changed = 0
+        pending: list[tuple[int, int, int, float]] = []
+        for rows in _iter_changed():
+            changed += len(rows)
+            # 分段可能跨越读取批次：只写出已完整的分段，最后一个留到下一批
+            pending.extend(rows)
+            complete_upto = (pending[-1][0] // block_size) * block_size
+            ready = [row for row in pending if row[0] < complete_upto]
+            pending = [row for row in pending if row[0] >= complete_upto]
+            _write_blocks(snapshot, ready)
+            Student.objects.bulk_update(
+                [
+                    Student(pk=pk, snapshot_ranking=ranking, snapshot_cohort_ranking=cohort_ranking, snapshot_total_score=total)
+                    for pk, ranking, cohort_ranking, total in rows
+                ],
+                ["snapshot_ranking", "snapshot_cohort_ranking", "snapshot_total_score"],
+                batch_size=SNAPSHOT_CHUNK_SIZE,
+            )
+        _write_blocks(snapshot, pending)
+        snapshot.changed_count = changed
+        snapshot.save(update_fields=["changed_count"])
+    return snapshot
+
+
+def _write_blocks(snapshot: RankingSnapshot, rows: list[tuple[int, int, int, float]]) -> None:
+    if not rows:
+        return
+    size = RankingSnapshotBlock.BLOCK_SIZE
+    RankingSnapshotBlock.objects.bulk_create(
+        [_encode_block(snapshot, block, list(group)) for block, group in groupby(rows, key=lambda row: row[0] // size)]
+    )
+
+
+def rank_timeline(student_id: int) -> list[TimelinePoint]:
+    """学生的名次与总分时间线（按快照时间升序，只包含发生变化的时间点）。"""
+    block, offset = divmod(student_id, RankingSnapshotBlock.BLOCK_SIZE)
+    blocks = (
+        RankingSnapshotBlock.objects.filter(block=block)
+        .order_by("snapshot_id")
+        .values_list("snapshot__taken_at", "offsets", "ranks", "cohort_ranks", "totals")
+    )
+    points: list[TimelinePoint] = []
+    for taken_at, offsets, ranks, cohort_ranks, totals in blocks:
+        decoded = _unpack("H", offsets)
+        index = bisect.bisect_left(decoded, offset)
+        if index == len(decoded) or decoded[index] != offset:
+            continue
+        points.append(
+            TimelinePoint(
+                taken_at=taken_at,
+                ranking=struct.unpack_from("<I", ranks, index * 4)[0],
+                cohort_ranking=struct.unpack_from("<I", cohort_ranks, index * 4)[0],
+                total_score=struct.unpack_from("<d", totals, index * 8)[0],
+            )
+        )
+    return points
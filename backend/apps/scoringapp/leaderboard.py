@@ -0,0 +1,140 @@
+"""排行榜的键集（keyset）分页。
+
+排序键为 (total_score DESC, id ASC)，与排名引擎的名次语义一致，并由
+``Student`` 上的复合索引支撑；翻页条件只依赖上一页边界行的 (total_score, id)，
+任何一页的代价都与页码无关，不需要 OFFSET 扫描。
+
+按届别筛选时，分组等值条件加上同样的排序键由 ``student_cohort_rank_idx`` 支撑，
+行内的 rank 为组内名次。
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from django.db.models import Q, QuerySet
+
+from .models import Student, get_score_limits
+
+DIRECTION_NEXT = "n"
+DIRECTION_PREVIOUS = "p"
+
+ROW_FIELDS = (
+    "id",
+    "username",
+    "ranking",
+    "cohort_ranking",
+    "total_score",
+    "subject_score__calculated_score",
+    "academic_raw_total",
+    "comprehensive_raw_total",
+)
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析。"""
+
+
+def encode_cursor(total_score: float, pk: int, direction: str) -> str:
+    raw = json.dumps([total_score, pk, direction], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        total_score, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in (DIRECTION_NEXT, DIRECTION_PREVIOUS):
+            raise ValueError(direction)
+        return float(total_score), int(pk), direction
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _after(total_score: float, pk: int) -> Q:
+    """排在 (total_score, pk) 之后的行。"""
+    return Q(total_score__lt=total_score) | Q(total_score=total_score, id__gt=pk)
+
+
+def _before(total_score: float, pk: int) -> Q:
+    """排在 (total_score, pk) 之前的行。"""
+    return Q(total_score__gt=total_score) | Q(total_score=total_score, id__lt=pk)
+
+
+def _serialize(rows: list[dict[str, Any]], rank_field: str) -> list[dict[str, Any]]:
+    _, b_max, c_max = get_score_limits()
+    return [
+        {
+            "rank": row[rank_field],
+            "id": row["id"],
+            "username": row["username"],
+            "total_score": row["total_score"],
+            "subject_score": row["subject_score__calculated_score"] or 0,
+            "academic_total": min(row["academic_raw_total"], b_max),
+            "comprehensive_total": min(row["comprehensive_raw_total"], c_max),
+        }
+        for row in rows
+    ]
+
+
+def _window(queryset: QuerySet[Student], condition: Q, limit: int, *, forward: bool) -> list[dict[str, Any]]:
+    ordering = ("-total_score", "id") if forward else ("total_score", "-id")
+    rows = list(queryset.filter(condition).order_by(*ordering).values(*ROW_FIELDS)[:limit])
+    if not forward:
+        rows.reverse()
+    return rows
+
+
+def _page(rows: list[dict[str, Any]], has_previous: bool, has_next: bool, rank_field: str) -> dict[str, Any]:
+    return {
+        "results": _serialize(rows, rank_field),
+        "previous": encode_cursor(rows[0]["total_score"], rows[0]["id"], DIRECTION_PREVIOUS)
+        if rows and has_previous
+        else None,
+        "next": encode_cursor(rows[-1]["total_score"], rows[-1]["id"], DIRECTION_NEXT)
+        if rows and has_next
+        else None,
+    }
+
+
+def leaderboard_page(
+    queryset: QuerySet[Student],
+    cursor: str | None,
+    page_size: int,
+    rank_field: str = "ranking",
+) -> dict[str, Any]:
+    """从榜首或游标位置取一页；rank_field 指定输出的名次列（全局或组内）。"""
+    if cursor is None:
+        rows = _window(queryset, Q(), page_size + 1, forward=True)
+        return _page(rows[:page_size], has_previous=False, has_next=len(rows) > page_size, rank_field=rank_field)
+
+    total_score, pk, direction = decode_cursor(cursor)
+    if direction == DIRECTION_NEXT:
+        rows = _window(queryset, _after(total_score, pk), page_size + 1, forward=True)
+        return _page(rows[:page_size], has_previous=True, has_next=len(rows) > page_size, rank_field=rank_field)
+    rows = _window(queryset, _before(total_score, pk), page_size + 1, forward=False)
+    return _page(rows[-page_size:], has_previous=len(rows) > page_size, has_next=True, rank_field=rank_field)
+
+
+def leaderboard_around(
+    queryset: QuerySet[Student],
+    student: Student,
+    page_size: int,
+    rank_field: str = "ranking",
+) -> dict[str, Any]:
+    """以 student 为中心取一页：前后各约半页，仅用索引上的范围扫描。"""
+    total_score = student.total_score
+    pk = student.pk
+    above = max((page_size - 1) // 2, 0)
+    below = max(page_size - 1 - above, 0)
+    before = _window(queryset, _before(total_score, pk), above + 1, forward=False)
+    me = list(queryset.filter(pk=pk).values(*ROW_FIELDS))
+    after = _window(queryset, _after(total_score, pk), below + 1, forward=True)
+    rows = before[-above:] if above else []
+    rows += me
+    rows += after[:below]
+    page = _page(rows, has_previous=len(before) > above, has_next=len(after) > below, rank_field=rank_field)
+    page["me"] = _serialize(me, rank_field)[0] if me else None
+    return page
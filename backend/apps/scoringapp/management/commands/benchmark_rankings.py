@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.scoringapp.models import Student
+from apps.scoringapp.ranking import STRATEGY_BULK, STRATEGY_WINDOW, rerank, supports_window_update
+
+BENCH_PREFIX = "bench-rank-"
+
+
+class Command(BaseCommand):
+    help = (
+        "评估排名引擎：统计单次分数变更引起的写入行数、UPDATE 语句数与耗时（数据在事务中回滚）。"
+        "全量重排会改写并锁住所有学生的名次，只能在没有真实学生的评估库上运行。"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 50000],
+            help="参与评估的学生人数，可传多个。",
+        )
+        parser.add_argument(
+            "--changes",
+            type=int,
+            default=20,
+            help="每个规模下模拟的分数变更次数。",
+        )
+        parser.add_argument("--seed", type=int, default=2024, help="随机种子。")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if Student.objects.exclude(username__startswith=BENCH_PREFIX).exists():
+            raise CommandError(
+                "当前数据库中已有学生数据，评估会在长事务中改写并锁住他们的排名。"
+                "请通过 PG_PLUS_DB_NAME（或 PG_PLUS_SQLITE_PATH）指向一个空的评估库，migrate 后再运行。"
+            )
+        strategies = [STRATEGY_BULK]
+        if supports_window_update():
+            strategies.insert(0, STRATEGY_WINDOW)
+        self.stdout.write(
+            f"{'students':>9} {'strategy':>8} {'rows/change':>12} {'updates/change':>15} {'ms/change':>10}"
+        )
+        for size in options["sizes"]:
+            for strategy in strategies:
+                rows, statements, elapsed = self._run(size, strategy, options["changes"], options["seed"])
+                self.stdout.write(f"{size:>9} {strategy:>8} {rows:>12.1f} {statements:>15.1f} {elapsed:>10.2f}")
+
+    def _run(self, size: int, strategy: str, changes: int, seed: int) -> tuple[float, float, float]:
+        rng = random.Random(seed)
+        total_rows = 0
+        total_statements = 0
+        total_elapsed = 0.0
+        with transaction.atomic():
+            Student.objects.bulk_create(
+                [
+                    Student(
+                        username=f"{BENCH_PREFIX}{index}",
+                        student_id=f"{BENCH_PREFIX}{index}",
+                        password="!",
+                        total_score=round(rng.uniform(40, 100), 2),
+                    )
+                    for index in range(size)
+                ],
+                batch_size=2000,
+            )
+            rerank(strategy=strategy)
+            pks = list(Student.objects.filter(username__startswith=BENCH_PREFIX).values_list("pk", flat=True))
+            for _ in range(changes):
+                pk = rng.choice(pks)
+                old = Student.objects.filter(pk=pk).values_list("total_score", flat=True).get()
+                new = round(min(100.0, max(0.0, old + rng.uniform(-5, 5))), 2)
+                Student.objects.filter(pk=pk).update(total_score=new)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    total_rows += rerank(old, new, strategy=strategy)
+                    total_elapsed += time.perf_counter() - started
+                total_statements += sum(1 for query in ctx.captured_queries if query["sql"].lstrip().upper().startswith("UPDATE"))
+            transaction.set_rollback(True)
+        return total_rows / changes, total_statements / changes, total_elapsed * 1000 / changes
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.scoringapp.gpa_import import IMPORT_BATCH_SIZE, import_gpa_file
+from apps.scoringapp.sheets import SheetFormatError
+
+
+class Command(BaseCommand):
+    help = "从 CSV/XLSX 绩点表批量导入学科成绩（需要「学号/student_id」与「绩点/gpa」两列），导入后统一重算排名。"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="绩点表文件路径（.csv 或 .xlsx）。")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="每批写入的行数。")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options["path"]
+        try:
+            with open(path, "rb") as fileobj:
+                report = import_gpa_file(fileobj, path, batch_size=options["batch_size"])
+        except OSError as exc:
+            raise CommandError(f"无法读取文件: {exc}") from exc
+        except SheetFormatError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for error in report.errors:
+            self.stderr.write(f"第 {error['row']} 行 [{error['student_id']}]: {error['error']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"……另有 {report.error_count - len(report.errors)} 条错误未列出")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"共 {report.rows} 行：新增 {report.created}，更新 {report.updated}，"
+                f"未变化 {report.unchanged}，错误 {report.error_count}。"
+            )
+        )
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.scoringapp.recalculation import rebuild_raw_totals, rescore_all_students
+
+
+class Command(BaseCommand):
+    help = "从成绩明细重建 Student 的分类原始总分，并据此重算总分与排名。"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with transaction.atomic():
+            rebuilt = rebuild_raw_totals()
+            changed = rescore_all_students()
+        self.stdout.write(self.style.SUCCESS(f"已重建 {rebuilt} 名学生的分类原始总分，{changed} 人总分变化。"))
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.scoringapp.history import take_ranking_snapshot
+
+
+class Command(BaseCommand):
+    help = "记录一次排名快照（只保存自上次快照以来名次或总分变化的学生）；未部署 celery beat 时可由 cron 调用。"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        snapshot = take_ranking_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"已记录排名快照：{snapshot.student_count} 名学生中 {snapshot.changed_count} 人有变化。")
+        )
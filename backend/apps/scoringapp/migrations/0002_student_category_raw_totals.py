@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_raw_totals(apps: Any, schema_editor: Any) -> None:
+    Student = apps.get_model("scoringapp", "Student")
+    AcademicExpertise = apps.get_model("scoringapp", "AcademicExpertise")
+    ComprehensivePerformance = apps.get_model("scoringapp", "ComprehensivePerformance")
+
+    def grouped_sum(model: Any) -> Coalesce:
+        per_student = (
+            model.objects.filter(student=OuterRef("pk"))
+            .order_by()
+            .values("student")
+            .annotate(total=Sum("score"))
+            .values("total")[:1]
+        )
+        return Coalesce(Subquery(per_student), Value(0.0), output_field=models.FloatField())
+
+    Student.objects.update(
+        academic_raw_total=grouped_sum(AcademicExpertise),
+        comprehensive_raw_total=grouped_sum(ComprehensivePerformance),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scoringapp", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="academic_raw_total",
+            field=models.FloatField(default=0, editable=False, verbose_name="学术专长原始总分"),
+        ),
+        migrations.AddField(
+            model_name="student",
+            name="comprehensive_raw_total",
+            field=models.FloatField(default=0, editable=False, verbose_name="综合表现原始总分"),
+        ),
+        # 总分与排名同样由汇总逻辑维护，不在表单与序列化器中编辑
+        migrations.AlterField(
+            model_name="student",
+            name="total_score",
+            field=models.FloatField(default=0, editable=False, verbose_name="总分"),
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="ranking",
+            field=models.IntegerField(default=0, editable=False, verbose_name="排名"),
+        ),
+        migrations.RunPython(backfill_raw_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:46
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scoringapp', '0002_student_category_raw_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescoreJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='触发原因')),
+                ('status', models.CharField(choices=[('queued', '排队中'), ('running', '执行中'), ('done', '已完成'), ('failed', '失败')], default='queued', max_length=32, verbose_name='状态')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='学生总数')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='已处理')),
+                ('changed', models.PositiveIntegerField(default=0, verbose_name='总分变化人数')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': '重算任务',
+                'verbose_name_plural': '重算任务',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
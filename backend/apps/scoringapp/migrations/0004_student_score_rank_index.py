@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scoringapp', '0003_rescore_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-total_score', 'id'], name='student_score_rank_idx'),
+        ),
+    ]
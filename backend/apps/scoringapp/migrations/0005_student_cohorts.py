@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+from typing import Any
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_cohort_ranking(apps: Any, schema_editor: Any) -> None:
+    # 现有学生的分组字段均为空，同属一个分组，组内名次即全局名次
+    Student = apps.get_model('scoringapp', 'Student')
+    Student.objects.update(cohort_ranking=F('ranking'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scoringapp', '0004_student_score_rank_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='admission_year',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='入学年份'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='cohort_ranking',
+            field=models.IntegerField(default=0, editable=False, verbose_name='届别内排名'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='college',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='学院'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='major',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='专业'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['college', 'major', 'admission_year', '-total_score', 'id'], name='student_cohort_rank_idx'),
+        ),
+        migrations.RunPython(backfill_cohort_ranking, migrations.RunPython.noop),
+    ]
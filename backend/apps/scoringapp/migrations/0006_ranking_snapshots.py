@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scoringapp', '0005_student_cohorts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='快照时间')),
+                ('student_count', models.PositiveIntegerField(default=0, verbose_name='学生总数')),
+                ('changed_count', models.PositiveIntegerField(default=0, verbose_name='变化人数')),
+            ],
+            options={
+                'verbose_name': '排名快照',
+                'verbose_name_plural': '排名快照',
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='snapshot_cohort_ranking',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='快照届别内排名'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='snapshot_ranking',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='快照排名'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='snapshot_total_score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='快照总分'),
+        ),
+        migrations.CreateModel(
+            name='RankingSnapshotBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block', models.PositiveIntegerField(verbose_name='学生 id 分段')),
+                ('offsets', models.BinaryField(verbose_name='id 偏移')),
+                ('ranks', models.BinaryField(verbose_name='全局名次')),
+                ('cohort_ranks', models.BinaryField(verbose_name='届别内名次')),
+                ('totals', models.BinaryField(verbose_name='总分')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='scoringapp.rankingsnapshot', verbose_name='快照')),
+            ],
+            options={
+                'verbose_name': '排名快照分段',
+                'verbose_name_plural': '排名快照分段',
+                'constraints': [models.UniqueConstraint(fields=('block', 'snapshot'), name='ranking_snapshot_block_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scoringapp', '0006_ranking_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['date_joined', 'id'], name='student_joined_idx'),
+        ),
+    ]
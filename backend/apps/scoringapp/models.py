@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import uuid
 from typing import Any
 
-from django.apps import apps
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from .ranking import COHORT_FIELDS, Cohort
+
 # 默认分数上限（可以在 rulesapp 中由管理员修改）
 DEFAULT_A_SCORE_MAX = 80  # 学科成绩总分上限
 DEFAULT_B_SCORE_MAX = 15  # 学术专长总分上限
@@ -17,19 +20,12 @@ DEFAULT_C_SCORE_MAX = 5  # 综合表现总分上限
 def get_score_limits() -> tuple[float, float, float]:
     """从 rulesapp.ScoreLimit 中获取当前的分数上限；不存在时返回默认值。
 
+    读取的是按版本失效的进程内配置快照，命中时不产生数据库查询。
     返回 (a_max, b_max, c_max)
     """
-    try:
-        ScoreLimit = apps.get_model('rulesapp', 'ScoreLimit')
-    except LookupError:
-        # 当 rulesapp 未就绪或不存在时，回退到默认常量
-        return DEFAULT_A_SCORE_MAX, DEFAULT_B_SCORE_MAX, DEFAULT_C_SCORE_MAX
-
-    if ScoreLimit:
-        obj = ScoreLimit.objects.first()
-        if obj:
-            return float(obj.a_max), float(obj.b_max), float(obj.c_max)
-    return DEFAULT_A_SCORE_MAX, DEFAULT_B_SCORE_MAX, DEFAULT_C_SCORE_MAX
+    from apps.rulesapp.cache import get_score_config
+
+    return get_score_config().limits
 
 def proof_material_path(instance: models.Model, filename: str) -> str:
     """生成证明材料的存储路径"""
@@ -57,6 +53,13 @@ class StudentManager(BaseUserManager["Student"]):
         return self.create_user(username, student_id, password, role='admin', **extra_fields)
 
 class Student(AbstractBaseUser, PermissionsMixin):
+    """学生 / 教师 / 管理员账号（AUTH_USER_MODEL）。
+
+    汇总列（``DERIVED_FIELDS``）只由成绩明细的 F() 增量、排名引擎与快照任务写入。已存在的账号整行保存
+    （未指定 update_fields）时只写其余列；内存中改动过汇总列再整行保存会抛出 ValueError。
+    新建账号、指定 update_fields 的保存与 QuerySet.update() 不受影响，因此 createsuperuser、
+    登录记录 last_login、修改密码与后台编辑账号等流程照常工作。
+    """
     username = models.CharField(max_length=150, unique=True, verbose_name="用户名")
     student_id = models.CharField(max_length=20, unique=True, verbose_name="学号")
     ROLE_STUDENT = 'student'
@@ -68,8 +71,18 @@ class Student(AbstractBaseUser, PermissionsMixin):
         (ROLE_ADMIN, '管理员'),
     ]
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=ROLE_STUDENT, verbose_name='角色')
-    total_score = models.FloatField(default=0, verbose_name="总分")
-    ranking = models.IntegerField(default=0, verbose_name="排名")
+    college = models.CharField(max_length=100, blank=True, default='', verbose_name="学院")
+    major = models.CharField(max_length=100, blank=True, default='', verbose_name="专业")
+    admission_year = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="入学年份")
+    total_score = models.FloatField(default=0, editable=False, verbose_name="总分")
+    ranking = models.IntegerField(default=0, editable=False, verbose_name="排名")
+    cohort_ranking = models.IntegerField(default=0, editable=False, verbose_name="届别内排名")
+    # 上一次排名快照记录的值（从未记录时为空），用于快照只保存变化的学生
+    snapshot_ranking = models.IntegerField(null=True, blank=True, editable=False, verbose_name="快照排名")
+    snapshot_cohort_ranking = models.IntegerField(null=True, blank=True, editable=False, verbose_name="快照届别内排名")
+    snapshot_total_score = models.FloatField(null=True, blank=True, editable=False, verbose_name="快照总分")
+    academic_raw_total = models.FloatField(default=0, editable=False, verbose_name="学术专长原始总分")
+    comprehensive_raw_total = models.FloatField(default=0, editable=False, verbose_name="综合表现原始总分")
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
@@ -83,10 +96,77 @@ class Student(AbstractBaseUser, PermissionsMixin):
         verbose_name = "学生"
         verbose_name_plural = "学生"
         ordering = ['-total_score']  # 按总分降序排列
+        indexes = [
+            # 排行榜键集分页与排名引擎共用的排序键
+            models.Index(fields=['-total_score', 'id'], name='student_score_rank_idx'),
+            # 分组排名与按届别筛选的排行榜共用：分组等值条件 + 组内排序键
+            models.Index(
+                fields=['college', 'major', 'admission_year', '-total_score', 'id'],
+                name='student_cohort_rank_idx',
+            ),
+            # 学生列表游标分页的排序键
+            models.Index(fields=['date_joined', 'id'], name='student_joined_idx'),
+        ]
+
+    # 由成绩明细与排名引擎维护的汇总列；整行保存时不回写，避免用内存中的旧值覆盖并发的增量更新。
+    # 确需写入时须在 update_fields 中显式列出
+    DERIVED_FIELDS = (
+        'total_score', 'ranking', 'cohort_ranking', 'academic_raw_total', 'comprehensive_raw_total',
+        'snapshot_ranking', 'snapshot_cohort_ranking', 'snapshot_total_score',
+    )
+    # 读出时的分组，见 from_db
+    _saved_cohort: Cohort | None
 
     def __str__(self) -> str:
         return f"{self.username} ({self.student_id})"
 
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any) -> "Student":
+        instance = super().from_db(db, field_names, values)
+        # 记住读出时的分组，保存后据此判断是否需要重排新旧两个分组
+        instance._saved_cohort = instance.cohort if not instance.get_deferred_fields() & set(COHORT_FIELDS) else None
+        instance._remember_derived(instance.DERIVED_FIELDS)
+        return instance
+
+    def refresh_from_db(self, using: str | None = None, fields: Any = None, **kwargs: Any) -> None:
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_derived(self.DERIVED_FIELDS if fields is None else set(fields) & set(self.DERIVED_FIELDS))
+
+    def _remember_derived(self, names: Any) -> None:
+        saved = self.__dict__.setdefault('_saved_derived', {})
+        for name in names:
+            if name in self.__dict__:
+                saved[name] = self.__dict__[name]
+
+    @property
+    def cohort(self) -> Cohort:
+        return Cohort(self.college, self.major, self.admission_year)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            saved = self.__dict__.get('_saved_derived', {})
+            changed = sorted(name for name, value in saved.items() if self.__dict__.get(name) != value)
+            if changed:
+                raise ValueError(
+                    f"整行保存不会写入汇总列 {', '.join(changed)}；"
+                    "请在 update_fields 中显式列出，或改用 QuerySet.update()"
+                )
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.fields
+                if field.concrete and not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def academic_total(self) -> float:
+        """学术专长得分（按当前上限截断）"""
+        return min(self.academic_raw_total, get_score_limits()[1])
+
+    @property
+    def comprehensive_total(self) -> float:
+        """综合表现得分（按当前上限截断）"""
+        return min(self.comprehensive_raw_total, get_score_limits()[2])
+
 class SubjectScore(models.Model):
     """学科成绩模型"""
     student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='subject_score', verbose_name="学生")
@@ -106,81 +186,220 @@ class SubjectScore(models.Model):
         self.calculated_score = min((self.gpa / 4) * self.a_value, a_max)
         super().save(*args, **kwargs)
 
-class AcademicExpertise(models.Model):
+class CategoryScoreItem(models.Model):
+    """学术专长/综合表现的公共基类：以 F() 增量维护 Student 上对应的分类原始总分"""
+
+    # 子类指定要维护的 Student 汇总列
+    raw_total_field = ''
+    score = models.FloatField(verbose_name="得分")
+    # 子类声明指向 Student 的 student 外键
+    student_id: int
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any) -> "CategoryScoreItem":
+        instance = super().from_db(db, field_names, values)
+        instance._remember_contribution()
+        return instance
+
+    def _remember_contribution(self) -> None:
+        # 记录已落库的 (学生, 得分)，用于下次保存/删除时计算增量；延迟加载的字段不触发查询
+        values = self.__dict__
+        if 'student_id' in values and 'score' in values:
+            self._saved_contribution: tuple[int, float] | None = (values['student_id'], values['score'])
+        else:
+            self._saved_contribution = None
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        # 确保单条得分不为负
+        self.score = max(0, self.score)
+        previous = getattr(self, '_saved_contribution', None)
+        update_fields = kwargs.get('update_fields')
+        # 明细与汇总列在同一事务中写入；总分重算随之推迟到提交之后
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or {'score', 'student', 'student_id'} & set(update_fields):
+                self.apply_contribution_delta(previous, (self.student_id, self.score))
+        self._remember_contribution()
+
+    @classmethod
+    def apply_contribution_delta(cls, previous: tuple[int, float] | None, current: tuple[int, float] | None) -> None:
+        """把一条记录从 previous 变为 current 的得分变化以原子增量写到 Student 上"""
+        deltas: dict[int, float] = {}
+        if previous is not None:
+            deltas[previous[0]] = deltas.get(previous[0], 0) - previous[1]
+        if current is not None:
+            deltas[current[0]] = deltas.get(current[0], 0) + current[1]
+        for student_id, delta in deltas.items():
+            cls.adjust_raw_total(student_id, delta)
+
+    @classmethod
+    def adjust_raw_total(cls, student_id: int, delta: float) -> None:
+        """以 F() 增量调整学生的分类原始总分（批量写入明细时由调用方汇总后调用一次）"""
+        if delta:
+            Student.objects.filter(pk=student_id).update(
+                **{cls.raw_total_field: F(cls.raw_total_field) + delta}
+            )
+
+class AcademicExpertise(CategoryScoreItem):
     """学术专长模型"""
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='academic_expertises', verbose_name="学生")
     name = models.CharField(max_length=100, verbose_name="专长名称")
-    score = models.FloatField(verbose_name="得分")
     material = models.FileField(upload_to=proof_material_path, null=True, blank=True, verbose_name="证明材料")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    raw_total_field = 'academic_raw_total'
+
     class Meta:
         verbose_name = "学术专长"
         verbose_name_plural = "学术专长"
 
-    def save(self, *args: Any, **kwargs: Any) -> None:
-        # 确保单条得分不为负
-        self.score = max(0, self.score)
-        super().save(*args, **kwargs)
-
-class ComprehensivePerformance(models.Model):
+class ComprehensivePerformance(CategoryScoreItem):
     """综合表现模型"""
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='comprehensive_performances', verbose_name="学生")
     name = models.CharField(max_length=100, verbose_name="表现名称")
-    score = models.FloatField(verbose_name="得分")
     material = models.FileField(upload_to=proof_material_path, null=True, blank=True, verbose_name="证明材料")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    raw_total_field = 'comprehensive_raw_total'
+
     class Meta:
         verbose_name = "综合表现"
         verbose_name_plural = "综合表现"
 
-    def save(self, *args: Any, **kwargs: Any) -> None:
-        # 确保单条得分不为负
-        self.score = max(0, self.score)
-        super().save(*args, **kwargs)
+class RescoreJob(models.Model):
+    """全量重算总分的后台任务（分数上限变化后触发，管理员也可手动触发），供管理端轮询进度"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, '排队中'),
+        (STATUS_RUNNING, '执行中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
 
-@receiver(post_save, sender=SubjectScore)
-@receiver(post_save, sender=AcademicExpertise)
-@receiver(post_save, sender=ComprehensivePerformance)
-def update_student_total_score(sender: type[models.Model], instance: models.Model, **kwargs: Any) -> None:
-    """当成绩相关模型更新时，自动更新学生总分和排名"""
-    # 获取学生实例
-    if not hasattr(instance, 'student'):
-        return
-    student = instance.student
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    reason = models.CharField(max_length=255, blank=True, verbose_name="触发原因")
+    status = models.CharField(max_length=32, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name="状态")
+    total = models.PositiveIntegerField(default=0, verbose_name="学生总数")
+    processed = models.PositiveIntegerField(default=0, verbose_name="已处理")
+    changed = models.PositiveIntegerField(default=0, verbose_name="总分变化人数")
+    error_message = models.TextField(null=True, blank=True, verbose_name="错误信息")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "重算任务"
+        verbose_name_plural = "重算任务"
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f"RescoreJob({self.status}, {self.processed}/{self.total})"
 
-    # 获取当前配置的分数上限
-    _, b_max, c_max = get_score_limits()
+class RankingSnapshot(models.Model):
+    """一次排名快照：只在 RankingSnapshotBlock 中保存自上次快照以来名次或总分变化的学生"""
+    taken_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="快照时间")
+    student_count = models.PositiveIntegerField(default=0, verbose_name="学生总数")
+    changed_count = models.PositiveIntegerField(default=0, verbose_name="变化人数")
 
-    # 计算学术专长总分（不超过 b_max）
-    academic_total = sum(exp.score for exp in student.academic_expertises.all())
-    academic_total = min(academic_total, b_max)
+    class Meta:
+        verbose_name = "排名快照"
+        verbose_name_plural = "排名快照"
+        ordering = ['-taken_at']
+
+    def __str__(self) -> str:
+        return f"RankingSnapshot({self.taken_at:%Y-%m-%d %H:%M}, {self.changed_count}/{self.student_count})"
 
-    # 计算综合表现总分（不超过 c_max）
-    comprehensive_total = sum(cp.score for cp in student.comprehensive_performances.all())
-    comprehensive_total = min(comprehensive_total, c_max)
+class RankingSnapshotBlock(models.Model):
+    """一次快照中一段学生 id（pk // BLOCK_SIZE 相同）的变化记录，以定长数组紧凑编码
 
-    # 获取学科成绩
-    subject_score = student.subject_score.calculated_score if hasattr(student, 'subject_score') else 0
+    各数组按学生 id 升序对齐：offsets 为 id 相对块起点的偏移（uint16），
+    ranks / cohort_ranks 为全局与届别内名次（uint32），totals 为总分（float64），均为小端序。
+    """
+    BLOCK_SIZE = 1024
 
-    # 计算总分（确保不超过100分）
-    total_score = subject_score + academic_total + comprehensive_total
-    total_score = min(total_score, 100)
+    snapshot = models.ForeignKey(RankingSnapshot, on_delete=models.CASCADE, related_name='blocks', verbose_name="快照")
+    block = models.PositiveIntegerField(verbose_name="学生 id 分段")
+    offsets = models.BinaryField(verbose_name="id 偏移")
+    ranks = models.BinaryField(verbose_name="全局名次")
+    cohort_ranks = models.BinaryField(verbose_name="届别内名次")
+    totals = models.BinaryField(verbose_name="总分")
 
-    # 更新学生总分
-    student.total_score = total_score
-    student.save(update_fields=['total_score'])
+    class Meta:
+        verbose_name = "排名快照分段"
+        verbose_name_plural = "排名快照分段"
+        constraints = [
+            # 同时支撑按学生查询时间线：block 等值 + snapshot 顺序
+            models.UniqueConstraint(fields=['block', 'snapshot'], name='ranking_snapshot_block_unique'),
+        ]
+
+@receiver(post_save, sender=Student)
+def place_new_student(sender: type[Student], instance: Student, created: bool, raw: bool = False, **kwargs: Any) -> None:
+    """新注册的学生插入到同分段末尾：只需重排分数不高于其总分的学生；
+    已有学生换到其他分组时，重排其原分组与新分组"""
+    if raw:
+        return
+    from .ranking import rerank, rerank_cohort
+
+    cohort = instance.cohort
+    if created:
+        rerank(high=instance.total_score)
+        rerank_cohort(cohort, high=instance.total_score)
+    else:
+        previous = getattr(instance, '_saved_cohort', None)
+        update_fields = kwargs.get('update_fields')
+        touched = update_fields is None or bool(set(COHORT_FIELDS) & set(update_fields))
+        if touched and previous is not None and previous != cohort:
+            rerank_cohort(previous)
+            rerank_cohort(cohort)
+    instance._saved_cohort = cohort
+
+@receiver(post_delete, sender=Student)
+def forget_deleted_student(sender: type[Student], instance: Student, **kwargs: Any) -> None:
+    """学生被删除后使模拟器的总分排序数组失效"""
+    from .simulation import invalidate_totals
+
+    invalidate_totals()
+
+@receiver(post_delete, sender=AcademicExpertise)
+@receiver(post_delete, sender=ComprehensivePerformance)
+def remove_category_contribution(sender: type[CategoryScoreItem], instance: CategoryScoreItem, **kwargs: Any) -> None:
+    """明细被删除时（含批量删除与级联删除）从分类原始总分中扣除其得分"""
+    previous = getattr(instance, '_saved_contribution', None)
+    if previous is None and instance.student_id is not None:
+        previous = (instance.student_id, instance.score)
+    sender.apply_contribution_delta(previous, None)
 
-    # 重新计算所有学生的排名
-    recalculate_rankings()
+@receiver(post_save, sender=SubjectScore)
+@receiver(post_save, sender=AcademicExpertise)
+@receiver(post_save, sender=ComprehensivePerformance)
+@receiver(post_delete, sender=SubjectScore)
+@receiver(post_delete, sender=AcademicExpertise)
+@receiver(post_delete, sender=ComprehensivePerformance)
+def update_student_total_score(sender: type[models.Model], instance: models.Model, **kwargs: Any) -> None:
+    """当成绩相关模型变化时，登记该学生待重算总分和排名（按事务合并执行）"""
+    from .recalculation import mark_dirty
+
+    student_id = getattr(instance, 'student_id', None)
+    if student_id is None or kwargs.get('raw'):
+        return
+    mark_dirty(student_id)
+
+def recalculate_rankings(score_range: tuple[float, float] | None = None) -> int:
+    """重新计算学生排名，返回被改写的行数。
+
+    传入 score_range 时只重排该分数区间（闭区间）内的全局名次，受影响分组的组内名次由调用方
+    （见 recalculation.recompute_students）按分组重排；不传时全局名次与所有分组一并重算。
+    """
+    from .ranking import rerank, rerank_all_cohorts
 
-def recalculate_rankings() -> None:
-    """重新计算所有学生的排名"""
-    students = Student.objects.order_by('-total_score')
-    for index, student in enumerate(students, start=1):
-        if student.ranking != index:
-            student.ranking = index
-            student.save(update_fields=['ranking'])
+    if score_range is None:
+        return rerank() + rerank_all_cohorts()
+    return rerank(*score_range)
@@ -0,0 +1,258 @@
+"""排名引擎：以集合操作重算 Student.ranking，只写入名次真正变化的行。
+
+排名语义与历史实现保持一致：按 total_score 降序排列后的序号（同分按 id 升序），
+即 ``ROW_NUMBER() OVER (ORDER BY total_score DESC, id ASC)``。
+
+两种执行策略：
+- ``window``：单条 ``UPDATE ... FROM/JOIN (窗口函数子查询)`` 语句，需数据库支持窗口函数
+  与多表 UPDATE（SQLite >= 3.33、MySQL 8、PostgreSQL）；
+- ``bulk``：读取 (id, ranking) 后在 Python 中计算名次，按块 ``bulk_update`` 变化的行。
+
+当调用方知道分数变化区间 [low, high] 时，只需重排该区间内的学生：区间外学生的相对顺序
+不受影响，区间内的名次偏移量即为分数高于 high 的人数。
+
+除全局名次 ``ranking`` 外，还维护按届别分组（学院、专业、入学年份）的组内名次
+``cohort_ranking``，语义相同，即 ``ROW_NUMBER() OVER (PARTITION BY college, major,
+admission_year ORDER BY total_score DESC, id ASC)``。分数变化时只重排受影响的分组。
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from django.db import connection, transaction
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.models import QuerySet
+
+    from .models import Student
+
+STRATEGY_WINDOW = "window"
+STRATEGY_BULK = "bulk"
+
+# bulk_update 每批写入的行数
+RANK_CHUNK_SIZE = 1000
+
+COHORT_FIELDS = ("college", "major", "admission_year")
+
+
+class Cohort(NamedTuple):
+    """排名分组：学院、专业、入学年份"""
+
+    college: str
+    major: str
+    admission_year: int | None
+
+
+def supports_window_update(conn: "BaseDatabaseWrapper" | None = None) -> bool:
+    """当前数据库是否支持「窗口函数 + 多表 UPDATE」的单语句重排。"""
+    conn = conn or connection
+    vendor = conn.vendor
+    if vendor == "sqlite":
+        import sqlite3
+
+        return sqlite3.sqlite_version_info >= (3, 33, 0)
+    if vendor == "mysql":
+        if getattr(conn, "mysql_is_mariadb", False):
+            return False
+        return getattr(conn, "mysql_version", (0,)) >= (8, 0)
+    return vendor == "postgresql"
+
+
+def _range_sql(low: float | None, high: float | None, cohort: Cohort | None = None) -> tuple[str, list[Any]]:
+    clauses: list[str] = []
+    params: list[Any] = []
+    if cohort is not None:
+        for name, value in zip(COHORT_FIELDS, cohort):
+            if value is None:
+                clauses.append(f"{connection.ops.quote_name(name)} IS NULL")
+            else:
+                clauses.append(f"{connection.ops.quote_name(name)} = %s")
+                params.append(value)
+    if low is not None:
+        clauses.append("total_score >= %s")
+        params.append(low)
+    if high is not None:
+        clauses.append("total_score <= %s")
+        params.append(high)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _filtered(low: float | None, high: float | None, cohort: Cohort | None = None) -> QuerySet[Student]:
+    from .models import Student
+
+    queryset = Student.objects.all()
+    if cohort is not None:
+        queryset = queryset.filter(**cohort._asdict())
+    if low is not None:
+        queryset = queryset.filter(total_score__gte=low)
+    if high is not None:
+        queryset = queryset.filter(total_score__lte=high)
+    return queryset
+
+
+def _rank_offset(high: float | None, cohort: Cohort | None = None) -> int:
+    """区间之上（分数严格高于 high）的学生人数。"""
+    if high is None:
+        return 0
+    return _filtered(None, None, cohort).filter(total_score__gt=high).count()
+
+
+def _window_update(
+    column: str,
+    low: float | None,
+    high: float | None,
+    offset: int,
+    *,
+    cohort: Cohort | None = None,
+    partitioned: bool = False,
+) -> int:
+    from .models import Student
+
+    qn = connection.ops.quote_name
+    table = qn(Student._meta.db_table)
+    target = qn(column)
+    where, params = _range_sql(low, high, cohort)
+    partition = f"PARTITION BY {', '.join(qn(name) for name in COHORT_FIELDS)} " if partitioned else ""
+    ranked = (
+        f"SELECT id, ROW_NUMBER() OVER ({partition}ORDER BY total_score DESC, id ASC) + %s AS new_rank "
+        f"FROM {table}{where}"
+    )
+    if connection.vendor == "mysql":
+        sql = (
+            f"UPDATE {table} AS s JOIN ({ranked}) AS ranked ON s.id = ranked.id "
+            f"SET s.{target} = ranked.new_rank WHERE s.{target} <> ranked.new_rank"
+        )
+    else:
+        sql = (
+            f"UPDATE {table} SET {target} = ranked.new_rank FROM ({ranked}) AS ranked "
+            f"WHERE {table}.id = ranked.id AND {table}.{target} <> ranked.new_rank"
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [offset, *params])
+        return max(int(cursor.rowcount), 0)
+
+
+def _write_changed(column: str, changed: list[tuple[int, int]]) -> int:
+    from .models import Student
+
+    if changed:
+        Student.objects.bulk_update(
+            [Student(pk=pk, **{column: position}) for pk, position in changed],
+            [column],
+            batch_size=RANK_CHUNK_SIZE,
+        )
+    return len(changed)
+
+
+def _bulk_update(
+    column: str,
+    low: float | None,
+    high: float | None,
+    offset: int,
+    *,
+    cohort: Cohort | None = None,
+) -> int:
+    queryset = _filtered(low, high, cohort).order_by("-total_score", "id")
+    # 只保留 (id, 新名次)，避免实例化整张表；写入在读取完成后进行
+    changed = [
+        (pk, position)
+        for position, (pk, ranking) in enumerate(
+            queryset.values_list("pk", column).iterator(chunk_size=RANK_CHUNK_SIZE),
+            start=offset + 1,
+        )
+        if ranking != position
+    ]
+    return _write_changed(column, changed)
+
+
+def _bulk_update_partitioned() -> int:
+    from .models import Student
+
+    rows = (
+        Student.objects.order_by(*COHORT_FIELDS, "-total_score", "id")
+        .values_list("pk", "cohort_ranking", *COHORT_FIELDS)
+        .iterator(chunk_size=RANK_CHUNK_SIZE)
+    )
+    changed: list[tuple[int, int]] = []
+    current: tuple[Any, ...] | None = None
+    position = 0
+    for pk, ranking, *key in rows:
+        if tuple(key) != current:
+            current = tuple(key)
+            position = 0
+        position += 1
+        if ranking != position:
+            changed.append((pk, position))
+    return _write_changed("cohort_ranking", changed)
+
+
+def _resolve_strategy(strategy: str | None) -> str:
+    if strategy is None:
+        strategy = STRATEGY_WINDOW if supports_window_update() else STRATEGY_BULK
+    if strategy not in (STRATEGY_WINDOW, STRATEGY_BULK):
+        raise ValueError(f"未知的排名策略: {strategy}")
+    return strategy
+
+
+def rerank(
+    low: float | None = None,
+    high: float | None = None,
+    *,
+    strategy: str | None = None,
+) -> int:
+    """重算全局排名，返回实际被改写的行数。
+
+    ``low``/``high`` 给出发生变化的分数区间（闭区间），省略时重排全表。
+    ``strategy`` 省略时根据数据库能力自动选择。
+    """
+    from .distribution import schedule_refresh
+    from .simulation import invalidate_totals
+
+    if low is not None and high is not None and low > high:
+        low, high = high, low
+    strategy = _resolve_strategy(strategy)
+    with transaction.atomic():
+        offset = _rank_offset(high)
+        # 调用方在总分变化后才会重排；提交后使模拟器的总分排序数组失效，并在新版本下刷新分布统计
+        invalidate_totals()
+        schedule_refresh()
+        if strategy == STRATEGY_WINDOW:
+            return _window_update("ranking", low, high, offset)
+        return _bulk_update("ranking", low, high, offset)
+
+
+def rerank_cohort(
+    cohort: Cohort,
+    low: float | None = None,
+    high: float | None = None,
+    *,
+    strategy: str | None = None,
+) -> int:
+    """只重算一个分组内的组内名次，返回实际被改写的行数；区间语义同 ``rerank``。"""
+    from .distribution import schedule_refresh
+    from .simulation import invalidate_totals
+
+    if low is not None and high is not None and low > high:
+        low, high = high, low
+    strategy = _resolve_strategy(strategy)
+    with transaction.atomic():
+        offset = _rank_offset(high, cohort)
+        # 学生换组时只重排分组，同样需要使依赖名次的缓存失效
+        invalidate_totals()
+        schedule_refresh(cohort)
+        if strategy == STRATEGY_WINDOW:
+            return _window_update("cohort_ranking", low, high, offset, cohort=cohort)
+        return _bulk_update("cohort_ranking", low, high, offset, cohort=cohort)
+
+
+def rerank_all_cohorts(*, strategy: str | None = None) -> int:
+    """以一条分组窗口语句（或分块的等价实现）重算所有分组的组内名次。"""
+    from .distribution import schedule_refresh
+
+    strategy = _resolve_strategy(strategy)
+    with transaction.atomic():
+        schedule_refresh(all_cohorts=True)
+        if strategy == STRATEGY_WINDOW:
+            return _window_update("cohort_ranking", None, None, 0, partitioned=True)
+        return _bulk_update_partitioned()
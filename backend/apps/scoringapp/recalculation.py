@@ -0,0 +1,215 @@
+"""按事务合并的总分重算队列。
+
+成绩相关模型的每次写入只把学生 id 标记为「脏」：
+- 处于事务中时，脏 id 按线程收集，在 ``transaction.on_commit`` 时统一重算一次；
+- 处于 ``bulk_score_writes()`` 块中时，逐行工作被抑制，块结束时统一重算一次；
+- 自动提交模式下立即重算。
+
+重算时基于 Student 上的分类原始总分批量计算这些学生的总分，写回发生变化的行，再只对变化覆盖的分数区间重排一次；
+组内名次只在受影响的分组内按各自的变化区间重排。
+"""
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+# 单条 IN 查询包含的学生 id 数
+RECALC_CHUNK_SIZE = 500
+# 全量重算时每块处理的学生数
+RESCORE_CHUNK_SIZE = 2000
+
+
+class _RecalcState(threading.local):
+    def __init__(self) -> None:
+        self.pending: set[int] = set()
+        # 登记 pending 时的最外层 Atomic；外层事务回滚后遗留的脏 id 据此丢弃
+        self.pending_owner: object | None = None
+        self.bulk_depth = 0
+        self.bulk_ids: set[int] = set()
+
+
+_state = _RecalcState()
+
+
+def _chunks(ids: list[int], size: int = RECALC_CHUNK_SIZE) -> Iterator[list[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def capped_total(
+    subject_score: float | None,
+    academic_raw_total: float,
+    comprehensive_raw_total: float,
+    limits: tuple[float, float, float],
+) -> float:
+    """按上限截断各分类得分并求和，总分不超过 100。"""
+    _, b_max, c_max = limits
+    total = (subject_score or 0) + min(academic_raw_total, b_max) + min(comprehensive_raw_total, c_max)
+    return min(total, 100)
+
+
+def rebuild_raw_totals() -> int:
+    """以一条 UPDATE（每个分类一个按学生分组求和的子查询）重建全部学生的分类原始总分。"""
+    from .models import AcademicExpertise, ComprehensivePerformance, Student
+
+    def grouped_sum(model: type[AcademicExpertise] | type[ComprehensivePerformance]) -> Coalesce:
+        per_student = (
+            model.objects.filter(student=OuterRef("pk"))
+            .order_by()
+            .values("student")
+            .annotate(total=Sum("score"))
+            .values("total")[:1]
+        )
+        return Coalesce(Subquery(per_student), Value(0.0), output_field=models.FloatField())
+
+    return Student.objects.update(
+        academic_raw_total=grouped_sum(AcademicExpertise),
+        comprehensive_raw_total=grouped_sum(ComprehensivePerformance),
+    )
+
+
+def recompute_students(student_ids: Iterable[int]) -> int:
+    """重算给定学生的总分并重排一次，返回总分发生变化的学生数。"""
+    from .models import Student, get_score_limits, recalculate_rankings
+    from .ranking import COHORT_FIELDS, Cohort, rerank_cohort
+
+    ids = sorted(set(student_ids))
+    if not ids:
+        return 0
+    limits = get_score_limits()
+    with transaction.atomic():
+        changed: list[Student] = []
+        low: float | None = None
+        high: float | None = None
+        # 每个受影响分组各自的分数变化区间
+        cohort_ranges: dict[Cohort, tuple[float, float]] = {}
+        for chunk in _chunks(ids):
+            rows = Student.objects.filter(pk__in=chunk).values_list(
+                "pk",
+                "total_score",
+                "subject_score__calculated_score",
+                "academic_raw_total",
+                "comprehensive_raw_total",
+                *COHORT_FIELDS,
+            )
+            for pk, previous, subject, academic, comprehensive, *cohort_values in rows:
+                total = capped_total(subject, academic, comprehensive, limits)
+                if total == previous:
+                    continue
+                changed.append(Student(pk=pk, total_score=total))
+                low = min(previous, total) if low is None else min(low, previous, total)
+                high = max(previous, total) if high is None else max(high, previous, total)
+                cohort = Cohort(*cohort_values)
+                cohort_low, cohort_high = cohort_ranges.get(cohort, (min(previous, total), max(previous, total)))
+                cohort_ranges[cohort] = (min(cohort_low, previous, total), max(cohort_high, previous, total))
+        if changed:
+            Student.objects.bulk_update(changed, ["total_score"], batch_size=RECALC_CHUNK_SIZE)
+            assert low is not None and high is not None
+            recalculate_rankings(score_range=(low, high))
+            for cohort, (cohort_low, cohort_high) in cohort_ranges.items():
+                rerank_cohort(cohort, cohort_low, cohort_high)
+    return len(changed)
+
+
+def rescore_all_students(
+    on_progress: Callable[[int, int], None] | None = None,
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+) -> int:
+    """按当前分数配置重算全部学生的总分，返回总分变化的人数。
+
+    学科成绩先以一条 UPDATE 按新的 a_max 重算；随后按主键分块流式读取学生，
+    每块在内存中一次性算出截断后的总分，用 bulk_update 写回变化的行，最后整体重排一次。
+    ``on_progress(processed, changed)`` 在每块完成后回调。
+    """
+    from .models import Student, SubjectScore, get_score_limits, recalculate_rankings
+
+    limits = get_score_limits()
+    a_max = limits[0]
+    calculated = Least(F("gpa") / 4 * F("a_value"), Value(a_max), output_field=models.FloatField())
+    SubjectScore.objects.exclude(calculated_score=calculated).update(calculated_score=calculated)
+
+    processed = 0
+    changed_total = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Student.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list(
+                "pk",
+                "total_score",
+                "subject_score__calculated_score",
+                "academic_raw_total",
+                "comprehensive_raw_total",
+            )[:chunk_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        totals = [capped_total(subject, academic, comprehensive, limits) for _, _, subject, academic, comprehensive in rows]
+        changed = [
+            Student(pk=row[0], total_score=total)
+            for row, total in zip(rows, totals)
+            if row[1] != total
+        ]
+        if changed:
+            Student.objects.bulk_update(changed, ["total_score"], batch_size=RECALC_CHUNK_SIZE)
+        processed += len(rows)
+        changed_total += len(changed)
+        if on_progress is not None:
+            on_progress(processed, changed_total)
+
+    recalculate_rankings()
+    return changed_total
+
+
+def _flush_pending() -> None:
+    ids, _state.pending = _state.pending, set()
+    _state.pending_owner = None
+    recompute_students(ids)
+
+
+def mark_dirty(student_id: int) -> None:
+    """登记一名需要重算总分的学生。"""
+    if _state.bulk_depth:
+        _state.bulk_ids.add(student_id)
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        recompute_students([student_id])
+        return
+    owner = connection.atomic_blocks[0] if connection.atomic_blocks else None
+    if owner is not _state.pending_owner:
+        _state.pending = set()
+        _state.pending_owner = owner
+    _state.pending.add(student_id)
+    # 每次都注册回调：外层提交时第一个回调处理全部脏 id，其余为空操作；
+    # 这样即使登记所在的保存点被回滚、其回调被丢弃，脏 id 也不会遗漏。
+    transaction.on_commit(_flush_pending)
+
+
+@contextmanager
+def bulk_score_writes() -> Iterator[None]:
+    """在块内抑制逐行的总分/排名重算，块结束时对涉及的学生统一重算一次。
+
+    块本身在一个事务中执行；块内抛出异常时整体回滚且不做重算。
+    """
+    outermost = _state.bulk_depth == 0
+    _state.bulk_depth += 1
+    try:
+        with transaction.atomic():
+            try:
+                yield
+            finally:
+                _state.bulk_depth -= 1
+            if outermost:
+                ids, _state.bulk_ids = _state.bulk_ids, set()
+                recompute_students(ids)
+    finally:
+        if outermost:
+            _state.bulk_ids = set()
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, TypeVar
 
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import AcademicExpertise, ComprehensivePerformance, Student, SubjectScore, get_score_limits
+from .models import (
+    AcademicExpertise,
+    ComprehensivePerformance,
+    RescoreJob,
+    Student,
+    SubjectScore,
+    get_score_limits,
+)
+from .recalculation import bulk_score_writes, mark_dirty
+from .simulation import KIND_ACADEMIC, KIND_COMPREHENSIVE
 
 class AcademicExpertiseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,23 +43,102 @@ class SubjectScoreSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("绩点必须在0到4之间")
         return data
 
+class AcademicExpertiseItemSerializer(AcademicExpertiseSerializer):
+    """嵌套写入用：携带 id 表示更新已有记录，不带 id 表示新增"""
+    id = serializers.IntegerField(required=False)
+
+    class Meta(AcademicExpertiseSerializer.Meta):
+        read_only_fields: list[str] = []
+
+class ComprehensivePerformanceItemSerializer(ComprehensivePerformanceSerializer):
+    """嵌套写入用：携带 id 表示更新已有记录，不带 id 表示新增"""
+    id = serializers.IntegerField(required=False)
+
+    class Meta(ComprehensivePerformanceSerializer.Meta):
+        read_only_fields: list[str] = []
+
+# 学术专长或综合表现明细
+CategoryItemT = TypeVar('CategoryItemT', AcademicExpertise, ComprehensivePerformance)
+
+def sync_category_items(
+    student: Student,
+    model: type[CategoryItemT],
+    related_name: str,
+    items: list[dict[str, Any]],
+) -> None:
+    """按 id 对比学生现有的明细：变化的行 bulk_update，新行 bulk_create，缺失的行一次删除
+
+    批量写入不触发模型的 save/post_save，这里汇总得分增量后一次性调整分类原始总分，
+    并登记学生待重算（调用方应处于 bulk_score_writes 块中）。
+    """
+    existing: dict[int, CategoryItemT] = {obj.pk: obj for obj in getattr(student, related_name).all()}
+    to_create: list[CategoryItemT] = []
+    to_update: list[CategoryItemT] = []
+    update_fields: set[str] = set()
+    kept: set[int] = set()
+    delta = 0.0
+    now = timezone.now()
+    material_field = model._meta.get_field('material')
+
+    for item in items:
+        data = dict(item)
+        pk = data.pop('id', None)
+        if 'score' in data:
+            data['score'] = max(0, data['score'])
+        if pk is None:
+            obj = model(student=student, **data)
+            to_create.append(obj)
+            delta += obj.score
+            continue
+        if pk not in existing:
+            raise serializers.ValidationError({related_name: f"记录 {pk} 不属于该学生"})
+        obj = existing[pk]
+        kept.add(pk)
+        changed = [attr for attr, value in data.items() if getattr(obj, attr) != value]
+        if not changed:
+            continue
+        if 'score' in changed:
+            delta += data['score'] - obj.score
+        for attr in changed:
+            setattr(obj, attr, data[attr])
+        if 'material' in changed:
+            # bulk_update 不经过 FileField.pre_save，需要手动把新上传的文件写入存储
+            material_field.pre_save(obj, False)
+        obj.updated_at = now
+        to_update.append(obj)
+        update_fields.update(changed)
+
+    removed = [pk for pk in existing if pk not in kept]
+    if removed:
+        # 删除走 post_delete 信号，逐条扣减原始总分
+        model.objects.filter(pk__in=removed).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, sorted(update_fields | {'updated_at'}))
+    if to_create:
+        model.objects.bulk_create(to_create)
+    model.adjust_raw_total(student.pk, delta)
+    if removed or to_update or to_create:
+        mark_dirty(student.pk)
+
 class StudentSerializer(serializers.ModelSerializer):
     subject_score = SubjectScoreSerializer()
-    academic_expertises = AcademicExpertiseSerializer(many=True)
-    comprehensive_performances = ComprehensivePerformanceSerializer(many=True)
+    academic_expertises = AcademicExpertiseItemSerializer(many=True)
+    comprehensive_performances = ComprehensivePerformanceItemSerializer(many=True)
     password = serializers.CharField(write_only=True)
     role = serializers.ChoiceField(choices=Student.ROLE_CHOICES, default=Student.ROLE_STUDENT)
+    academic_total = serializers.FloatField(read_only=True)
+    comprehensive_total = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Student
         fields = [
             'id', 'username', 'password', 'student_id', 
-            'role',
-            'total_score', 'ranking', 'subject_score',
+            'role', 'college', 'major', 'admission_year',
+            'total_score', 'ranking', 'cohort_ranking', 'academic_total', 'comprehensive_total', 'subject_score',
             'academic_expertises', 'comprehensive_performances',
             'date_joined'
         ]
-        read_only_fields = ['id', 'total_score', 'ranking', 'date_joined']
+        read_only_fields = ['id', 'total_score', 'ranking', 'cohort_ranking', 'date_joined']
     
     def create(self, validated_data: dict[str, Any]) -> Student:
         # 提取嵌套数据
@@ -59,19 +148,20 @@ class StudentSerializer(serializers.ModelSerializer):
         # 创建学生用户
         # validated_data 可能包含 role
         role = validated_data.pop('role', Student.ROLE_STUDENT)
-        student = Student.objects.create_user(role=role, ** validated_data)
-        
-        # 创建学科成绩
-        SubjectScore.objects.create(student=student, **subject_score_data)
-        
-        # 创建学术专长记录
-        for exp_data in academic_expertises_data:
-            AcademicExpertise.objects.create(student=student, **exp_data)
-        
-        # 创建综合表现记录
-        for cp_data in comprehensive_performances_data:
-            ComprehensivePerformance.objects.create(student=student, **cp_data)
-    
+        # 整个注册过程只在结束时重算一次总分与排名
+        with bulk_score_writes():
+            student = Student.objects.create_user(role=role, ** validated_data)
+
+            # 创建学科成绩
+            SubjectScore.objects.create(student=student, **subject_score_data)
+
+            # 批量创建学术专长与综合表现记录
+            sync_category_items(student, AcademicExpertise, 'academic_expertises', academic_expertises_data)
+            sync_category_items(
+                student, ComprehensivePerformance, 'comprehensive_performances', comprehensive_performances_data
+            )
+
+        student.refresh_from_db(fields=['total_score', 'ranking', 'cohort_ranking'])
         return student
     
     def update(self, instance: Student, validated_data: dict[str, Any]) -> Student:
@@ -79,38 +169,85 @@ class StudentSerializer(serializers.ModelSerializer):
         if 'password' in validated_data:
             password = validated_data.pop('password')
             instance.set_password(password)
-        
-        # 处理学科成绩更新
-        if 'subject_score' in validated_data:
-            subject_score_data = validated_data.pop('subject_score')
-            subject_score = instance.subject_score
-            for attr, value in subject_score_data.items():
-                setattr(subject_score, attr, value)
-            subject_score.save()
-        
-        # 处理学术专长更新
-        if 'academic_expertises' in validated_data:
-            academic_expertises_data = validated_data.pop('academic_expertises')
-            
-            # 删除现有记录
-            instance.academic_expertises.all().delete()
-            # 创建新记录
-            for exp_data in academic_expertises_data:
-                AcademicExpertise.objects.create(student=instance, **exp_data)
-        
-        # 处理综合表现更新
-        if 'comprehensive_performances' in validated_data:
-            comprehensive_performances_data = validated_data.pop('comprehensive_performances')
-            
-            # 删除现有记录
-            instance.comprehensive_performances.all().delete()
-            # 创建新记录
-            for cp_data in comprehensive_performances_data:
-                ComprehensivePerformance.objects.create(student=instance, **cp_data)
-        
-        # 更新学生其他字段
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
+
+        # 所有成绩写入完成后只重算一次总分与排名
+        with bulk_score_writes():
+            # 处理学科成绩更新
+            if 'subject_score' in validated_data:
+                subject_score_data = validated_data.pop('subject_score')
+                subject_score = instance.subject_score
+                for attr, value in subject_score_data.items():
+                    setattr(subject_score, attr, value)
+                subject_score.save()
+
+            # 处理学术专长更新：按 id 对比，只写入变化的记录
+            if 'academic_expertises' in validated_data:
+                academic_expertises_data = validated_data.pop('academic_expertises')
+                sync_category_items(instance, AcademicExpertise, 'academic_expertises', academic_expertises_data)
+
+            # 处理综合表现更新：按 id 对比，只写入变化的记录
+            if 'comprehensive_performances' in validated_data:
+                comprehensive_performances_data = validated_data.pop('comprehensive_performances')
+                sync_category_items(
+                    instance, ComprehensivePerformance, 'comprehensive_performances', comprehensive_performances_data
+                )
+
+            # 更新学生其他字段
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+        instance.refresh_from_db(fields=['total_score', 'ranking', 'cohort_ranking'])
         return instance
+
+class StudentReadSerializer(serializers.ModelSerializer):
+    """列表/详情的只读序列化器：输出与 StudentSerializer 一致，但不做任何写入校验"""
+    subject_score = SubjectScoreSerializer(read_only=True, allow_null=True)
+    academic_expertises = AcademicExpertiseSerializer(many=True, read_only=True)
+    comprehensive_performances = ComprehensivePerformanceSerializer(many=True, read_only=True)
+    academic_total = serializers.FloatField(read_only=True)
+    comprehensive_total = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Student
+        fields = [
+            'id', 'username', 'student_id',
+            'role', 'college', 'major', 'admission_year',
+            'total_score', 'ranking', 'cohort_ranking', 'academic_total', 'comprehensive_total', 'subject_score',
+            'academic_expertises', 'comprehensive_performances',
+            'date_joined'
+        ]
+        read_only_fields = fields
+
+class RescoreJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RescoreJob
+        fields = [
+            'id', 'reason', 'status', 'total', 'processed', 'changed',
+            'error_message', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'id', 'status', 'total', 'processed', 'changed',
+            'error_message', 'created_at', 'started_at', 'finished_at',
+        ]
+
+class SimulationAdditionSerializer(serializers.Serializer):
+    """一条假设新增的加分：所属大类、原始分值与可选的加分类别规则名称（仅校验，不参与计算）"""
+    kind = serializers.ChoiceField(choices=[(KIND_ACADEMIC, '学术专长'), (KIND_COMPREHENSIVE, '综合表现')])
+    score = serializers.FloatField(min_value=0)
+    category = serializers.CharField(required=False, allow_null=True, default=None)
+
+class SimulationSerializer(serializers.Serializer):
+    """排名模拟请求：假设的 GPA 与新增加分；教师/管理员可指定 student"""
+    student = serializers.IntegerField(required=False)
+    gpa = serializers.FloatField(required=False, allow_null=True, default=None, min_value=0, max_value=4)
+    additions = SimulationAdditionSerializer(many=True, required=False, default=list)
+
+    def validate_additions(self, value: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        from apps.rulesapp.cache import get_score_config
+
+        names = {rule.name for rule in get_score_config().category_rules}
+        unknown = sorted({item['category'] for item in value if item.get('category') and item['category'] not in names})
+        if unknown:
+            raise serializers.ValidationError(f"未知的加分类别: {', '.join(unknown)}")
+        return value
@@ -0,0 +1,157 @@
+"""逐行流式读取 CSV / XLSX 表格。
+
+两种格式都按行产出 ``(行号, [单元格文本...])``，调用方无需把整个文件读入内存：
+- CSV 按 UTF-8（兼容带 BOM）逐行解码；
+- XLSX 只依赖标准库：从压缩包中流式解析第一个工作表的 XML，每处理完一行即释放对应节点。
+  共享字符串表（sharedStrings.xml）需要整体载入，其大小与不重复的文本数量相关而不是行数。
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import posixpath
+import zipfile
+from collections.abc import Iterator
+from typing import IO
+from xml.etree.ElementTree import Element, ParseError, iterparse
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class SheetFormatError(ValueError):
+    """文件无法按表格解析。"""
+
+
+def detect_format(filename: str, fileobj: IO[bytes]) -> str:
+    """按扩展名判断格式，扩展名缺失时根据文件头（zip 魔数）判断。"""
+    extension = posixpath.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return FORMAT_CSV
+    if extension in (".xlsx", ".xlsm"):
+        return FORMAT_XLSX
+    if extension:
+        raise SheetFormatError(f"不支持的文件类型: {extension}")
+    head = fileobj.read(4)
+    fileobj.seek(0)
+    return FORMAT_XLSX if head == b"PK\x03\x04" else FORMAT_CSV
+
+
+def iter_csv_rows(fileobj: IO[bytes]) -> Iterator[tuple[int, list[str]]]:
+    reader = csv.reader(codecs.iterdecode(fileobj, "utf-8-sig"))
+    try:
+        for values in reader:
+            yield reader.line_num, [value.strip() for value in values]
+    except UnicodeDecodeError as exc:
+        raise SheetFormatError("CSV 文件需要使用 UTF-8 编码") from exc
+
+
+def _column_index(reference: str) -> int:
+    """单元格引用（如 ``C12``）的列号，从 0 开始。"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - ord("A") + 1)
+    return index - 1
+
+
+def _text(element: Element) -> str:
+    return "".join(node.text or "" for node in element.iter(f"{_MAIN_NS}t"))
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    try:
+        with archive.open("xl/workbook.xml") as workbook:
+            sheet = next(
+                (element for _, element in iterparse(workbook) if element.tag == f"{_MAIN_NS}sheet"),
+                None,
+            )
+        if sheet is None:
+            raise SheetFormatError("工作簿中没有工作表")
+        rel_id = sheet.get(f"{_REL_NS}id")
+        with archive.open("xl/_rels/workbook.xml.rels") as rels:
+            for _, element in iterparse(rels):
+                if element.tag == f"{_PKG_REL_NS}Relationship" and element.get("Id") == rel_id:
+                    target: str = element.get("Target", "")
+                    if target.startswith("/"):
+                        return target.lstrip("/")
+                    return posixpath.normpath(posixpath.join("xl", target))
+    except KeyError:
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    try:
+        source = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings: list[str] = []
+    with source:
+        for _, element in iterparse(source):
+            if element.tag == f"{_MAIN_NS}si":
+                strings.append(_text(element))
+                element.clear()
+    return strings
+
+
+def _cell_value(cell: Element, shared: list[str]) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return _text(cell).strip()
+    value = cell.findtext(f"{_MAIN_NS}v") or ""
+    if kind == "s":
+        try:
+            return shared[int(value)].strip()
+        except (IndexError, ValueError) as exc:
+            raise SheetFormatError("共享字符串引用无效") from exc
+    return value.strip()
+
+
+def iter_xlsx_rows(fileobj: IO[bytes]) -> Iterator[tuple[int, list[str]]]:
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as exc:
+        raise SheetFormatError("不是有效的 XLSX 文件") from exc
+    with archive:
+        try:
+            shared = _shared_strings(archive)
+            sheet = archive.open(_first_sheet_path(archive))
+        except KeyError as exc:
+            raise SheetFormatError("找不到工作表数据") from exc
+        except ParseError as exc:
+            raise SheetFormatError("工作簿 XML 无法解析") from exc
+        with sheet:
+            row_number = 0
+            rows = iterparse(sheet)
+            while True:
+                try:
+                    _, element = next(rows)
+                except StopIteration:
+                    return
+                except ParseError as exc:
+                    raise SheetFormatError("工作表 XML 无法解析") from exc
+                if element.tag != f"{_MAIN_NS}row":
+                    continue
+                row_number = int(element.get("r") or row_number + 1)
+                values: list[str] = []
+                for cell in element.iter(f"{_MAIN_NS}c"):
+                    reference = cell.get("r")
+                    position = _column_index(reference) if reference else len(values)
+                    if position >= len(values):
+                        values.extend([""] * (position + 1 - len(values)))
+                    values[position] = _cell_value(cell, shared)
+                element.clear()
+                yield row_number, values
+
+
+def iter_sheet_rows(fileobj: IO[bytes], filename: str = "") -> Iterator[tuple[int, list[str]]]:
+    """按格式逐行读取表格。"""
+    if detect_format(filename, fileobj) == FORMAT_XLSX:
+        return iter_xlsx_rows(fileobj)
+    return iter_csv_rows(fileobj)
@@ -0,0 +1,154 @@
+"""「假如」排名模拟：在不写库的前提下估算学生调整成绩后的总分与名次。
+
+名次来自进程内缓存的全体学生排序数组（按 ``(-total_score, id)`` 升序，与排名引擎的
+``ROW_NUMBER() OVER (ORDER BY total_score DESC, id ASC)`` 一致），每次模拟只做一次二分查找。
+数组带版本号（见 ``core.versioned_cache``）；排名引擎每次重排提交后递增版本号，
+其他进程在下一次复核时发现版本变化并重建数组。
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+
+from core.versioned_cache import CacheVersion, run_after_commit
+
+from .recalculation import capped_total
+
+if TYPE_CHECKING:
+    from .models import Student
+
+TOTALS_VERSION = CacheVersion("scoringapp:totals:version", "Totals snapshot")
+
+KIND_ACADEMIC = "academic"
+KIND_COMPREHENSIVE = "comprehensive"
+
+
+@dataclass(frozen=True)
+class TotalsSnapshot:
+    version: int | None
+    # (-total_score, id) 升序，即名次顺序
+    keys: list[tuple[float, int]]
+
+    def rank_of(self, total_score: float, student_id: int, current_total: float | None = None) -> int:
+        """学生总分变为 total_score 时的名次；current_total 为其当前总分，用于把自身从数组中排除。"""
+        position = bisect.bisect_left(self.keys, (-total_score, student_id))
+        if current_total is not None:
+            own = (-current_total, student_id)
+            index = bisect.bisect_left(self.keys, own)
+            if index < len(self.keys) and self.keys[index] == own and own < (-total_score, student_id):
+                position -= 1
+        return position + 1
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+@dataclass(frozen=True)
+class Addition:
+    kind: str
+    score: float
+    category: str | None = None
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    subject_score: float
+    academic_total: float
+    comprehensive_total: float
+    projected_total: float
+    projected_rank: int
+    population: int
+
+
+_lock = threading.Lock()
+_snapshot: TotalsSnapshot | None = None
+_checked_at = 0.0
+
+
+def _load(version: int | None) -> TotalsSnapshot:
+    from .models import Student
+
+    rows = Student.objects.order_by("-total_score", "id").values_list("total_score", "id")
+    return TotalsSnapshot(version=version, keys=[(-score, pk) for score, pk in rows.iterator(chunk_size=5000)])
+
+
+def totals_version() -> int | None:
+    """当前总分/名次数据的共享版本号；cache 不可用时为 None。"""
+    return TOTALS_VERSION.get()
+
+
+def get_totals_snapshot() -> TotalsSnapshot:
+    """返回当前的总分排序数组；有效期内不产生任何数据库查询。"""
+    global _snapshot, _checked_at
+
+    now = time.monotonic()
+    snapshot = _snapshot
+    recheck = settings.PG_PLUS_TOTALS_SNAPSHOT_RECHECK_SECONDS
+    if snapshot is not None and now - _checked_at < recheck:
+        return snapshot
+
+    version = TOTALS_VERSION.get()
+    if snapshot is not None and version is not None and snapshot.version == version:
+        _checked_at = now
+        return snapshot
+
+    with _lock:
+        fresh = _load(version)
+        _snapshot = fresh
+        _checked_at = now
+    return fresh
+
+
+def _bump_version() -> None:
+    global _snapshot
+
+    _snapshot = None
+    TOTALS_VERSION.bump()
+
+
+def invalidate_totals() -> None:
+    """总分或名次发生写入时调用：事务提交后通知所有进程重建排序数组。"""
+    run_after_commit(_bump_version)
+
+
+def simulate(student: "Student", gpa: float | None = None, additions: Iterable[Addition] = ()) -> SimulationResult:
+    """估算 student 把 GPA 改为 gpa、并新增 additions 后的总分与名次（不写库）。
+
+    新增加分与已有加分一样按原始分值计入分类原始总分，再由 ``capped_total`` 截断求和，
+    与排名引擎重算总分的口径一致；加分类别规则目前不参与总分计算，additions 的类别不影响结果。
+    """
+    from apps.rulesapp.cache import get_score_config
+
+    from .models import SubjectScore
+
+    config = get_score_config()
+    a_max, b_max, c_max = config.limits
+    if gpa is not None:
+        subject = min(gpa / 4 * a_max, a_max)
+    else:
+        subject = (
+            SubjectScore.objects.filter(student_id=student.pk).values_list("calculated_score", flat=True).first() or 0
+        )
+
+    additions = list(additions)
+    academic_raw = student.academic_raw_total + sum(item.score for item in additions if item.kind == KIND_ACADEMIC)
+    comprehensive_raw = student.comprehensive_raw_total + sum(
+        item.score for item in additions if item.kind == KIND_COMPREHENSIVE
+    )
+    projected = capped_total(subject, academic_raw, comprehensive_raw, config.limits)
+
+    snapshot = get_totals_snapshot()
+    return SimulationResult(
+        subject_score=subject,
+        academic_total=min(academic_raw, b_max),
+        comprehensive_total=min(comprehensive_raw, c_max),
+        projected_total=projected,
+        projected_rank=snapshot.rank_of(projected, student.pk, student.total_score),
+        population=len(snapshot),
+    )
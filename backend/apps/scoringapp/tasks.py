@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from .history import take_ranking_snapshot
+from .models import RescoreJob, Student
+from .recalculation import rescore_all_students
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="scoringapp.run_rescore_job")
+def run_rescore_job(job_id: str) -> None:
+    """Background task that recomputes every student's total under the current score config."""
+
+    try:
+        job = RescoreJob.objects.get(pk=job_id)
+    except RescoreJob.DoesNotExist:
+        logger.warning("Rescore job %s not found", job_id)
+        return
+
+    job.status = RescoreJob.STATUS_RUNNING
+    job.total = Student.objects.count()
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "total", "started_at"])
+
+    def report(processed: int, changed: int) -> None:
+        RescoreJob.objects.filter(pk=job.pk).update(processed=processed, changed=changed)
+
+    try:
+        changed = rescore_all_students(on_progress=report)
+    except Exception as exc:  # pragma: no cover - unexpected runtime failure
+        logger.exception("Rescore job %s failed", job_id)
+        RescoreJob.objects.filter(pk=job.pk).update(
+            status=RescoreJob.STATUS_FAILED,
+            error_message=str(exc),
+            finished_at=timezone.now(),
+        )
+        return
+
+    RescoreJob.objects.filter(pk=job.pk).update(
+        status=RescoreJob.STATUS_DONE,
+        changed=changed,
+        finished_at=timezone.now(),
+    )
+
+
+def _dispatch(job_id: str) -> None:
+    # Try to enqueue Celery task; fallback to in-process execution if broker unavailable.
+    try:
+        run_rescore_job.delay(job_id)
+    except Exception:
+        run_rescore_job(job_id)
+
+
+def enqueue_rescore(reason: str = "") -> RescoreJob:
+    """Create a rescore job and dispatch it once the surrounding transaction commits."""
+
+    job = RescoreJob.objects.create(reason=reason)
+    transaction.on_commit(lambda: _dispatch(str(job.pk)))
+    return job
+
+
+@shared_task(name="scoringapp.take_ranking_snapshot")
+def snapshot_rankings() -> int:
+    """Periodic task (celery beat) that records the ranks and totals changed since the previous snapshot."""
+
+    snapshot = take_ranking_snapshot()
+    logger.info("Ranking snapshot %s recorded %s changed students", snapshot.pk, snapshot.changed_count)
+    return snapshot.changed_count
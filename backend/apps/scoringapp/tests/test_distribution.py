@@ -0,0 +1,116 @@
+"""Tests for the cached score distribution and percentile endpoints."""
+from __future__ import annotations
+
+import pytest
+from pytest_django import DjangoAssertNumQueries, DjangoCaptureOnCommitCallbacks
+from rest_framework.test import APIClient
+
+from apps.scoringapp import simulation
+from apps.scoringapp.models import Student, SubjectScore, recalculate_rankings
+from apps.scoringapp.recalculation import recompute_students
+
+DISTRIBUTION_URL = "/api/v1/scoring/stats/distribution/"
+PERCENTILE_URL = "/api/v1/scoring/stats/percentile/"
+
+
+@pytest.fixture
+def population(db: None) -> list[Student]:
+    specs = [(80, 15, 5, "CS"), (60, 10, 2, "CS"), (40, 4, 1, "CS"), (20, 0, 0, "Math")]
+    Student.objects.bulk_create(
+        [
+            Student(
+                username=f"d{i}",
+                student_id=f"D{i}",
+                password="!",
+                college="Science",
+                major=major,
+                admission_year=2022,
+                total_score=subject + academic + comprehensive,
+                academic_raw_total=academic,
+                comprehensive_raw_total=comprehensive,
+            )
+            for i, (subject, academic, comprehensive, major) in enumerate(specs)
+        ]
+    )
+    students = list(Student.objects.order_by("id"))
+    SubjectScore.objects.bulk_create(
+        [SubjectScore(student=student, gpa=spec[0] / 20, a_value=80, calculated_score=spec[0]) for student, spec in zip(students, specs)]
+    )
+    recalculate_rankings()
+    # 测试事务不会提交，手动推进排名版本，避免命中其他用例留下的缓存
+    simulation._bump_version()
+    return list(Student.objects.order_by("id"))
+
+
+@pytest.mark.django_db
+def test_distribution_is_cached_per_ranking_version(
+    api_client: APIClient, population: list[Student], django_assert_num_queries: DjangoAssertNumQueries
+) -> None:
+    api_client.force_authenticate(population[0])
+
+    payload = api_client.get(DISTRIBUTION_URL).json()
+    total = payload["metrics"]["total"]
+    assert payload["population"] == 4
+    assert total["count"] == 4
+    assert total["mean"] == pytest.approx((100 + 72 + 45 + 20) / 4)
+    assert (total["min"], total["max"]) == (20, 100)
+    assert sum(bucket["count"] for bucket in total["histogram"]) == 4
+    assert 45 <= total["median"] <= 72
+    assert payload["metrics"]["academic"]["max"] == 15
+
+    with django_assert_num_queries(0):
+        assert api_client.get(DISTRIBUTION_URL).json() == payload
+
+    Student.objects.filter(pk=population[3].pk).update(total_score=30)
+    simulation._bump_version()
+    assert api_client.get(DISTRIBUTION_URL).json()["metrics"]["total"]["min"] == 30
+
+
+@pytest.mark.django_db
+def test_distribution_per_cohort(api_client: APIClient, population: list[Student]) -> None:
+    api_client.force_authenticate(population[0])
+
+    payload = api_client.get(DISTRIBUTION_URL, {"college": "Science", "major": "CS", "admission_year": "2022"}).json()
+    assert payload["population"] == 3
+    assert payload["scope"]["major"] == "CS"
+
+    assert api_client.get(DISTRIBUTION_URL, {"major": "CS"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_student_percentiles(api_client: APIClient, population: list[Student], teacher_user: Student) -> None:
+    me = population[1]
+    api_client.force_authenticate(me)
+
+    payload = api_client.get(PERCENTILE_URL).json()
+    # teacher_user 也参与全局排名：5 人中排第 2
+    assert payload["all"]["population"] == 5
+    assert payload["all"]["metrics"]["total"]["top_percent"] == 40
+    assert payload["cohort"]["metrics"]["total"]["top_percent"] == pytest.approx(200 / 3, abs=0.01)
+    assert 0 < payload["cohort"]["metrics"]["academic"]["percentile"] < 100
+
+    assert api_client.get(PERCENTILE_URL, {"student": population[0].pk}).status_code == 403
+    api_client.force_authenticate(teacher_user)
+    assert api_client.get(PERCENTILE_URL, {"student": population[0].pk}).json()["student"] == population[0].pk
+
+
+@pytest.mark.django_db
+def test_rerank_refreshes_distribution_after_commit(
+    api_client: APIClient,
+    population: list[Student],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    api_client.force_authenticate(population[0])
+    cohort_params = {"college": "Science", "major": "CS", "admission_year": "2022"}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        SubjectScore.objects.filter(student=population[2]).update(calculated_score=10)
+        recompute_students([population[2].pk])
+
+    # 重排提交后全体与受影响分组的分布已在新版本下算好，读取不再查询数据库
+    with django_assert_num_queries(0):
+        payload = api_client.get(DISTRIBUTION_URL).json()
+        cohort = api_client.get(DISTRIBUTION_URL, cohort_params).json()
+    assert payload["metrics"]["total"]["mean"] == pytest.approx((100 + 72 + 15 + 20) / 4)
+    assert cohort["metrics"]["total"]["min"] == 15
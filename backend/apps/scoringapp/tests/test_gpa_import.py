@@ -0,0 +1,143 @@
+"""Bulk GPA import from CSV/XLSX sheets."""
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.scoringapp import recalculation
+from apps.scoringapp.gpa_import import import_gpa_file
+from apps.scoringapp.models import Student, SubjectScore
+from apps.scoringapp.recalculation import bulk_score_writes
+from apps.scoringapp.sheets import iter_xlsx_rows
+
+
+def _students(count: int) -> list[Student]:
+    return [
+        Student.objects.create_user(username=f"gpa{index}", student_id=f"G{index:03d}", password="pw")
+        for index in range(count)
+    ]
+
+
+def _xlsx(rows: list[list[str | float]]) -> bytes:
+    """Minimal workbook: strings go to the shared string table, numbers stay inline."""
+    shared: list[str] = []
+    sheet_rows = []
+    for row_index, row in enumerate(rows, start=1):
+        cells = []
+        for col_index, value in enumerate(row):
+            ref = f"{chr(ord('A') + col_index)}{row_index}"
+            if isinstance(value, str):
+                shared.append(value)
+                cells.append(f'<c r="{ref}" t="s"><v>{len(shared) - 1}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        sheet_rows.append(f'<row r="{row_index}">{"".join(cells)}</row>')
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    rel = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{main}" xmlns:r="{rel}"><sheets><sheet name="GPA" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/data.xml"/></Relationships>',
+        )
+        archive.writestr(
+            "xl/sharedStrings.xml",
+            f'<sst xmlns="{main}">' + "".join(f"<si><t>{text}</t></si>" for text in shared) + "</sst>",
+        )
+        archive.writestr("xl/worksheets/data.xml", f'<worksheet xmlns="{main}"><sheetData>{"".join(sheet_rows)}</sheetData></worksheet>')
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db
+def test_csv_import_upserts_and_reranks_once() -> None:
+    first, second, third = _students(3)
+    with bulk_score_writes():
+        SubjectScore.objects.create(student=first, gpa=1, a_value=80)
+        SubjectScore.objects.create(student=third, gpa=2, a_value=80)
+    sheet = "学号,绩点\nG000,4\nG001,3\nG002,2\nG404,3\nG001,1\n,3\nG002,five\nG002,4.5\n".encode()
+
+    with mock.patch.object(recalculation, "recompute_students", wraps=recalculation.recompute_students) as recompute:
+        report = import_gpa_file(io.BytesIO(sheet), "gpa.csv", batch_size=2)
+
+    recompute.assert_called_once()
+    assert (report.rows, report.created, report.updated, report.unchanged) == (8, 1, 1, 1)
+    assert [(error["row"], error["student_id"]) for error in report.errors] == [
+        (5, "G404"),
+        (6, "G001"),
+        (7, ""),
+        (8, "G002"),
+        (9, "G002"),
+    ]
+    assert SubjectScore.objects.get(student=first).calculated_score == 80
+    assert SubjectScore.objects.get(student=second).calculated_score == 60
+    ranked = list(Student.objects.order_by("ranking").values_list("student_id", "total_score"))
+    assert ranked == [("G000", 80), ("G001", 60), ("G002", 40)]
+
+
+@pytest.mark.django_db
+def test_missing_header_rolls_back() -> None:
+    _students(1)
+    with pytest.raises(ValueError):
+        import_gpa_file(io.BytesIO(b"name,score\nG000,3\n"), "gpa.csv")
+    assert not SubjectScore.objects.exists()
+
+
+def test_xlsx_reader_streams_rows() -> None:
+    payload = _xlsx([["student_id", "gpa"], ["G000", 3.5], [20230001.0, 2]])
+    rows = list(iter_xlsx_rows(io.BytesIO(payload)))
+    assert rows == [(1, ["student_id", "gpa"]), (2, ["G000", "3.5"]), (3, ["20230001.0", "2"])]
+
+
+@pytest.mark.django_db
+def test_import_endpoint_accepts_xlsx(api_client: APIClient, admin_user: Student, student_user: Student) -> None:
+    _students(1)
+    upload = SimpleUploadedFile("gpa.xlsx", _xlsx([["学号", "绩点"], [20230001, 3], ["G000", 9]]))
+
+    api_client.force_authenticate(admin_user)
+    response = api_client.post("/api/v1/scoring/subject-scores/import/", {"file": upload}, format="multipart")
+
+    assert response.status_code == 200
+    assert response.data["created"] == 1
+    assert response.data["error_count"] == 1
+    student_user.refresh_from_db()
+    assert student_user.total_score == 60
+
+
+@pytest.mark.django_db
+def test_import_endpoint_requires_admin(api_client: APIClient, student_user: Student) -> None:
+    api_client.force_authenticate(student_user)
+    upload = SimpleUploadedFile("gpa.csv", b"student_id,gpa\n20230001,4\n")
+    response = api_client.post("/api/v1/scoring/subject-scores/import/", {"file": upload}, format="multipart")
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_teachers_cannot_import(api_client: APIClient, teacher_user: Student) -> None:
+    # 教师账号同样带 is_staff，导入只对管理员角色开放
+    api_client.force_authenticate(teacher_user)
+    upload = SimpleUploadedFile("gpa.csv", b"student_id,gpa\n20230001,4\n")
+    response = api_client.post("/api/v1/scoring/subject-scores/import/", {"file": upload}, format="multipart")
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_import_command(tmp_path: Path) -> None:
+    _students(2)
+    path = tmp_path / "gpa.csv"
+    path.write_text("student_id,gpa\nG000,2\nG001,4\n", encoding="utf-8")
+    out = io.StringIO()
+    call_command("import_gpa", str(path), stdout=out)
+    assert "新增 2" in out.getvalue()
+    assert Student.objects.get(student_id="G001").ranking == 1
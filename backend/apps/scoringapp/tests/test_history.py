@@ -0,0 +1,78 @@
+"""Tests for delta-encoded ranking history snapshots."""
+from __future__ import annotations
+
+import io
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from apps.scoringapp.history import rank_timeline, take_ranking_snapshot
+from apps.scoringapp.models import RankingSnapshotBlock, Student, recalculate_rankings
+
+
+def _students(scores: list[float]) -> list[Student]:
+    Student.objects.bulk_create(
+        [Student(username=f"h{i}", student_id=f"H{i}", password="!", total_score=score) for i, score in enumerate(scores)]
+    )
+    recalculate_rankings()
+    return list(Student.objects.order_by("id"))
+
+
+def _set_score(student: Student, score: float) -> None:
+    Student.objects.filter(pk=student.pk).update(total_score=score)
+    recalculate_rankings()
+
+
+@pytest.mark.django_db
+def test_snapshots_store_only_changed_students() -> None:
+    students = _students([90, 80, 70, 60])
+
+    first = take_ranking_snapshot()
+    assert (first.student_count, first.changed_count) == (4, 4)
+
+    _set_score(students[3], 75)
+    second = take_ranking_snapshot()
+    # h3 moved up past h2; h0 and h1 are unchanged and not stored again
+    assert second.changed_count == 2
+
+    third = take_ranking_snapshot()
+    assert third.changed_count == 0
+    assert not RankingSnapshotBlock.objects.filter(snapshot=third).exists()
+
+    timeline = rank_timeline(students[3].pk)
+    assert [(p.ranking, p.total_score) for p in timeline] == [(4, 60), (3, 75)]
+    assert [p.ranking for p in rank_timeline(students[0].pk)] == [1]
+
+
+@pytest.mark.django_db
+def test_snapshot_blocks_split_by_student_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(RankingSnapshotBlock, "BLOCK_SIZE", 2)
+    monkeypatch.setattr("apps.scoringapp.history.SNAPSHOT_CHUNK_SIZE", 3)
+    students = _students([50, 40, 30, 20, 10])
+
+    snapshot = take_ranking_snapshot()
+
+    blocks = RankingSnapshotBlock.objects.filter(snapshot=snapshot)
+    assert blocks.count() == len({student.pk // 2 for student in students})
+    for student in students:
+        (point,) = rank_timeline(student.pk)
+        assert point.ranking == student.ranking
+        assert point.total_score == student.total_score
+
+
+@pytest.mark.django_db
+def test_rank_history_endpoint_and_command(api_client: APIClient) -> None:
+    students = _students([90, 80])
+    out = io.StringIO()
+    call_command("snapshot_rankings", stdout=out)
+    assert "2 人有变化" in out.getvalue()
+    _set_score(students[1], 95)
+    call_command("snapshot_rankings", stdout=io.StringIO())
+
+    api_client.force_authenticate(students[1])
+    response = api_client.get(f"/api/v1/scoring/students/{students[1].pk}/rank-history/")
+
+    assert response.status_code == 200
+    assert response.data["current"]["ranking"] == 1
+    assert [point["ranking"] for point in response.data["points"]] == [2, 1]
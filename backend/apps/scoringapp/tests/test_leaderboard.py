@@ -0,0 +1,79 @@
+"""Tests for the keyset-paginated leaderboard endpoint."""
+from __future__ import annotations
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.scoringapp.models import Student, recalculate_rankings
+
+
+@pytest.fixture
+def ranked_students(db: None) -> list[Student]:
+    Student.objects.bulk_create(
+        [
+            Student(username=f"s{i}", student_id=f"S{i}", password="!", total_score=score, academic_raw_total=20)
+            for i, score in enumerate([90, 85, 85, 70, 60, 50, 40])
+        ]
+    )
+    recalculate_rankings()
+    return list(Student.objects.order_by("-total_score", "id"))
+
+
+def _usernames(payload: dict) -> list[str]:
+    return [row["username"] for row in payload["results"]]
+
+
+@pytest.mark.django_db
+def test_leaderboard_walks_pages_with_cursor(api_client: APIClient, ranked_students: list[Student]) -> None:
+    api_client.force_authenticate(ranked_students[0])
+
+    first = api_client.get("/api/v1/scoring/leaderboard/", {"page_size": 3}).json()
+    assert _usernames(first) == ["s0", "s1", "s2"]
+    assert [row["rank"] for row in first["results"]] == [1, 2, 3]
+    assert first["results"][0]["academic_total"] == 15
+    assert first["previous"] is None
+
+    second = api_client.get("/api/v1/scoring/leaderboard/", {"page_size": 3, "cursor": first["next"]}).json()
+    assert _usernames(second) == ["s3", "s4", "s5"]
+
+    back = api_client.get("/api/v1/scoring/leaderboard/", {"page_size": 3, "cursor": second["previous"]}).json()
+    assert _usernames(back) == ["s0", "s1", "s2"]
+
+
+@pytest.mark.django_db
+def test_leaderboard_around_me_centres_on_caller(api_client: APIClient, ranked_students: list[Student]) -> None:
+    me = ranked_students[4]
+    api_client.force_authenticate(me)
+
+    payload = api_client.get("/api/v1/scoring/leaderboard/", {"page_size": "3", "around": "me"}).json()
+
+    assert _usernames(payload) == ["s3", "s4", "s5"]
+    assert payload["me"]["rank"] == 5
+    assert payload["next"] and payload["previous"]
+
+
+@pytest.mark.django_db
+def test_leaderboard_rejects_bad_cursor(api_client: APIClient, ranked_students: list[Student]) -> None:
+    api_client.force_authenticate(ranked_students[0])
+    response = api_client.get("/api/v1/scoring/leaderboard/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_leaderboard_filters_by_cohort(api_client: APIClient, ranked_students: list[Student]) -> None:
+    Student.objects.filter(username__in=["s1", "s4", "s6"]).update(college="Science", major="CS", admission_year=2022)
+    recalculate_rankings()
+    api_client.force_authenticate(ranked_students[0])
+    cohort: dict[str, str | int] = {"college": "Science", "major": "CS", "admission_year": 2022}
+
+    payload = api_client.get("/api/v1/scoring/leaderboard/", {**cohort, "page_size": 2}).json()
+    assert _usernames(payload) == ["s1", "s4"]
+    assert [row["rank"] for row in payload["results"]] == [1, 2]
+
+    rest = api_client.get("/api/v1/scoring/leaderboard/", {**cohort, "page_size": 2, "cursor": payload["next"]}).json()
+    assert _usernames(rest) == ["s6"]
+    assert rest["results"][0]["rank"] == 3
+    assert rest["next"] is None
+
+    partial = api_client.get("/api/v1/scoring/leaderboard/", {"college": "Science"})
+    assert partial.status_code == 400
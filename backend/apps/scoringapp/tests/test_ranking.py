@@ -0,0 +1,175 @@
+"""Tests for the set-based ranking engine."""
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pytest_django import DjangoCaptureOnCommitCallbacks
+
+from apps.scoringapp.models import Student, SubjectScore, recalculate_rankings
+from apps.scoringapp.ranking import (
+    STRATEGY_BULK,
+    STRATEGY_WINDOW,
+    Cohort,
+    rerank,
+    rerank_all_cohorts,
+    rerank_cohort,
+    supports_window_update,
+)
+
+STRATEGIES = [STRATEGY_BULK, pytest.param(STRATEGY_WINDOW, marks=pytest.mark.skipif(not supports_window_update(), reason="no window UPDATE"))]
+
+
+def _make_students(scores: list[float]) -> list[Student]:
+    Student.objects.bulk_create(
+        [Student(username=f"s{i}", student_id=f"S{i}", password="!", total_score=score) for i, score in enumerate(scores)]
+    )
+    return list(Student.objects.order_by("id"))
+
+
+def _rankings() -> dict[str, int]:
+    return dict(Student.objects.values_list("username", "ranking"))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_full_rerank_orders_by_score_then_id(strategy: str) -> None:
+    _make_students([50, 90, 70, 90])
+
+    written = rerank(strategy=strategy)
+
+    assert written == 4
+    assert _rankings() == {"s1": 1, "s3": 2, "s2": 3, "s0": 4}
+    assert rerank(strategy=strategy) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_range_rerank_only_touches_shifted_rows(strategy: str) -> None:
+    students = _make_students([95, 80, 70, 60, 50, 10])
+    rerank(strategy=strategy)
+
+    Student.objects.filter(pk=students[4].pk).update(total_score=75)
+    written = rerank(50, 75, strategy=strategy)
+
+    # s4 jumps above s2 and s3; s0, s1 and s5 keep their places untouched
+    assert written == 3
+    assert _rankings() == {"s0": 1, "s1": 2, "s4": 3, "s2": 4, "s3": 5, "s5": 6}
+
+
+@pytest.mark.django_db
+def test_score_change_issues_single_ranking_update(
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    _make_students([90, 80, 70])
+    recalculate_rankings()
+    newcomer = Student.objects.create_user(username="new", student_id="N1", password="pwd")
+
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks(execute=True):
+        SubjectScore.objects.create(student=newcomer, gpa=3.8, a_value=80)
+
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    ranking_updates = [sql for sql in updates if '"ranking"' in sql.replace('"cohort_ranking"', "")]
+    cohort_updates = [sql for sql in updates if '"cohort_ranking"' in sql]
+    assert len(ranking_updates) == 1
+    assert len(cohort_updates) == 1
+    assert _rankings() == {"s0": 1, "s1": 2, "new": 3, "s2": 4}
+
+
+def _cohort_students() -> dict[str, Student]:
+    specs = [
+        ("c0", "CS", 2021, 90),
+        ("c1", "CS", 2021, 70),
+        ("c2", "CS", 2021, 80),
+        ("m0", "Math", 2021, 95),
+        ("m1", "Math", 2021, 60),
+        ("n0", "CS", 2022, 50),
+    ]
+    Student.objects.bulk_create(
+        [
+            Student(
+                username=name,
+                student_id=name,
+                password="!",
+                college="Science",
+                major=major,
+                admission_year=year,
+                total_score=score,
+            )
+            for name, major, year, score in specs
+        ]
+    )
+    return {student.username: student for student in Student.objects.all()}
+
+
+def _cohort_rankings() -> dict[str, int]:
+    return dict(Student.objects.values_list("username", "cohort_ranking"))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_partitioned_rerank_ranks_within_each_cohort(strategy: str) -> None:
+    _cohort_students()
+
+    assert rerank_all_cohorts(strategy=strategy) == 6
+    assert _cohort_rankings() == {"c0": 1, "c2": 2, "c1": 3, "m0": 1, "m1": 2, "n0": 1}
+    assert rerank_all_cohorts(strategy=strategy) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_cohort_range_rerank_leaves_other_cohorts_alone(strategy: str) -> None:
+    students = _cohort_students()
+    rerank_all_cohorts(strategy=strategy)
+    Student.objects.filter(pk=students["c1"].pk).update(total_score=99)
+    # 其他分组中被人为改乱的名次不应被触及
+    Student.objects.filter(pk=students["m1"].pk).update(cohort_ranking=7)
+
+    written = rerank_cohort(Cohort("Science", "CS", 2021), 70, 99, strategy=strategy)
+
+    assert written == 3
+    assert _cohort_rankings() == {"c1": 1, "c0": 2, "c2": 3, "m0": 1, "m1": 7, "n0": 1}
+
+
+@pytest.mark.django_db
+def test_score_change_reranks_only_the_students_cohort(
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    students = _cohort_students()
+    recalculate_rankings()
+
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks(execute=True):
+        SubjectScore.objects.create(student=students["m1"], gpa=4, a_value=80)
+
+    cohort_updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE") and '"cohort_ranking"' in q["sql"]]
+    assert len(cohort_updates) == 1
+    assert _cohort_rankings() == {"c0": 1, "c2": 2, "c1": 3, "m0": 1, "m1": 2, "n0": 1}
+    assert Student.objects.get(pk=students["m1"].pk).ranking == 4
+
+
+@pytest.mark.django_db
+def test_changing_cohort_reranks_old_and_new_cohort() -> None:
+    _cohort_students()
+    recalculate_rankings()
+
+    mover = Student.objects.get(username="c0")
+    mover.major = "Math"
+    mover.save()
+
+    assert _cohort_rankings() == {"c2": 1, "c1": 2, "m0": 1, "c0": 2, "m1": 3, "n0": 1}
+
+
+@pytest.mark.django_db
+def test_benchmark_refuses_databases_with_real_students() -> None:
+    output = StringIO()
+    call_command("benchmark_rankings", "--sizes", "50", "--changes", "2", stdout=output)
+    assert "50" in output.getvalue()
+    assert not Student.objects.exists()
+
+    Student.objects.create_user(username="real", student_id="R001", password="pass")
+    with pytest.raises(CommandError):
+        call_command("benchmark_rankings", "--sizes", "50", "--changes", "2", stdout=StringIO())
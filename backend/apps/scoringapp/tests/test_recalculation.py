@@ -0,0 +1,214 @@
+"""Tests for the per-transaction score recalculation queue."""
+from __future__ import annotations
+
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.db import transaction
+from pytest_django import DjangoCaptureOnCommitCallbacks
+from rest_framework.test import APIClient
+
+from apps.scoringapp import recalculation
+from apps.scoringapp.models import AcademicExpertise, ComprehensivePerformance, RescoreJob, Student, SubjectScore
+from apps.scoringapp.recalculation import bulk_score_writes
+
+
+@pytest.fixture
+def scored_student(db: None) -> Student:
+    return Student.objects.create_user(username="stu", student_id="S1", password="pwd")
+
+
+@pytest.mark.django_db
+def test_writes_in_one_transaction_recompute_once(
+    scored_student: Student, django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    with mock.patch.object(recalculation, "recompute_students", wraps=recalculation.recompute_students) as recompute:
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                SubjectScore.objects.create(student=scored_student, gpa=4, a_value=80)
+                for index in range(5):
+                    AcademicExpertise.objects.create(student=scored_student, name=f"Paper{index}", score=2)
+                assert Student.objects.get(pk=scored_student.pk).total_score == 0
+
+    recompute_calls = [call for call in recompute.call_args_list if set(call.args[0])]
+    assert len(recompute_calls) == 1
+    scored_student.refresh_from_db()
+    assert scored_student.total_score == 80 + 10
+    assert scored_student.ranking == 1
+
+
+@pytest.mark.django_db
+def test_bulk_score_writes_defers_until_block_exit(scored_student: Student) -> None:
+    with mock.patch.object(recalculation, "recompute_students", wraps=recalculation.recompute_students) as recompute:
+        with bulk_score_writes():
+            SubjectScore.objects.create(student=scored_student, gpa=2, a_value=80)
+            ComprehensivePerformance.objects.create(student=scored_student, name="Club", score=3)
+            ComprehensivePerformance.objects.create(student=scored_student, name="Volunteer", score=4)
+            assert recompute.call_count == 0
+
+    recompute.assert_called_once()
+    scored_student.refresh_from_db()
+    assert scored_student.total_score == 40 + 5
+
+
+@pytest.mark.django_db
+def test_deleting_score_rows_lowers_total(scored_student: Student) -> None:
+    with bulk_score_writes():
+        keep = AcademicExpertise.objects.create(student=scored_student, name="Keep", score=3)
+        drop = AcademicExpertise.objects.create(student=scored_student, name="Drop", score=4)
+
+    with bulk_score_writes():
+        drop.delete()
+
+    scored_student.refresh_from_db()
+    assert scored_student.total_score == keep.score
+
+
+@pytest.mark.django_db
+def test_category_raw_totals_follow_row_changes(
+    scored_student: Student, another_student: Student, django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        paper = AcademicExpertise.objects.create(student=scored_student, name="Paper", score=6)
+        AcademicExpertise.objects.create(student=scored_student, name="Patent", score=5)
+        ComprehensivePerformance.objects.create(student=scored_student, name="Club", score=2)
+
+        paper = AcademicExpertise.objects.get(pk=paper.pk)
+        paper.score = 9
+        paper.save()
+    scored_student.refresh_from_db()
+    assert (scored_student.academic_raw_total, scored_student.comprehensive_raw_total) == (14, 2)
+    # capped at read time with the default b_max=15
+    assert scored_student.total_score == 14 + 2
+
+    paper.student = another_student
+    paper.save()
+    AcademicExpertise.objects.filter(name="Patent").delete()
+    scored_student.refresh_from_db()
+    another_student.refresh_from_db()
+    assert scored_student.academic_raw_total == 0
+    assert another_student.academic_raw_total == 9
+
+
+@pytest.mark.django_db
+def test_full_student_save_keeps_derived_columns(scored_student: Student) -> None:
+    stale = Student.objects.get(pk=scored_student.pk)
+    AcademicExpertise.objects.create(student=scored_student, name="Paper", score=4)
+
+    stale.is_active = False
+    stale.save()
+
+    scored_student.refresh_from_db()
+    assert scored_student.academic_raw_total == 4
+    assert scored_student.is_active is False
+
+
+@pytest.mark.django_db
+def test_full_student_save_rejects_derived_column_writes(scored_student: Student) -> None:
+    student = Student.objects.get(pk=scored_student.pk)
+    student.total_score = 99
+
+    with pytest.raises(ValueError):
+        student.save()
+
+    student.save(update_fields=["total_score"])
+    assert Student.objects.get(pk=student.pk).total_score == 99
+
+    # 读回最新值后可以照常整行保存
+    AcademicExpertise.objects.create(student=student, name="Paper", score=4)
+    student.refresh_from_db()
+    student.is_active = False
+    student.save()
+
+
+@pytest.mark.django_db
+def test_auth_flows_work_with_derived_column_guard(monkeypatch: pytest.MonkeyPatch) -> None:
+    from django.core.management import call_command
+    from django.test import Client
+
+    monkeypatch.setenv("DJANGO_SUPERUSER_PASSWORD", "superpass123")
+    call_command("createsuperuser", interactive=False, username="root", student_id="R0001", stdout=StringIO())
+    admin = Student.objects.get(username="root")
+    assert admin.is_superuser and admin.check_password("superpass123")
+
+    # 加载后汇总列被增量更新，旧实例上的改密与后台登录（记录 last_login）不会回写旧的汇总值
+    AcademicExpertise.objects.create(student=admin, name="Paper", score=6)
+    admin.set_password("changed-pass-1")
+    admin.save()
+    client = Client()
+    response = client.post("/admin/login/?next=/admin/", {"username": "root", "password": "changed-pass-1"})
+    assert response.status_code == 302
+    assert client.get("/admin/").status_code == 200
+
+    admin.refresh_from_db()
+    assert admin.academic_raw_total == 6
+    assert admin.last_login is not None
+
+
+@pytest.mark.django_db
+def test_rebuild_score_totals_command_repairs_drift(scored_student: Student) -> None:
+    from django.core.management import call_command
+
+    AcademicExpertise.objects.create(student=scored_student, name="Paper", score=20)
+    Student.objects.filter(pk=scored_student.pk).update(academic_raw_total=3, total_score=3)
+
+    call_command("rebuild_score_totals", stdout=StringIO())
+
+    scored_student.refresh_from_db()
+    assert scored_student.academic_raw_total == 20
+    assert scored_student.academic_total == 15
+    assert scored_student.total_score == 15
+
+
+@pytest.mark.django_db
+def test_lowering_score_limit_rescores_existing_totals(
+    api_client: APIClient,
+    admin_user: Student,
+    scored_student: Student,
+    another_student: Student,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    with bulk_score_writes():
+        SubjectScore.objects.create(student=scored_student, gpa=4, a_value=80)
+        AcademicExpertise.objects.create(student=scored_student, name="Paper", score=12)
+        AcademicExpertise.objects.create(student=another_student, name="Paper", score=4)
+    scored_student.refresh_from_db()
+    assert scored_student.total_score == 92
+
+    api_client.force_authenticate(admin_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.put("/api/v1/rules/score-limits/", {"a_max": 60, "b_max": 10}, format="json")
+    assert response.status_code == 200
+    job_id = response.data["rescore_job"]
+
+    scored_student.refresh_from_db()
+    another_student.refresh_from_db()
+    assert scored_student.subject_score.calculated_score == 60
+    assert scored_student.total_score == 60 + 10
+    assert another_student.total_score == 4
+
+    progress = api_client.get(f"/api/v1/scoring/rescore-jobs/{job_id}/")
+    assert progress.status_code == 200
+    assert progress.data["status"] == "done"
+    assert progress.data["processed"] == Student.objects.count()
+    assert progress.data["changed"] == 1
+
+
+@pytest.mark.django_db
+def test_rescore_jobs_are_admin_only(api_client: APIClient, teacher_user: Student) -> None:
+    # 教师账号同样带 is_staff，重算任务只对管理员角色开放
+    api_client.force_authenticate(teacher_user)
+    assert api_client.post("/api/v1/scoring/rescore-jobs/", {}, format="json").status_code == 403
+    assert not RescoreJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_category_rule_edit_does_not_queue_rescore(api_client: APIClient, admin_user: Student) -> None:
+    # 加分类别规则不参与总分计算，修改规则不需要全量重算
+    api_client.force_authenticate(admin_user)
+    response = api_client.put(
+        "/api/v1/rules/score-category-rules/", [{"name": "科研", "cap": 10, "ratio": 100}], format="json"
+    )
+    assert response.status_code == 200
+    assert not RescoreJob.objects.exists()
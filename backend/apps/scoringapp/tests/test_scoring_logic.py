@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import pytest
+from pytest_django import DjangoCaptureOnCommitCallbacks
 
 from apps.rulesapp.models import ScoreLimit
 from apps.scoringapp.models import (
@@ -24,17 +25,20 @@ def test_get_score_limits_uses_singleton() -> None:
 
 
 @pytest.mark.django_db
-def test_subject_score_and_totals_respect_limits() -> None:
+def test_subject_score_and_totals_respect_limits(
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
     ScoreLimit.objects.create(a_max=50, b_max=12, c_max=10)
     student = Student.objects.create_user(username="stu", student_id="S1", password="pwd")
 
-    subject = SubjectScore.objects.create(student=student, gpa=4, a_value=80)
-    assert subject.calculated_score == 50
+    with django_capture_on_commit_callbacks(execute=True):
+        subject = SubjectScore.objects.create(student=student, gpa=4, a_value=80)
+        assert subject.calculated_score == 50
 
-    AcademicExpertise.objects.create(student=student, name="PaperA", score=8)
-    AcademicExpertise.objects.create(student=student, name="PaperB", score=10)
-    ComprehensivePerformance.objects.create(student=student, name="Volunteer", score=9)
-    ComprehensivePerformance.objects.create(student=student, name="Club", score=6)
+        AcademicExpertise.objects.create(student=student, name="PaperA", score=8)
+        AcademicExpertise.objects.create(student=student, name="PaperB", score=10)
+        ComprehensivePerformance.objects.create(student=student, name="Volunteer", score=9)
+        ComprehensivePerformance.objects.create(student=student, name="Club", score=6)
 
     student.refresh_from_db()
     assert student.total_score == 50 + 12 + 10
@@ -0,0 +1,104 @@
+"""Tests for the read-only what-if rank simulator."""
+from __future__ import annotations
+
+import pytest
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+from apps.rulesapp.cache import invalidate_score_config
+from apps.rulesapp.models import ScoreCategoryRule
+from apps.scoringapp import simulation
+from apps.scoringapp.models import Student, SubjectScore, recalculate_rankings
+from apps.scoringapp.simulation import TotalsSnapshot
+
+URL = "/api/v1/scoring/simulate/"
+
+
+@pytest.fixture
+def ranked(db: None) -> list[Student]:
+    Student.objects.bulk_create(
+        [
+            Student(username=f"sim{i}", student_id=f"SIM{i}", password="!", total_score=score)
+            for i, score in enumerate([90, 85, 70, 60, 50])
+        ]
+    )
+    recalculate_rankings()
+    students = list(Student.objects.order_by("-total_score", "id"))
+    SubjectScore.objects.bulk_create([SubjectScore(student=s, gpa=s.total_score / 20, a_value=80, calculated_score=s.total_score) for s in students])
+    # 测试事务不会提交，手动使总分排序数组失效
+    simulation._bump_version()
+    return students
+
+
+def test_rank_of_excludes_the_student_itself() -> None:
+    snapshot = TotalsSnapshot(version=1, keys=[(-90.0, 1), (-80.0, 2), (-80.0, 4), (-50.0, 3)])
+    # 同分按 id 升序：id=3 排在 id=2 之后、id=4 之前
+    assert snapshot.rank_of(80.0, 3, current_total=50.0) == 3
+    assert snapshot.rank_of(95.0, 3, current_total=50.0) == 1
+    assert snapshot.rank_of(10.0, 3, current_total=50.0) == 4
+    assert snapshot.rank_of(80.0, 4, current_total=80.0) == 3
+    assert snapshot.rank_of(40.0, 1, current_total=90.0) == 4
+
+
+@pytest.mark.django_db
+def test_simulate_projects_rank_without_writes(
+    api_client: APIClient, ranked: list[Student], django_assert_num_queries: DjangoAssertNumQueries
+) -> None:
+    me = ranked[3]
+    api_client.force_authenticate(me)
+
+    response = api_client.post(URL, {"gpa": 3.6, "additions": [{"kind": "academic", "score": 4}]}, format="json")
+
+    assert response.status_code == 200
+    assert response.data["current_rank"] == 4
+    assert response.data["projected_total"] == 72 + 4
+    assert response.data["projected_rank"] == 3
+    assert response.data["population"] == 5
+    me.refresh_from_db()
+    assert me.total_score == 60
+
+    # 排序数组与分数配置都已缓存：给定 GPA 时不再查询数据库
+    with django_assert_num_queries(0):
+        again = api_client.post(URL, {"gpa": 4, "additions": [{"kind": "academic", "score": 15}]}, format="json")
+    assert again.data["projected_total"] == 95
+    assert again.data["projected_rank"] == 1
+
+
+@pytest.mark.django_db
+def test_simulate_counts_categorised_additions_like_the_engine(api_client: APIClient, ranked: list[Student]) -> None:
+    ScoreCategoryRule.objects.create(name="竞赛", cap=2, ratio=50, order=1)
+    ScoreCategoryRule.objects.create(name="论文", cap=0, ratio=50, order=2)
+    invalidate_score_config()
+    api_client.force_authenticate(ranked[4])
+
+    response = api_client.post(
+        URL,
+        {
+            "additions": [
+                {"kind": "academic", "score": 10, "category": "竞赛"},
+                {"kind": "academic", "score": 3, "category": "论文"},
+                {"kind": "comprehensive", "score": 1},
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["subject_score"] == 50
+    # 排名引擎按原始分值累加，不按类别规则折算；模拟结果与之一致
+    assert response.data["academic_total"] == 10 + 3
+    assert response.data["projected_total"] == 50 + 13 + 1
+
+    unknown = api_client.post(URL, {"additions": [{"kind": "academic", "score": 1, "category": "无"}]}, format="json")
+    assert unknown.status_code == 400
+
+
+@pytest.mark.django_db
+def test_students_cannot_simulate_others(api_client: APIClient, ranked: list[Student], teacher_user: Student) -> None:
+    api_client.force_authenticate(ranked[0])
+    assert api_client.post(URL, {"student": ranked[1].pk}, format="json").status_code == 403
+
+    api_client.force_authenticate(teacher_user)
+    response = api_client.post(URL, {"student": ranked[1].pk, "gpa": 4}, format="json")
+    assert response.status_code == 200
+    assert response.data["student"] == ranked[1].pk
@@ -0,0 +1,121 @@
+"""Query-count tests for the student list and detail endpoints."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.scoringapp.models import AcademicExpertise, ComprehensivePerformance, Student, SubjectScore
+from apps.scoringapp.recalculation import bulk_score_writes
+
+
+def _add_students(count: int, offset: int = 0) -> None:
+    with bulk_score_writes():
+        for index in range(offset, offset + count):
+            student = Student(username=f"bulk{index}", student_id=f"B{index}", password="!")
+            student.save()
+            SubjectScore.objects.create(student=student, gpa=3, a_value=80)
+            AcademicExpertise.objects.create(student=student, name="Paper", score=2)
+            ComprehensivePerformance.objects.create(student=student, name="Club", score=1)
+
+
+def _list_query_count(api_client: APIClient) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/v1/scoring/students/")
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_student_list_query_count_is_constant(api_client: APIClient, teacher_user: Student) -> None:
+    api_client.force_authenticate(teacher_user)
+    _add_students(3)
+    small = _list_query_count(api_client)
+
+    _add_students(20, offset=3)
+    large = _list_query_count(api_client)
+
+    assert small == large
+
+
+@pytest.mark.django_db
+def test_student_list_keeps_nested_shape(api_client: APIClient, teacher_user: Student) -> None:
+    api_client.force_authenticate(teacher_user)
+    _add_students(1)
+
+    rows = {row["username"]: row for row in api_client.get("/api/v1/scoring/students/").json()}
+
+    assert rows["bulk0"]["subject_score"]["calculated_score"] == 60
+    assert [item["name"] for item in rows["bulk0"]["academic_expertises"]] == ["Paper"]
+    assert rows["bulk0"]["total_score"] == 63
+    assert rows["teacher1"]["subject_score"] is None
+    assert "password" not in rows["bulk0"]
+
+
+@pytest.mark.django_db
+def test_nested_update_diffs_rows_by_id(student_user: Student, media_root: Path) -> None:
+    from unittest import mock
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    from apps.scoringapp import recalculation
+    from apps.scoringapp.serializers import StudentSerializer
+
+    with bulk_score_writes():
+        SubjectScore.objects.create(student=student_user, gpa=2, a_value=80)
+        keep = AcademicExpertise.objects.create(
+            student=student_user,
+            name="Keep",
+            score=3,
+            material=SimpleUploadedFile("keep.pdf", b"pdf", content_type="application/pdf"),
+        )
+        edit = AcademicExpertise.objects.create(student=student_user, name="Edit", score=2)
+        drop = AcademicExpertise.objects.create(student=student_user, name="Drop", score=4)
+    keep_updated_at = AcademicExpertise.objects.get(pk=keep.pk).updated_at
+
+    serializer = StudentSerializer(
+        student_user,
+        data={
+            "academic_expertises": [
+                {"id": keep.pk, "name": "Keep", "score": 3},
+                {"id": edit.pk, "name": "Edit", "score": 5},
+                {"name": "New", "score": 1},
+            ]
+        },
+        partial=True,
+    )
+    assert serializer.is_valid(), serializer.errors
+    with mock.patch.object(recalculation, "recompute_students", wraps=recalculation.recompute_students) as recompute:
+        serializer.save()
+
+    recompute.assert_called_once()
+    kept = AcademicExpertise.objects.get(pk=keep.pk)
+    assert kept.updated_at == keep_updated_at
+    assert kept.material.name.endswith("keep.pdf")
+    assert AcademicExpertise.objects.get(pk=edit.pk).score == 5
+    assert not AcademicExpertise.objects.filter(pk=drop.pk).exists()
+    assert set(student_user.academic_expertises.values_list("name", flat=True)) == {"Keep", "Edit", "New"}
+    student_user.refresh_from_db()
+    assert student_user.academic_raw_total == 3 + 5 + 1
+    assert student_user.total_score == 40 + 9
+
+
+@pytest.mark.django_db
+def test_nested_update_rejects_foreign_item_ids(student_user: Student, another_student: Student) -> None:
+    from rest_framework.exceptions import ValidationError
+
+    from apps.scoringapp.serializers import StudentSerializer
+
+    foreign = AcademicExpertise.objects.create(student=another_student, name="Theirs", score=2)
+    serializer = StudentSerializer(
+        student_user,
+        data={"academic_expertises": [{"id": foreign.pk, "name": "Mine", "score": 9}]},
+        partial=True,
+    )
+    assert serializer.is_valid(), serializer.errors
+    with pytest.raises(ValidationError):
+        serializer.save()
+    assert AcademicExpertise.objects.get(pk=foreign.pk).name == "Theirs"
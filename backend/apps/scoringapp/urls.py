@@ -2,7 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     StudentViewSet, SubjectScoreViewSet,
-    AcademicExpertiseViewSet, ComprehensivePerformanceViewSet
+    AcademicExpertiseViewSet, ComprehensivePerformanceViewSet,
+    RescoreJobViewSet, LeaderboardView, SubjectScoreImportView, SimulateView,
+    DistributionView, PercentileView,
 )
 
 # 创建路由器并注册视图集
@@ -11,8 +13,14 @@ router.register(r'students', StudentViewSet)
 router.register(r'subject-scores', SubjectScoreViewSet)
 router.register(r'academic-expertises', AcademicExpertiseViewSet)
 router.register(r'comprehensive-performances', ComprehensivePerformanceViewSet)
+router.register(r'rescore-jobs', RescoreJobViewSet)
 
 # API URL配置
 urlpatterns = [
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('simulate/', SimulateView.as_view(), name='simulate'),
+    path('stats/distribution/', DistributionView.as_view(), name='score-distribution'),
+    path('stats/percentile/', PercentileView.as_view(), name='score-percentile'),
+    path('subject-scores/import/', SubjectScoreImportView.as_view(), name='subject-score-import'),
     path('', include(router.urls)),
 ]
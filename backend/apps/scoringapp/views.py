@@ -1,15 +1,37 @@
 from __future__ import annotations
 
-from rest_framework import permissions, viewsets
+from typing import Any
+
+from django.db.models import QuerySet
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+from apps.authapp.permissions import RolePermission
 
-from .models import AcademicExpertise, ComprehensivePerformance, Student, SubjectScore
+from .distribution import get_distribution, student_percentiles
+from .gpa_import import import_gpa_file
+from .history import rank_timeline
+from .leaderboard import InvalidCursor, leaderboard_around, leaderboard_page
+from .models import AcademicExpertise, ComprehensivePerformance, RescoreJob, Student, SubjectScore
+from .ranking import COHORT_FIELDS, Cohort
 from .serializers import (
     AcademicExpertiseSerializer,
     ComprehensivePerformanceSerializer,
+    RescoreJobSerializer,
+    SimulationSerializer,
+    StudentReadSerializer,
     StudentSerializer,
     SubjectScoreSerializer,
 )
+from .sheets import SheetFormatError
+from .simulation import Addition, simulate
+from .tasks import enqueue_rescore
 
 class StudentViewSet(viewsets.ModelViewSet):
     """
@@ -20,6 +42,23 @@ class StudentViewSet(viewsets.ModelViewSet):
     serializer_class = StudentSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    read_actions = ('list', 'retrieve')
+    cursor_ordering = ('-date_joined', '-id')
+    page_size = 100
+
+    def get_queryset(self) -> QuerySet[Student]:
+        queryset = super().get_queryset()
+        if getattr(self, 'action', None) in self.read_actions:
+            # 嵌套的一对一与两个反向外键一次性取出，避免逐行查询
+            queryset = queryset.select_related('subject_score').prefetch_related(
+                'academic_expertises', 'comprehensive_performances'
+            )
+        return queryset
+
+    def get_serializer_class(self) -> type[BaseSerializer[Any]]:
+        if getattr(self, 'action', None) in self.read_actions:
+            return StudentReadSerializer
+        return super().get_serializer_class()
 
     def get_permissions(self) -> list[permissions.BasePermission]:
         """允许未认证用户进行注册（create），其他操作仍需认证"""
@@ -28,12 +67,54 @@ class StudentViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    @action(detail=True, methods=['get'], url_path='rank-history')
+    def rank_history(self, request: Request, pk: str | None = None) -> Response:
+        """学生的排名时间线：历次快照中名次或总分发生变化的时间点"""
+        student = self.get_object()
+        return Response({
+            "student": student.pk,
+            "current": {
+                "ranking": student.ranking,
+                "cohort_ranking": student.cohort_ranking,
+                "total_score": student.total_score,
+            },
+            "points": [
+                {
+                    "taken_at": point.taken_at,
+                    "ranking": point.ranking,
+                    "cohort_ranking": point.cohort_ranking,
+                    "total_score": point.total_score,
+                }
+                for point in rank_timeline(student.pk)
+            ],
+        })
+
 class SubjectScoreViewSet(viewsets.ModelViewSet):
     """学科成绩视图集"""
     queryset = SubjectScore.objects.all()
     serializer_class = SubjectScoreSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+class SubjectScoreImportView(APIView):
+    """绩点表批量导入（管理员）
+
+    POST multipart 字段 file：CSV 或 XLSX，需包含「学号/student_id」与「绩点/gpa」两列。
+    返回逐行错误报告；有效行照常导入，导入结束后统一重算一次排名。
+    """
+    permission_classes = [permissions.IsAuthenticated, RolePermission]
+    required_roles = ("admin",)
+    parser_classes = [MultiPartParser]
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "请上传 file 字段"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = import_gpa_file(upload, upload.name or '')
+        except SheetFormatError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
+
 class AcademicExpertiseViewSet(viewsets.ModelViewSet):
     """学术专长视图集"""
     queryset = AcademicExpertise.objects.all()
@@ -47,3 +128,146 @@ class ComprehensivePerformanceViewSet(viewsets.ModelViewSet):
     serializer_class = ComprehensivePerformanceSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+
+class RescoreJobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """全量重算任务：管理员可手动触发（POST），并轮询任务进度"""
+    queryset = RescoreJob.objects.all()
+    serializer_class = RescoreJobSerializer
+    permission_classes = [permissions.IsAuthenticated, RolePermission]
+    required_roles = ("admin",)
+
+    def perform_create(self, serializer: BaseSerializer[Any]) -> None:
+        serializer.instance = enqueue_rescore(reason=serializer.validated_data.get('reason') or '手动触发')
+
+
+def cohort_from_params(request: Request) -> Cohort | None:
+    """从查询参数解析届别分组（college、major、admission_year 需同时提供）；未提供时返回 None"""
+    values = [request.query_params.get(name) for name in COHORT_FIELDS]
+    if all(value is None for value in values):
+        return None
+    college, major, admission_year = values
+    if college is None or major is None or admission_year is None:
+        raise ValueError("按届别筛选需同时提供 college、major 与 admission_year")
+    try:
+        year = int(admission_year) if admission_year else None
+    except ValueError:
+        raise ValueError("admission_year 需要是整数") from None
+    return Cohort(college, major, year)
+
+
+class LeaderboardView(APIView):
+    """排行榜：按 (总分降序, id) 键集分页，返回精简行
+
+    GET 参数:
+      - cursor: 上一次响应中的 next/previous 游标
+      - page_size: 每页条数（默认 50，最大 200）
+      - around=me: 以当前用户为中心返回一页
+      - college/major/admission_year: 按届别筛选（三者需同时提供），rank 为组内名次
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_page_size = 50
+    max_page_size = 200
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        try:
+            page_size = int(request.query_params.get('page_size', self.default_page_size))
+        except (TypeError, ValueError):
+            return Response({"detail": "page_size 需要是整数"}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(max(page_size, 1), self.max_page_size)
+
+        queryset = Student.objects.all()
+        rank_field = 'ranking'
+        try:
+            cohort = cohort_from_params(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if cohort is not None:
+            queryset = queryset.filter(**cohort._asdict())
+            rank_field = 'cohort_ranking'
+
+        if request.query_params.get('around') == 'me':
+            return Response(leaderboard_around(queryset, request.user, page_size, rank_field))  # type: ignore[arg-type]
+
+        try:
+            page = leaderboard_page(queryset, request.query_params.get('cursor'), page_size, rank_field)
+        except InvalidCursor:
+            return Response({"detail": "无效的游标"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
+
+
+class SimulateView(APIView):
+    """排名模拟（只读）：估算假设的 GPA 与新增加分下的总分和名次，不写入数据库
+
+    POST 请求体:
+      - gpa: 假设的绩点（可选，省略时沿用当前学科成绩）
+      - additions: [{kind: academic|comprehensive, score, category?}]
+      - student: 目标学生 id（仅教师/管理员可指定，默认为当前用户）
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        serializer = SimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        student = request.user
+        target = data.get('student')
+        if target is not None and target != student.pk:
+            if not (student.is_staff or getattr(student, 'role', None) == Student.ROLE_TEACHER):
+                return Response({"detail": "权限不足"}, status=status.HTTP_403_FORBIDDEN)
+            student = get_object_or_404(Student, pk=target)
+
+        result = simulate(
+            student,  # type: ignore[arg-type]
+            gpa=data['gpa'],
+            additions=[Addition(**item) for item in data['additions']],
+        )
+        return Response({
+            "student": student.pk,
+            "current_total": student.total_score,  # type: ignore[union-attr]
+            "current_rank": student.ranking,  # type: ignore[union-attr]
+            "subject_score": result.subject_score,
+            "academic_total": result.academic_total,
+            "comprehensive_total": result.comprehensive_total,
+            "projected_total": result.projected_total,
+            "projected_rank": result.projected_rank,
+            "population": result.population,
+        })
+
+
+class DistributionView(APIView):
+    """分数分布统计：总分与 A/B/C 各类得分的直方图、均值、中位数与分位数
+
+    GET 参数 college/major/admission_year（三者同时提供）限定为某个届别，默认全体学生。
+    结果按排名版本缓存，排名未变化时不查询数据库。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        try:
+            cohort = cohort_from_params(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_distribution(cohort))
+
+
+class PercentileView(APIView):
+    """学生在全体与所在届别中的百分位（「前 X%」）
+
+    GET 参数 student：目标学生 id（仅教师/管理员可指定，默认为当前用户）
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        student = request.user
+        target = request.query_params.get('student')
+        if target is not None:
+            try:
+                target_id = int(target)
+            except ValueError:
+                return Response({"detail": "student 需要是整数"}, status=status.HTTP_400_BAD_REQUEST)
+            if target_id != student.pk:
+                if not (student.is_staff or getattr(student, 'role', None) == Student.ROLE_TEACHER):
+                    return Response({"detail": "权限不足"}, status=status.HTTP_403_FORBIDDEN)
+                student = get_object_or_404(Student, pk=target_id)
+        return Response({"student": student.pk, **student_percentiles(student)})
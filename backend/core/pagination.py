@@ -0,0 +1,54 @@
+"""全站列表接口的游标分页。
+
+排序固定为 ``(时间戳 DESC, 主键 DESC)``：时间戳相同的行由主键决定先后，翻页时不会重复或遗漏；
+游标只记录上一页边界行的位置，任何一页的代价都与页码无关，不需要 OFFSET 扫描。
+
+各接口可在视图上声明 ``cursor_ordering`` 与 ``page_size``，未声明排序时按模型上第一个存在的时间戳字段排序；
+客户端可通过 ``?page_size=`` 调整页长，上限为 ``PG_PLUS_MAX_PAGE_SIZE``。兼容模式（``PG_PLUS_LEGACY_LIST_RESPONSES``）下，
+只有携带 ``cursor`` 或 ``page_size`` 参数的请求才分页，其余请求仍返回完整数组，便于前端逐页迁移。
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings
+from django.db.models import QuerySet
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+# 未声明 cursor_ordering 时依次尝试的时间戳字段
+TIMESTAMP_FIELDS = ("created_at", "uploaded_at", "date_joined")
+
+
+class StableCursorPagination(CursorPagination):
+    view: Any = None
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> list[Any] | None:
+        if self.is_legacy_request(request):
+            return None
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_legacy_request(self, request: Request) -> bool:
+        """兼容模式下未主动分页的旧客户端请求。"""
+        if not settings.PG_PLUS_LEGACY_LIST_RESPONSES:
+            return False
+        params = request.query_params
+        return self.cursor_query_param not in params and self.page_size_query_param not in params
+
+    def get_page_size(self, request: Request) -> int | None:
+        self.page_size = getattr(self.view, "page_size", None) or self.page_size
+        self.max_page_size = settings.PG_PLUS_MAX_PAGE_SIZE
+        page_size = super().get_page_size(request)
+        return min(page_size, self.max_page_size) if page_size is not None else None
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: Any) -> tuple[str, ...]:
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering:
+            return tuple(ordering)
+        field_names = {field.name for field in queryset.model._meta.get_fields()}
+        for name in TIMESTAMP_FIELDS:
+            if name in field_names:
+                return (f"-{name}", "-pk")
+        return ("-pk",)
@@ -140,6 +140,8 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "user": "120/minute",
     },
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.StableCursorPagination",
+    "PAGE_SIZE": int(os.environ.get("PG_PLUS_PAGE_SIZE", "50")),
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -156,6 +158,50 @@ CORS_ALLOW_CREDENTIALS = True
 CELERY_BROKER_URL = os.environ.get("PG_PLUS_CELERY_BROKER_URL", "redis://127.0.0.1:6379/1")
 CELERY_RESULT_BACKEND = os.environ.get("PG_PLUS_CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/2")
 CELERY_TASK_DEFAULT_QUEUE = "pg_plus_default"
+# 排名历史快照的间隔（秒），由 celery beat 调度；未运行 beat 时可用 snapshot_rankings 命令代替
+PG_PLUS_RANKING_SNAPSHOT_INTERVAL = float(os.environ.get("PG_PLUS_RANKING_SNAPSHOT_INTERVAL", str(24 * 60 * 60)))
+CELERY_BEAT_SCHEDULE = {
+    "scoringapp.take_ranking_snapshot": {
+        "task": "scoringapp.take_ranking_snapshot",
+        "schedule": PG_PLUS_RANKING_SNAPSHOT_INTERVAL,
+    },
+}
+
+# 缓存：配置了 Redis 时跨进程共享，否则（以及测试时）使用进程内 LocMem
+REDIS_CACHE_URL = os.environ.get("PG_PLUS_REDIS_URL", "").strip()
+if REDIS_CACHE_URL and not RUNNING_TESTS:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "pg_plus",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "pg-plus",
+        }
+    }
+
+# 缓存是否在各进程间共享。共享时缓存版本号（core/versioned_cache.py）永久有效；
+# 进程内 LocMem 下版本号按 PG_PLUS_LOCAL_VERSION_TTL（秒）过期，其他进程的写入在这段时间后可见。
+# 版本号过期后各进程都要重建依赖它的缓存（总分排序数组、分布统计、项目目录等），有效期不宜过短；
+# 多进程部署需要及时看到彼此的写入时应配置 Redis。测试在单进程内运行，LocMem 视同共享
+PG_PLUS_CACHE_SHARED = bool(REDIS_CACHE_URL) or RUNNING_TESTS
+PG_PLUS_LOCAL_VERSION_TTL = float(os.environ.get("PG_PLUS_LOCAL_VERSION_TTL", "300"))
+
+# 分数配置快照在本进程内的版本复核间隔（秒）
+PG_PLUS_SCORE_CONFIG_RECHECK_SECONDS = float(os.environ.get("PG_PLUS_SCORE_CONFIG_RECHECK_SECONDS", "1"))
+# 排名模拟器的总分排序数组在本进程内的版本复核间隔（秒）
+PG_PLUS_TOTALS_SNAPSHOT_RECHECK_SECONDS = float(os.environ.get("PG_PLUS_TOTALS_SNAPSHOT_RECHECK_SECONDS", "5"))
+# 审核收件箱领取记录的租约时长（秒），到期未审核的记录自动回到队列
+PG_PLUS_REVIEW_LEASE_SECONDS = float(os.environ.get("PG_PLUS_REVIEW_LEASE_SECONDS", "300"))
+# 列表接口 ?page_size= 的上限
+PG_PLUS_MAX_PAGE_SIZE = int(os.environ.get("PG_PLUS_MAX_PAGE_SIZE", "200"))
+# 兼容模式：未携带 cursor / page_size 的请求仍返回完整数组，前端逐页迁移完成后关闭
+PG_PLUS_LEGACY_LIST_RESPONSES = os.environ.get("PG_PLUS_LEGACY_LIST_RESPONSES", "True").lower() in {"1", "true", "yes"}
 
 # 文件存储占位符；MinIO/OSS 适配将在后续适配器中实现。
 DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
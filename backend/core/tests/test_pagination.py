@@ -0,0 +1,81 @@
+"""Tests for the project-wide cursor pagination."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.policiesapp.models import Policy
+from apps.programsapp.models import VolunteerRecord
+from apps.scoringapp.models import Student
+
+
+def _records(count: int) -> list[VolunteerRecord]:
+    records = [
+        VolunteerRecord.objects.create(
+            student_name=f"s{index}", student_account=f"s{index}", activity="社区服务", hours=Decimal("1.0")
+        )
+        for index in range(count)
+    ]
+    # 同一时间戳的行由主键决定先后
+    VolunteerRecord.objects.update(created_at=timezone.now())
+    return records
+
+
+@pytest.mark.django_db
+def test_legacy_clients_still_receive_full_arrays(api_client: APIClient, teacher_user: Student) -> None:
+    _records(3)
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.get("/api/v1/programs/volunteer-records/")
+
+    assert response.status_code == 200
+    assert isinstance(response.data, list)
+    assert len(response.data) == 3
+
+
+@pytest.mark.django_db
+def test_cursor_walk_visits_every_row_once(api_client: APIClient, teacher_user: Student) -> None:
+    records = _records(7)
+    api_client.force_authenticate(user=teacher_user)
+
+    seen: list[str] = []
+    response = api_client.get("/api/v1/programs/volunteer-records/", {"page_size": 3})
+    while True:
+        assert response.status_code == 200
+        assert len(response.data["results"]) <= 3
+        seen.extend(item["id"] for item in response.data["results"])
+        if not response.data["next"]:
+            break
+        response = api_client.get(response.data["next"])
+
+    assert seen == sorted((record.id for record in records), reverse=True)
+
+
+@pytest.mark.django_db
+@override_settings(PG_PLUS_MAX_PAGE_SIZE=4)
+def test_page_size_is_capped(api_client: APIClient, teacher_user: Student) -> None:
+    _records(6)
+    api_client.force_authenticate(user=teacher_user)
+
+    response = api_client.get("/api/v1/programs/volunteer-records/", {"page_size": 1000})
+
+    assert len(response.data["results"]) == 4
+
+
+@pytest.mark.django_db
+@override_settings(PG_PLUS_LEGACY_LIST_RESPONSES=False)
+def test_endpoint_page_size_applies_without_compat_flag(api_client: APIClient, student_user: Student) -> None:
+    for index in range(25):
+        Policy.objects.create(title=f"政策{index}")
+    api_client.force_authenticate(user=student_user)
+
+    response = api_client.get("/api/v1/policies/")
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 20
+    assert response.data["next"]
+    assert len(api_client.get(response.data["next"]).data["results"]) == 5
@@ -0,0 +1,57 @@
+"""Tests for the shared cache version counters."""
+from __future__ import annotations
+
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+from pytest_django import DjangoCaptureOnCommitCallbacks
+
+from core.versioned_cache import CacheVersion, get_or_build
+
+
+@pytest.fixture
+def version() -> CacheVersion:
+    counter = CacheVersion("core-tests:version", "Test")
+    cache.delete(counter.key)
+    return counter
+
+
+def test_bump_changes_version(version: CacheVersion) -> None:
+    before = version.get()
+    assert before is not None
+    version.bump()
+    assert version.get() == before + 1
+
+
+@pytest.mark.django_db
+def test_invalidate_waits_for_commit(
+    version: CacheVersion, django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks
+) -> None:
+    before = version.get()
+    assert before is not None
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            version.invalidate()
+            assert version.get() == before
+    assert version.get() == before + 1
+
+
+@override_settings(PG_PLUS_CACHE_SHARED=False, PG_PLUS_LOCAL_VERSION_TTL=0.05)
+def test_process_local_cache_versions_expire(version: CacheVersion) -> None:
+    # 进程内缓存收不到其他进程的递增，版本号到期后换新，陈旧数据不会一直命中
+    before = version.get()
+    assert get_or_build(f"core-tests:{before}", lambda: "stale", 60, "Test") == "stale"
+    time.sleep(0.1)
+    after = version.get()
+    assert after != before
+    assert get_or_build(f"core-tests:{after}", lambda: "fresh", 60, "Test") == "fresh"
+
+
+def test_shared_cache_versions_do_not_expire(version: CacheVersion) -> None:
+    before = version.get()
+    with override_settings(PG_PLUS_LOCAL_VERSION_TTL=0.05):
+        time.sleep(0.1)
+        assert version.get() == before
@@ -0,0 +1,98 @@
+"""带版本号的缓存失效。
+
+版本号存放在 Django cache 中；数据写入的事务提交后递增版本号，读取方把版本号拼进缓存 key，
+或与进程内快照上记录的版本号比较，版本号变化即视为失效，旧版本的缓存不再命中并自然过期。
+
+只有各进程共享同一个缓存后端（``PG_PLUS_CACHE_SHARED``，即配置了 Redis）时，递增才能通知到所有进程。
+未配置 Redis 时缓存退化为进程内 LocMem，版本号以 ``PG_PLUS_LOCAL_VERSION_TTL`` 为有效期：
+到期后各进程各自换用新的版本号重新加载，其他进程的写入最多延迟这么久可见。
+每次到期都会让依赖该版本号的缓存整体重建（如总分排序数组要重新扫描学生表），因此有效期默认取 5 分钟；
+多进程部署若需要及时看到彼此的写入，应配置 Redis。
+版本号的初值取当前毫秒时间戳，版本 key 过期或被淘汰后重新创建时不会与旧版本的缓存 key 重合。
+
+Django cache 不可用时版本号为 None，调用方应直接读库。
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar, cast
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _version_timeout() -> float | None:
+    return None if settings.PG_PLUS_CACHE_SHARED else settings.PG_PLUS_LOCAL_VERSION_TTL
+
+
+def _initial_version() -> int:
+    return int(time.time() * 1000)
+
+
+def run_after_commit(callback: Callable[[], None]) -> None:
+    """在当前事务提交后调用 callback；不在事务中时立即调用。"""
+    if not transaction.get_connection().in_atomic_block:
+        callback()
+        return
+    transaction.on_commit(callback)
+
+
+class CacheVersion:
+    """一个共享版本号；label 用于日志。"""
+
+    def __init__(self, key: str, label: str) -> None:
+        self.key = key
+        self.label = label
+
+    def get(self) -> int | None:
+        """当前版本号；cache 不可用时为 None。"""
+        try:
+            version = cache.get(self.key)
+            if version is None:
+                cache.add(self.key, _initial_version(), timeout=_version_timeout())
+                version = cache.get(self.key)
+            return int(version) if version is not None else None
+        except Exception:  # pragma: no cover - cache backend unavailable
+            logger.warning("%s cache unavailable", self.label, exc_info=True)
+            return None
+
+    def bump(self) -> None:
+        """立即递增版本号。"""
+        try:
+            try:
+                # incr 不改变 key 的有效期
+                cache.incr(self.key)
+            except ValueError:
+                cache.set(self.key, _initial_version(), timeout=_version_timeout())
+        except Exception:  # pragma: no cover - cache backend unavailable
+            logger.warning("Failed to bump %s version", self.label, exc_info=True)
+
+    def invalidate(self) -> None:
+        """数据发生写入时调用：事务提交后递增版本号。"""
+        run_after_commit(self.bump)
+
+
+def get_or_build(key: str | None, build: Callable[[], T], timeout: float, label: str) -> T:
+    """返回 key 下缓存的数据，未命中时调用 build 计算并写入；key 为 None 时直接计算。"""
+    if key is None:
+        return build()
+    cached: Any = None
+    try:
+        cached = cache.get(key)
+    except Exception:  # pragma: no cover - cache backend unavailable
+        logger.warning("%s cache unavailable", label, exc_info=True)
+    if cached is not None:
+        return cast(T, cached)
+    data = build()
+    try:
+        cache.set(key, data, timeout=timeout)
+    except Exception:  # pragma: no cover - cache backend unavailable
+        logger.warning("Failed to store %s", label, exc_info=True)
+    return data